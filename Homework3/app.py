@@ -1,14 +1,34 @@
+import os
 import tkinter as tk
+import zipfile
 from tkinter import messagebox
 from typing import Union, List, Any
 
-import cv2
 import numpy as np
-from PIL import Image, ImageTk
+from PIL import Image
 from matplotlib import pyplot as plt
 
+import parallel_kernels
+from color_space import convert_from_rgb
+from config import (
+    MEMO_MAX_BYTES,
+    PROFILE_LOG_PATH,
+    PROFILE_TRACE_MEMORY,
+    RESULT_CACHE_DIR,
+    RESULT_CACHE_MAX_BYTES,
+    RESULT_CACHE_MIN_SECONDS,
+)
+from frame_stream import FrameStreamer
+from frequency_workspace import FrequencyState, FrequencyWorkspace
 from gui_setup import setup_gui
 from image_operations_hw3 import ImageOperationsHW3
+from image_export import ImageExporter
+from image_loader import ImageLoader
+from image_viewer import ImageViewer
+from instrumentation import OperationProfiler
+from operation_memo import OperationMemo, install as install_memo
+from result_cache import ResultCache, code_version, install
+from session import materialize_entry
 
 
 class ImageProcessorApp:
@@ -17,13 +37,21 @@ class ImageProcessorApp:
         self.root.title('Image Processor Tool')
 
         # Attributes for the image processing
-        self.image: Union[Image.Image, None] = None
-        self.temp_array: np.array = None
-        self.compare_image: Union[Image.Image, None] = None
-        self.image_label: Union[tk.Label, None] = None
-        self.histogram_compare_label: Union[tk.Label, None] = None
-        self.image_history: List[List[Image.Image]] = []
-        self.redo_stack: List[List[Image.Image]] = []
+        self.image: Union[np.ndarray, None] = None
+        self.frequency_workspace = FrequencyWorkspace()
+        self.compare_image: Union[np.ndarray, None] = None
+        # The file of the main image, for the folder navigation, and the background decoder
+        self.image_path: Union[str, None] = None
+        self.image_loader = ImageLoader(self.root)
+        self.image_exporter = ImageExporter(self.root)
+        self.frame_streamer = FrameStreamer(self.root)
+        self.image_viewer: Union[ImageViewer, None] = None
+        self.histogram_compare_viewer: Union[ImageViewer, None] = None
+        # Each entry holds the main image, the compare image and the DFT workflow state of that version
+        self.image_history: List[List[Any]] = []
+        self.redo_stack: List[List[Any]] = []
+        # The opened session file, the versions in the history are read from it when they are viewed
+        self.session_archive: Union[zipfile.ZipFile, None] = None
         self.brightness_alpha = tk.DoubleVar()
         self.brightness_alpha.set(1.0)
         self.brightness_beta = tk.DoubleVar()
@@ -31,20 +59,32 @@ class ImageProcessorApp:
         self.brightness_algorithm.set("Linear")
         self.resize_scale = tk.DoubleVar()
         self.resize_scale.set(1.0)
+        self.interpolation = tk.StringVar()
+        self.interpolation.set("Bilinear")
+        self.expand_canvas = tk.BooleanVar()
+        self.expand_canvas.set(False)
         self.rotate_angle = tk.DoubleVar()
         self.rotate_angle.set(0.0)
         self.min_gray = tk.IntVar()
         self.min_gray.set(0)
         self.max_gray = tk.IntVar()
         self.max_gray.set(255)
+        self.gray_bands = tk.StringVar()
+        self.gray_bands.set("")
         self.preserve_original = tk.BooleanVar()
         self.preserve_original.set(True)
         self.bit_plane_level = tk.IntVar()
         self.bit_plane_level.set(0)
+        self.bit_plane_subset = tk.StringVar()
+        self.bit_plane_subset.set("7,6,5,4")
         self.smoothing_level = tk.IntVar()
         self.smoothing_level.set(1)
         self.sharpening_level = tk.IntVar()
         self.sharpening_level.set(1)
+        self.sharpening_mode = tk.StringVar()
+        self.sharpening_mode.set("Laplacian")
+        self.band_rows = tk.IntVar()
+        self.band_rows.set(0)
         self.lower_hue = tk.IntVar()
         self.lower_hue.set(130)
         self.upper_hue = tk.IntVar()
@@ -53,12 +93,78 @@ class ImageProcessorApp:
         self.lower_saturation.set(50)
         self.upper_saturation = tk.IntVar()
         self.upper_saturation.set(150)
+        self.filter_type = tk.StringVar()
+        self.filter_type.set("Gaussian")
+        self.filter_pass = tk.StringVar()
+        self.filter_pass.set("Low-pass")
+        self.filter_cutoff = tk.IntVar()
+        self.filter_cutoff.set(30)
+        self.filter_order = tk.IntVar()
+        self.filter_order.set(2)
+        self.filter_band_width = tk.IntVar()
+        self.filter_band_width.set(10)
+        self.equalization_mode = tk.StringVar()
+        self.equalization_mode.set("RGB")
+        self.clahe_clip_limit = tk.DoubleVar()
+        self.clahe_clip_limit.set(2.0)
+        self.average_kernel_size = tk.IntVar()
+        self.average_kernel_size.set(5)
+        self.color_model = tk.StringVar()
+        self.color_model.set("HSV")
+        self.hsi_lookup = tk.BooleanVar()
+        self.hsi_lookup.set(False)
+        self.export_format = tk.StringVar()
+        self.export_format.set("PNG")
+        self.jpeg_quality = tk.IntVar()
+        self.jpeg_quality.set(95)
+        self.jpeg_subsampling = tk.StringVar()
+        self.jpeg_subsampling.set("4:2:0")
+        self.png_compress_level = tk.IntVar()
+        self.png_compress_level.set(6)
+        self.tiff_compression = tk.StringVar()
+        self.tiff_compression.set("tiff_lzw")
+        self.stream_chain = tk.StringVar()
+        self.stream_chain.set("")
+        self.status_text = tk.StringVar()
 
-        # Set up operations
+        # Keep the results of the core operations on disk, so reruns with the same input and parameters are reused
+        self.result_cache: Union[ResultCache, None] = None
+        if RESULT_CACHE_DIR:
+            self.result_cache = ResultCache(
+                RESULT_CACHE_DIR,
+                RESULT_CACHE_MAX_BYTES,
+                RESULT_CACHE_MIN_SECONDS,
+                code_version(os.path.dirname(os.path.abspath(__file__))),
+            )
+            install(self.result_cache)
+        # Keep the latest results in memory too, so switching back to a result seen a moment ago is instant
+        self.operation_memo = OperationMemo(MEMO_MAX_BYTES)
+        install_memo(self.operation_memo)
+
+        # Set up operations, every operation call is measured by the profiler
+        self.profiler = OperationProfiler(
+            log_path=PROFILE_LOG_PATH or None,
+            trace_memory=PROFILE_TRACE_MEMORY,
+            on_record=self._show_profile_record,
+        )
         self.operations = ImageOperationsHW3(self)
+        self.profiler.instrument(self.operations)
+        self.update_image = self.profiler.wrap(self.update_image, "update_image")
+        self.update_histogram = self.profiler.wrap(self.update_histogram, "update_histogram")
 
         # GUI setup
         setup_gui(self)
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+
+    def close(self):
+        """
+        Stop the worker processes, close the session file and the window
+        """
+        parallel_kernels.shutdown()
+        if self.session_archive is not None:
+            self.session_archive.close()
+            self.session_archive = None
+        self.root.destroy()
 
     def undo_image(self):
         """
@@ -69,11 +175,11 @@ class ImageProcessorApp:
             return
 
         # Push the current image to the redo stack
-        self.redo_stack.append([self.image, self.compare_image])
+        self.redo_stack.append([self.image, self.compare_image, self.frequency_workspace.snapshot()])
 
-        # Pop the last image from history and update
-        previous_image = self.image_history.pop()
-        self.temp_array = np.array(previous_image[0])
+        # Pop the last image from history and update, the DFT workflow state comes back with it
+        previous_image = materialize_entry(self.image_history.pop())
+        self.frequency_workspace.restore(previous_image[2])
         self.update_image(previous_image, append_history=False)
 
     def redo_image(self):
@@ -85,25 +191,36 @@ class ImageProcessorApp:
             return
 
             # Push the current image back to the history stack
-        self.image_history.append([self.image, self.compare_image])
+        self.image_history.append([self.image, self.compare_image, self.frequency_workspace.snapshot()])
 
         # Pop the last image from the redo stack and update
-        next_image = self.redo_stack.pop()
-        self.temp_array = np.array(next_image[0])
+        next_image = materialize_entry(self.redo_stack.pop())
+        self.frequency_workspace.restore(next_image[2])
         self.update_image(next_image, append_history=False)
 
 
-    def update_image(self, new_images: List[Image.Image], append_history: bool = True):
+    def update_image(
+            self,
+            new_images: List[np.ndarray],
+            append_history: bool = True,
+            frequency_state: Union[FrequencyState, None] = None
+    ):
         """
         Update the image label with a new image
         Args:
             new_images: The new images to display
             append_history: Whether to append the current image to the history
+            frequency_state: The DFT workflow state of the new images, kept in single precision,
+                None leaves the workflow
         """
         if append_history:
             # Append current image to history before updating
             if self.image is not None:
-                self.image_history.append([self.image, self.compare_image])
+                self.image_history.append([self.image, self.compare_image, self.frequency_workspace.snapshot()])
+            if frequency_state is None:
+                self.frequency_workspace.release()
+            else:
+                self.frequency_workspace.store(*frequency_state)
 
             if len(new_images) == 1 or new_images[1] is None:
                 self.compare_image = None
@@ -111,24 +228,33 @@ class ImageProcessorApp:
             # Clear the redo stack when a new image operation is performed
             self.redo_stack.clear()
 
+        # Version the displayed images, so operations on them can be memoized
+        for image in new_images[:2]:
+            if image is not None:
+                self.operation_memo.track(image)
+
         self.image = new_images[0]
-        photo_image: Any = ImageTk.PhotoImage(new_images[0])
-        self.image_label.config(image=photo_image)
-        self.image_label.image = photo_image
+        self.image_viewer.set_image(new_images[0])
         if new_images[1] is not None:
             self.compare_image = new_images[1]
-            photo_image: Any = ImageTk.PhotoImage(new_images[1])
-            self.histogram_compare_label.config(image=photo_image)
-            self.histogram_compare_label.image = photo_image
+            self.histogram_compare_viewer.set_image(new_images[1])
         else:
             self.update_histogram()
 
+    def release_frequency_workspace(self):
+        """
+        Release the DFT workflow buffers, including the versions kept in the undo and redo history
+        """
+        self.frequency_workspace.release()
+        for entry in self.image_history + self.redo_stack:
+            entry[2] = None
+
     def update_histogram(self):
         """
         Update the histogram of the image
         """
         # Update the histogram
-        image_array = np.array(self.image)
+        image_array = self.image
 
         # Check image channels
         if image_array.ndim == 2:
@@ -159,8 +285,8 @@ class ImageProcessorApp:
             plt.hist(image_array[:, :, 2].ravel(), bins=256, color='blue')
             plt.title('Blue Histogram')
 
-            # HSI histograms
-            hsi_image = cv2.cvtColor(image_array, cv2.COLOR_RGB2HSV)
+            # HSI histograms in the selected color model
+            hsi_image = convert_from_rgb(image_array, self.color_model.get().lower(), self.hsi_lookup.get())
             plt.subplot(2, 3, 4)
             plt.hist(hsi_image[:, :, 0].ravel(), bins=256, color='darkgray')
             plt.title('Hue Histogram')
@@ -176,9 +302,18 @@ class ImageProcessorApp:
             plt.tight_layout()
             plt.savefig('histogram.png')
 
-        histogram_image = Image.open("histogram.png").resize(
-            (min(512, self.image.width), min(512, self.image.height))
+        histogram_image = Image.open("histogram.png").convert("RGB")
+        self.histogram_compare_viewer.set_image(np.asarray(histogram_image))
+
+    def _show_profile_record(self, record: dict, stages: List[dict]):
+        """
+        Show the cost of the last operation in the status bar
+        Args:
+            record: The profiler record of the operation
+            stages: The records of the display stages run by the operation
+        """
+        memo = self.operation_memo.statistics()
+        self.status_text.set(
+            f"{OperationProfiler.format_record(record, stages)}, "
+            f"memo {memo['hits']}/{memo['hits'] + memo['misses']} hits ({memo['hit_rate']:.0%})"
         )
-        histogram_photo_image: Any = ImageTk.PhotoImage(histogram_image)
-        self.histogram_compare_label.config(image=histogram_photo_image)
-        self.histogram_compare_label.image = histogram_photo_image
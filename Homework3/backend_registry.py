@@ -0,0 +1,233 @@
+import json
+import os
+import platform
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+# The argument types that are part of the autotuning key, such as kernel sizes
+_KEY_TYPES = (bool, int, float, str)
+
+# The format of the profile file, a profile of another format, machine or library version is tuned again
+PROFILE_FORMAT = 2
+
+# The runs of each backend timed for a key, the first one is not counted as it builds tables and plans
+TUNE_RUNS = 3
+
+
+class BackendRegistry:
+    """
+    Several implementations of each operation, picked per image shape, dtype and scalar arguments. While an
+    operation tunes a new key, each call runs the tunable backend with the fewest timings, so tuning costs no
+    extra runs. Once every backend was timed TUNE_RUNS times, the one with the best warm run is kept in the
+    profile and later calls dispatch straight to it. A backend can be forced for all operations or for one,
+    e.g. the manual kernels for the homework or a fixed backend in tests.
+    """
+
+    def __init__(
+            self,
+            profile_path: Optional[str] = None,
+            autotune: bool = True,
+            default: str = 'opencv',
+            version: str = ''
+    ):
+        """
+        Args:
+            profile_path: The JSON file keeping the chosen backends between runs, ~ is expanded to the home
+                folder, or None to keep them in memory
+            autotune: Whether to time the backends of new keys, otherwise the default backend is used
+            default: The backend used when autotuning is off, or the first registered one when missing
+            version: The versions of the libraries behind the backends, a profile of other versions is not used
+        """
+        self.profile_path = os.path.expanduser(profile_path) if profile_path else None
+        self.autotune = autotune
+        self.default = default
+        self.version = f"{PROFILE_FORMAT}|{platform.machine()}|{os.cpu_count()}|numpy {np.__version__}|{version}"
+        self._backends: Dict[str, Dict[str, Tuple[Callable, bool]]] = {}
+        self._forced: Dict[Optional[str], str] = {}
+        self._profile: Dict[str, str] = self._load_profile()
+        # The timings of the keys being tuned, by key and backend, and the backends that failed on a key
+        self._timings: Dict[str, Dict[str, List[float]]] = {}
+        self._failed: Dict[str, Set[str]] = {}
+        # Guards the profile and the timings, the frame streamer dispatches from several threads
+        self._lock = threading.Lock()
+
+    def register(self, operation: str, backend: str, tunable: bool = True) -> Callable[[Callable], Callable]:
+        """
+        Register an implementation of an operation, used as a decorator
+        Args:
+            operation: The name of the operation
+            backend: The name of the backend, e.g. 'manual', 'numpy', 'opencv' or 'fft'
+            tunable: Whether the autotuner may time it, slow reference implementations are only run when forced
+        Returns:
+            The decorator
+        """
+        def decorator(function: Callable) -> Callable:
+            self._backends.setdefault(operation, {})[backend] = (function, tunable)
+            return function
+
+        return decorator
+
+    def backends(self, operation: str) -> Tuple[str, ...]:
+        """
+        Get the backends of an operation
+        Args:
+            operation: The name of the operation
+        Returns:
+            The names of the backends
+        """
+        return tuple(self._backends[operation])
+
+    def force(self, backend: Optional[str], operation: Optional[str] = None):
+        """
+        Force a backend, or stop forcing one with None
+        Args:
+            backend: The name of the backend
+            operation: The operation, or None for every operation that has the backend
+        """
+        if backend is None:
+            self._forced.pop(operation, None)
+        else:
+            self._forced[operation] = backend
+
+    @contextmanager
+    def forced(self, backend: str, operation: Optional[str] = None):
+        """
+        Force a backend inside a with block
+        Args:
+            backend: The name of the backend
+            operation: The operation, or None for every operation that has the backend
+        """
+        previous = self._forced.get(operation)
+        self.force(backend, operation)
+        try:
+            yield
+        finally:
+            self.force(previous, operation)
+
+    def dispatch(self, operation: str, image_array: np.ndarray, *args, backend: Optional[str] = None) -> Any:
+        """
+        Run an operation with the backend chosen for its image and arguments
+        Args:
+            operation: The name of the operation
+            image_array: The image
+            args: The other arguments of the operation
+            backend: The backend to run, or None to pick one
+        Returns:
+            The result of the operation
+        """
+        backends = self._backends[operation]
+        if backend is not None:
+            assert backend in backends, f"Unknown {operation} backend: {backend}"
+        else:
+            backend = self._forced.get(operation) or self._forced.get(None)
+        if backend in backends:
+            return backends[backend][0](image_array, *args)
+
+        key = self.key(operation, image_array, args)
+        backend = self._profile.get(key)
+        if backend in backends:
+            return backends[backend][0](image_array, *args)
+
+        if not self.autotune:
+            backend = self.default if self.default in backends else next(iter(backends))
+            return backends[backend][0](image_array, *args)
+        return self._tune(operation, key, image_array, args)
+
+    def choice(self, operation: str, image_array: np.ndarray, *args) -> Optional[str]:
+        """
+        Get the backend the profile holds for an image and arguments
+        Args:
+            operation: The name of the operation
+            image_array: The image
+            args: The other arguments of the operation
+        Returns:
+            The name of the backend, or None when the key was not tuned yet
+        """
+        return self._profile.get(self.key(operation, image_array, args))
+
+    @staticmethod
+    def key(operation: str, image_array: np.ndarray, args: Tuple[Any, ...]) -> str:
+        """
+        Get the profile key of a call: the operation, the shape and dtype of the image and the scalar arguments
+        """
+        scalars = [arg for arg in args if isinstance(arg, _KEY_TYPES)]
+        return f"{operation}|{'x'.join(map(str, image_array.shape))}|{image_array.dtype.str}|{scalars}"
+
+    def _candidates(self, operation: str, key: str) -> List[str]:
+        """
+        Get the tunable backends of an operation that did not fail on the key
+        """
+        failed = self._failed.get(key, set())
+        return [
+            backend for backend, (_, tunable) in self._backends[operation].items()
+            if tunable and backend not in failed
+        ]
+
+    def _tune(self, operation: str, key: str, image_array: np.ndarray, args: Tuple[Any, ...]) -> Any:
+        """
+        Run and time the tunable backend with the fewest timings for the key, and keep the fastest warm
+        backend in the profile once every backend has all its runs. A backend that raises, e.g. on a dtype it
+        does not support, is dropped for the key and the call is run by another one.
+        """
+        while True:
+            with self._lock:
+                timings = self._timings.setdefault(key, {})
+                candidates = self._candidates(operation, key)
+                backend = min(candidates, key=lambda name: len(timings.get(name, ())))
+
+            start = time.perf_counter()
+            try:
+                result = self._backends[operation][backend][0](image_array, *args)
+                break
+            except Exception:
+                # The last backend left keeps its error, so the key fails like the operation itself
+                if len(candidates) == 1:
+                    raise
+                with self._lock:
+                    self._failed.setdefault(key, set()).add(backend)
+                    timings.pop(backend, None)
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            timings.setdefault(backend, []).append(elapsed)
+            candidates = self._candidates(operation, key)
+            if key not in self._profile and all(len(timings.get(name, ())) >= TUNE_RUNS for name in candidates):
+                self._profile[key] = min(candidates, key=lambda name: min(timings[name][1:]))
+                self._timings.pop(key, None)
+                self._failed.pop(key, None)
+                self._save_profile()
+        return result
+
+    def _load_profile(self) -> Dict[str, str]:
+        """
+        Read the profile file, an unreadable profile or one of another version is tuned again
+        """
+        if not self.profile_path or not os.path.exists(self.profile_path):
+            return {}
+        try:
+            with open(self.profile_path, "r", encoding="utf-8") as file:
+                profile = json.load(file)
+            if profile.get('version') != self.version:
+                return {}
+            return dict(profile['backends'])
+        except (OSError, ValueError, TypeError, KeyError, AttributeError):
+            return {}
+
+    def _save_profile(self):
+        """
+        Write the profile file atomically
+        """
+        if not self.profile_path:
+            return
+        temporary_path = f"{self.profile_path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.profile_path) or ".", exist_ok=True)
+            with open(temporary_path, "w", encoding="utf-8") as file:
+                json.dump({'version': self.version, 'backends': self._profile}, file, indent=2, sort_keys=True)
+            os.replace(temporary_path, self.profile_path)
+        except OSError:
+            pass
@@ -0,0 +1,105 @@
+from typing import Iterator, Tuple
+
+import cv2
+import numpy as np
+
+
+def iter_bands(height: int, band_rows: int, halo: int = 0) -> Iterator[Tuple[int, int, int, int]]:
+    """
+    Split the rows of an image into bands
+    Args:
+        height: The height of the image
+        band_rows: The number of rows per band
+        halo: The number of extra rows read above and below each band for neighborhood operations
+    Returns:
+        For each band the (start, stop) rows to write and the (start, stop) rows to read including the halo
+    """
+    for start in range(0, height, band_rows):
+        stop = min(start + band_rows, height)
+        yield start, stop, max(0, start - halo), min(height, stop + halo)
+
+
+def adjust_brightness_bands(
+        image_array: np.ndarray,
+        alpha: float,
+        beta: float,
+        algorithm: str,
+        band_rows: int
+) -> np.ndarray:
+    """
+    Adjust the brightness band by band with one reusable float32 buffer, the exponential and
+    logarithmic algorithms find the global min/max in a first pass and normalize in a second pass
+    Args:
+        image_array: The image to adjust
+        alpha: The alpha value for the algorithm
+        beta: The beta value for the algorithm
+        algorithm: The algorithm to use for adjusting the brightness
+        band_rows: The number of rows per band
+    Returns:
+        The adjusted image
+    """
+    result = np.empty(image_array.shape, dtype=np.uint8)
+    buffer = np.empty((band_rows,) + image_array.shape[1:], dtype=np.float32)
+
+    def evaluate(start: int, stop: int) -> np.ndarray:
+        band = buffer[:stop - start]
+        np.copyto(band, image_array[start:stop], casting='unsafe')
+        np.multiply(band, alpha, out=band)
+        np.add(band, beta, out=band)
+        if algorithm == "Exponential":
+            np.exp(band, out=band)
+        elif algorithm == "Logarithmic":
+            np.log(band, out=band)
+        return band
+
+    bands = list(iter_bands(image_array.shape[0], band_rows))
+    minimum = maximum = None
+    if algorithm != "Linear":
+        # First pass: the global min/max of the transformed image
+        for start, stop, _, _ in bands:
+            band = evaluate(start, stop)
+            band_min, band_max = np.min(band), np.max(band)
+            minimum = band_min if minimum is None else min(minimum, band_min)
+            maximum = band_max if maximum is None else max(maximum, band_max)
+
+    # Second pass: transform, normalize and clip each band into the result
+    for start, stop, _, _ in bands:
+        band = evaluate(start, stop)
+        if minimum is not None:
+            np.subtract(band, minimum, out=band)
+            np.divide(band, maximum - minimum, out=band)
+            np.multiply(band, 255, out=band)
+        np.clip(band, 0, 255, out=band)
+        np.copyto(result[start:stop], band, casting='unsafe')
+
+    return result
+
+
+def sharpen_bands(image_array: np.ndarray, weight: float, band_rows: int) -> np.ndarray:
+    """
+    Compute image - weight * Laplacian band by band with reusable float32 buffers, each band reads
+    one halo row above and below so the result matches the full-image Laplacian
+    Args:
+        image_array: The image to sharpen
+        weight: The weight of the Laplacian
+        band_rows: The number of rows per band
+    Returns:
+        The sharpened image
+    """
+    result = np.empty(image_array.shape, dtype=np.uint8)
+    laplacian = np.empty((band_rows + 2,) + image_array.shape[1:], dtype=np.float32)
+    buffer = np.empty((band_rows,) + image_array.shape[1:], dtype=np.float32)
+
+    for start, stop, read_start, read_stop in iter_bands(image_array.shape[0], band_rows, halo=1):
+        band_laplacian = laplacian[:read_stop - read_start]
+        cv2.Laplacian(image_array[read_start:read_stop], cv2.CV_32F, dst=band_laplacian)
+
+        # Drop the halo rows and subtract the weighted Laplacian in place
+        band = buffer[:stop - start]
+        inner = band_laplacian[start - read_start:stop - read_start]
+        np.multiply(inner, weight, out=band)
+        np.subtract(image_array[start:stop], band, out=band)
+        np.clip(band, 0, 255, out=band)
+        np.copyto(result[start:stop], band, casting='unsafe')
+
+    return result
@@ -0,0 +1,98 @@
+from typing import Iterable, List
+
+import numpy as np
+
+# The number of pixels decomposed per chunk, a multiple of 8 so every chunk fills whole packed bytes
+CHUNK_PIXELS = 1 << 20
+
+# PLANE_LUTS[bit][byte] holds the 8 pixels of a packed byte of the plane, already shifted to the bit
+PLANE_LUTS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, np.newaxis], axis=1)[np.newaxis] << \
+             np.arange(8, dtype=np.uint8)[:, np.newaxis, np.newaxis]
+PLANE_LUTS.flags.writeable = False
+
+# The bit-plane stacks of the recently decomposed images
+_cache: List['BitPlaneStack'] = []
+_CACHE_ENTRIES = 2
+
+
+class BitPlaneStack:
+    """
+    The eight bit-planes of an 8-bit image, decomposed in one pass and stored packed at 1 bit per pixel
+    """
+
+    def __init__(self, image_array: np.ndarray):
+        """
+        Args:
+            image_array: The uint8 image to decompose
+        """
+        assert image_array.dtype == np.uint8, "Bit-planes need an 8-bit image"
+        self.source = image_array
+        self.shape = image_array.shape
+        self.size = image_array.size
+
+        # Pack the bits of each plane chunk by chunk, so the temporaries stay at the chunk size while the chunk
+        # is still in cache. This is several times faster than packing the transposed output of np.unpackbits.
+        flat = image_array.reshape(-1)
+        self.packed = np.empty((8, (self.size + 7) // 8), dtype=np.uint8)
+        bits = np.empty(min(CHUNK_PIXELS, self.size), dtype=np.uint8)
+        for start in range(0, self.size, CHUNK_PIXELS):
+            chunk = flat[start:start + CHUNK_PIXELS]
+            chunk_bits = bits[:len(chunk)]
+            packed = self.packed[:, start // 8:(start + len(chunk) + 7) // 8]
+            for bit_plane in range(8):
+                np.right_shift(chunk, bit_plane, out=chunk_bits)
+                np.bitwise_and(chunk_bits, 1, out=chunk_bits)
+                packed[bit_plane] = np.packbits(chunk_bits)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The number of bytes of the packed planes
+        """
+        return self.packed.nbytes
+
+    def plane(self, bit_plane: int) -> np.ndarray:
+        """
+        Get a bit-plane scaled to the full 0-255 range for display
+        Args:
+            bit_plane: The bit-plane, 0 for the least significant bit
+        Returns:
+            The bit-plane image
+        """
+        assert 0 <= bit_plane <= 7, "Bit-plane level must be between 0 and 7"
+        bits = np.unpackbits(self.packed[bit_plane], count=self.size)
+        return (bits * np.uint8(255)).reshape(self.shape)
+
+    def reconstruct(self, bit_planes: Iterable[int]) -> np.ndarray:
+        """
+        Rebuild the image from a subset of its bit-planes, the other bits are 0
+        Args:
+            bit_planes: The bit-planes to keep
+        Returns:
+            The reconstructed image
+        """
+        result = np.zeros(self.packed.shape[1] * 8, dtype=np.uint8)
+        for bit_plane in sorted(set(bit_planes)):
+            assert 0 <= bit_plane <= 7, "Bit-plane level must be between 0 and 7"
+            # Expand every packed byte into its 8 shifted pixels with one gather
+            result |= np.take(PLANE_LUTS[bit_plane], self.packed[bit_plane], axis=0).reshape(-1)
+        return result[:self.size].reshape(self.shape)
+
+
+def bit_plane_stack(image_array: np.ndarray) -> BitPlaneStack:
+    """
+    Get the bit-plane stack of an image, reusing the cached one for the same image
+    Args:
+        image_array: The uint8 image
+    Returns:
+        The bit-plane stack
+    """
+    for entry in _cache:
+        if entry.source is image_array:
+            return entry
+
+    entry = BitPlaneStack(image_array)
+    _cache.append(entry)
+    if len(_cache) > _CACHE_ENTRIES:
+        _cache.pop(0)
+    return entry
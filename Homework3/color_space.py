@@ -0,0 +1,237 @@
+from typing import Union
+
+import cv2
+import numpy as np
+
+# The byte budget of one float32 row band, keeping each temporary of the conversion cache-sized
+HSI_BAND_BYTES = 256 * 1024
+
+COLOR_MODELS = ('hsv', 'hsi')
+
+# The uint8 HSI value of every 24-bit RGB color, built on the first LUT conversion
+_hsi_lut: Union[np.ndarray, None] = None
+
+# For each hue sector, which of (x, y, z) of the sector formulas ends up in the R, G and B channels
+_SECTOR_CHANNELS = np.array([
+    [1, 2, 0],
+    [0, 1, 2],
+    [2, 0, 1],
+])
+
+
+def _band_rows(width: int) -> int:
+    """
+    Get the number of rows of a band so that one float32 row band stays within HSI_BAND_BYTES
+    Args:
+        width: The width of the image
+    Returns:
+        The number of rows per band
+    """
+    return max(1, HSI_BAND_BYTES // (width * np.dtype(np.float32).itemsize))
+
+
+def rgb_to_hsi(image_array: np.ndarray, quantize: bool = True, use_lut: bool = False) -> np.ndarray:
+    """
+    Convert an RGB image to HSI with the arccos-based hue, evaluated in row bands
+    Args:
+        image_array: The RGB image to convert
+        quantize: Whether to return uint8 channels scaled to 0-255 instead of float32 values
+            with the hue in radians [0, 2pi) and the saturation and intensity in [0, 1]
+        use_lut: Whether to gather the uint8 result from a lookup table of all 24-bit colors,
+            which is built once and makes repeated conversions a single gather
+    Returns:
+        The HSI image
+    """
+    assert image_array.ndim == 3 and image_array.shape[2] == 3, "HSI conversion requires an RGB image"
+
+    if use_lut and quantize and image_array.dtype == np.uint8:
+        return _rgb_to_hsi_lut(image_array)
+
+    height, width = image_array.shape[:2]
+    result = np.empty(image_array.shape, dtype=np.uint8 if quantize else np.float32)
+    band_rows = _band_rows(width)
+
+    # Buffers reused by every band, the last band uses views of the first rows
+    rgb = np.empty((band_rows, width, 3), dtype=np.float32)
+    total = np.empty((band_rows, width), dtype=np.float32)
+    temp = np.empty((band_rows, width), dtype=np.float32)
+    numerator = np.empty((band_rows, width), dtype=np.float32)
+    denominator = np.empty((band_rows, width), dtype=np.float32)
+    hsi = np.empty((band_rows, width, 3), dtype=np.float32)
+
+    for start in range(0, height, band_rows):
+        stop = min(start + band_rows, height)
+        rows = stop - start
+        band_rgb = rgb[:rows]
+        band_total, band_temp = total[:rows], temp[:rows]
+        band_numerator, band_denominator = numerator[:rows], denominator[:rows]
+        band_hsi = hsi[:rows]
+        hue, saturation, intensity = band_hsi[:, :, 0], band_hsi[:, :, 1], band_hsi[:, :, 2]
+
+        np.multiply(image_array[start:stop], np.float32(1 / 255), out=band_rgb, casting='unsafe')
+        r, g, b = band_rgb[:, :, 0], band_rgb[:, :, 1], band_rgb[:, :, 2]
+
+        # I = (R + G + B) / 3
+        np.add(r, g, out=band_total)
+        np.add(band_total, b, out=band_total)
+        np.divide(band_total, 3, out=intensity)
+
+        # S = 1 - 3 * min(R, G, B) / (R + G + B), zero for black pixels
+        np.minimum(r, g, out=band_temp)
+        np.minimum(band_temp, b, out=band_temp)
+        np.multiply(band_temp, 3, out=band_temp)
+        np.divide(band_temp, band_total, out=band_temp, where=band_total > 0)
+        np.subtract(1, band_temp, out=saturation)
+        saturation[band_total == 0] = 0
+
+        # theta = arccos(((R - G) + (R - B)) / 2 / sqrt((R - G)^2 + (R - B)(G - B)))
+        np.subtract(r, g, out=band_temp)
+        np.subtract(r, b, out=band_numerator)
+        np.multiply(band_temp, band_temp, out=band_denominator)
+        np.add(band_numerator, band_temp, out=band_temp)
+        np.subtract(g, b, out=hue)
+        np.multiply(band_numerator, hue, out=band_numerator)
+        np.add(band_denominator, band_numerator, out=band_denominator)
+        np.sqrt(band_denominator, out=band_denominator)
+        np.add(band_denominator, np.float32(1e-8), out=band_denominator)
+        np.multiply(band_temp, 0.5, out=band_temp)
+        np.divide(band_temp, band_denominator, out=band_temp)
+        np.clip(band_temp, -1, 1, out=band_temp)
+        np.arccos(band_temp, out=hue)
+
+        # H = theta if B <= G, otherwise 2pi - theta
+        np.subtract(np.float32(2 * np.pi), hue, out=hue, where=b > g)
+
+        if quantize:
+            np.multiply(hue, np.float32(255 / (2 * np.pi)), out=hue)
+            np.multiply(saturation, 255, out=saturation)
+            np.multiply(intensity, 255, out=intensity)
+            np.rint(band_hsi, out=band_hsi)
+            np.clip(band_hsi, 0, 255, out=band_hsi)
+            np.copyto(result[start:stop], band_hsi, casting='unsafe')
+        else:
+            result[start:stop] = band_hsi
+
+    return result
+
+
+def hsi_to_rgb(hsi_array: np.ndarray) -> np.ndarray:
+    """
+    Convert an HSI image back to RGB with the sector formulas, evaluated in row bands
+    Args:
+        hsi_array: The HSI image, either uint8 channels scaled to 0-255 or float32 values as returned
+            by rgb_to_hsi with quantize=False
+    Returns:
+        The RGB image
+    """
+    height, width = hsi_array.shape[:2]
+    quantized = hsi_array.dtype == np.uint8
+    result = np.empty(hsi_array.shape, dtype=np.uint8)
+    band_rows = _band_rows(width)
+
+    hsi = np.empty((band_rows, width, 3), dtype=np.float32)
+    temp = np.empty((band_rows, width), dtype=np.float32)
+    xyz = np.empty((3, band_rows, width), dtype=np.float32)
+    rgb = np.empty((band_rows, width, 3), dtype=np.float32)
+    sector = np.empty((band_rows, width), dtype=np.intp)
+
+    for start in range(0, height, band_rows):
+        stop = min(start + band_rows, height)
+        rows = stop - start
+        band_hsi, band_temp, band_rgb, band_sector = hsi[:rows], temp[:rows], rgb[:rows], sector[:rows]
+        x, y, z = xyz[0, :rows], xyz[1, :rows], xyz[2, :rows]
+
+        if quantized:
+            np.multiply(hsi_array[start:stop], np.float32(1 / 255), out=band_hsi, casting='unsafe')
+            np.multiply(band_hsi[:, :, 0], np.float32(2 * np.pi), out=band_hsi[:, :, 0])
+        else:
+            np.copyto(band_hsi, hsi_array[start:stop])
+        hue, saturation, intensity = band_hsi[:, :, 0], band_hsi[:, :, 1], band_hsi[:, :, 2]
+
+        # Split the hue into the three 120 degree sectors and the angle inside the sector
+        np.floor_divide(hue, np.float32(2 * np.pi / 3), out=band_temp)
+        np.clip(band_temp, 0, 2, out=band_temp)
+        np.copyto(band_sector, band_temp, casting='unsafe')
+        np.multiply(band_temp, np.float32(2 * np.pi / 3), out=band_temp)
+        np.subtract(hue, band_temp, out=hue)
+
+        # x = I(1 - S), y = I(1 + S cos(H) / cos(pi/3 - H)), z = 3I - (x + y)
+        np.subtract(1, saturation, out=x)
+        np.multiply(x, intensity, out=x)
+        np.subtract(np.float32(np.pi / 3), hue, out=band_temp)
+        np.cos(band_temp, out=band_temp)
+        np.cos(hue, out=y)
+        np.divide(y, band_temp, out=y)
+        np.multiply(y, saturation, out=y)
+        np.add(y, 1, out=y)
+        np.multiply(y, intensity, out=y)
+        np.multiply(intensity, 3, out=z)
+        np.subtract(z, x, out=z)
+        np.subtract(z, y, out=z)
+
+        for channel in range(3):
+            np.choose(_SECTOR_CHANNELS[band_sector, channel], (x, y, z), out=band_rgb[:, :, channel])
+
+        np.multiply(band_rgb, 255, out=band_rgb)
+        np.rint(band_rgb, out=band_rgb)
+        np.clip(band_rgb, 0, 255, out=band_rgb)
+        np.copyto(result[start:stop], band_rgb, casting='unsafe')
+
+    return result
+
+
+def _rgb_to_hsi_lut(image_array: np.ndarray) -> np.ndarray:
+    """
+    Convert a uint8 RGB image to quantized HSI with a gather from the 24-bit lookup table
+    Args:
+        image_array: The RGB image to convert
+    Returns:
+        The uint8 HSI image
+    """
+    global _hsi_lut
+
+    if _hsi_lut is None:
+        # Each red level is one 256x256 image of all green and blue combinations
+        lut = np.empty((256, 256, 256, 3), dtype=np.uint8)
+        green, blue = np.indices((256, 256), dtype=np.uint8)
+        block = np.empty((256, 256, 3), dtype=np.uint8)
+        block[:, :, 1] = green
+        block[:, :, 2] = blue
+        for red in range(256):
+            block[:, :, 0] = red
+            lut[red] = rgb_to_hsi(block)
+        _hsi_lut = lut.reshape(-1, 3)
+
+    height, width = image_array.shape[:2]
+    result = np.empty(image_array.shape, dtype=np.uint8)
+    band_rows = _band_rows(width)
+    index = np.empty((band_rows, width), dtype=np.uint32)
+    for start in range(0, height, band_rows):
+        stop = min(start + band_rows, height)
+        band, band_index = image_array[start:stop], index[:stop - start]
+
+        # Pack each pixel to its 24-bit color as the table index
+        np.left_shift(band[:, :, 0], 16, out=band_index, dtype=np.uint32)
+        np.bitwise_or(band_index, np.left_shift(band[:, :, 1], 8, dtype=np.uint32), out=band_index)
+        np.bitwise_or(band_index, band[:, :, 2], out=band_index)
+        np.take(_hsi_lut, band_index, axis=0, out=result[start:stop])
+
+    return result
+
+
+def convert_from_rgb(image_array: np.ndarray, color_model: str = 'hsv', use_lut: bool = False) -> np.ndarray:
+    """
+    Convert an RGB image to the selected color model with uint8 channels
+    Args:
+        image_array: The RGB image to convert
+        color_model: 'hsv' for OpenCV's HSV with the hue in 0-179, or 'hsi' for HSI scaled to 0-255
+        use_lut: Whether to use the lookup table for the HSI conversion
+    Returns:
+        The converted image
+    """
+    if color_model == 'hsv':
+        return cv2.cvtColor(image_array, cv2.COLOR_RGB2HSV)
+    elif color_model == 'hsi':
+        return rgb_to_hsi(image_array, use_lut=use_lut)
+    else:
+        raise ValueError(f"Invalid color model: {color_model}")
@@ -1,4 +1,57 @@
 MAIN_THEME = "#282c34"
 SECONDARY_THEME = "#3e4452"
 MAIN_FONT_COLOR = "#ffffff"
-MAIN_ACTIVE_COLOR = "#528bff"
\ No newline at end of file
+MAIN_ACTIVE_COLOR = "#528bff"
+
+# Operation profiling, the file the records are appended to, its format follows the extension (.csv or .jsonl),
+# empty to only show them in the status bar
+PROFILE_LOG_PATH = ""
+PROFILE_TRACE_MEMORY = False
+
+# Image viewer, the size of the view, the size of the rendered tiles and the number of tiles kept
+VIEWER_SIZE = 512
+VIEWER_TILE_SIZE = 256
+VIEWER_TILE_CACHE = 128
+
+# Image loading, the decoded images kept, the decoding threads, the images prefetched on each side of the
+# opened one in its folder and the interval the UI polls the decoding at
+LOADER_CACHE_ENTRIES = 6
+LOADER_WORKERS = 2
+LOADER_PREFETCH_DISTANCE = 1
+LOADER_POLL_MS = 20
+
+# Rotation and resize, the bytes of remap grids kept for repeated transforms of the same size
+REMAP_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Image export, the encoding threads
+EXPORT_WORKERS = 4
+
+# Session files, the uncompressed bytes of each stored chunk of image rows and the zlib level of the chunks
+SESSION_CHUNK_BYTES = 1 << 20
+SESSION_COMPRESS_LEVEL = 1
+
+# Result cache, the folder keeping the results of the core operations between runs (empty to disable, e.g.
+# "~/.cache/image_processor_tool" to enable), its size limit and the compute time below which results are not stored
+RESULT_CACHE_DIR = ""
+RESULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+RESULT_CACHE_MIN_SECONDS = 0.05
+
+# In-memory memo of the core operations, the bytes of results kept
+MEMO_MAX_BYTES = 256 * 1024 * 1024
+
+# Frame streaming, the processing threads and the frames each queue between the stages holds
+STREAM_WORKERS = 2
+STREAM_QUEUE_SIZE = 4
+
+# Parallel manual kernels, the worker processes (0 for one per CPU), the row bands queued per worker and the
+# rows below which an image is processed in the calling process
+PARALLEL_WORKERS = 0
+PARALLEL_BANDS_PER_WORKER = 4
+PARALLEL_MIN_ROWS = 64
+
+# Operation backends, the file keeping the fastest backend of each operation and image size between runs (empty to
+# keep them for the run, e.g. "~/.cache/image_processor_tool/backend_profile.json" to keep them), whether new sizes
+# are timed, and a backend forced for every operation (e.g. "manual" for the pixel loops, empty to pick the fastest)
+BACKEND_PROFILE_PATH = ""
+BACKEND_AUTOTUNE = True
+FORCE_BACKEND = ""
@@ -0,0 +1,112 @@
+import cv2
+import numpy as np
+
+import parallel_kernels
+from backend_registry import BackendRegistry
+from config import BACKEND_AUTOTUNE, BACKEND_PROFILE_PATH, FORCE_BACKEND
+from integral_image import integral_image
+from sharpening import LAPLACIAN_KERNEL, laplacian
+
+# The rows of windows the NumPy median gathers at once, bounding the memory of the window view
+NUMPY_MEDIAN_ROWS = 64
+
+backends = BackendRegistry(BACKEND_PROFILE_PATH or None, BACKEND_AUTOTUNE, version=f"opencv {cv2.__version__}")
+if FORCE_BACKEND:
+    backends.force(FORCE_BACKEND)
+
+
+def _per_channel(function, image_array: np.ndarray, *args) -> np.ndarray:
+    """
+    Apply a grayscale kernel to each channel of an image
+    """
+    if image_array.ndim == 2:
+        return function(image_array, *args)
+    return np.dstack([function(image_array[:, :, channel], *args) for channel in range(image_array.shape[2])])
+
+
+@backends.register('median', 'manual', tunable=False)
+def _median_manual(image_array: np.ndarray, kernel_size: int) -> np.ndarray:
+    # Pixel by pixel, the rows split in bands over the worker processes
+    return parallel_kernels.median(image_array, kernel_size)
+
+
+@backends.register('median', 'opencv')
+def _median_opencv(image_array: np.ndarray, kernel_size: int) -> np.ndarray:
+    return cv2.medianBlur(image_array, kernel_size)
+
+
+@backends.register('median', 'numpy')
+def _median_numpy(image_array: np.ndarray, kernel_size: int) -> np.ndarray:
+    # The windows of a replicated border, like cv2.medianBlur, gathered a few rows at a time
+    padding = kernel_size // 2
+    pad_width = ((padding, padding), (padding, padding)) + ((0, 0),) * (image_array.ndim - 2)
+    padded = np.pad(image_array, pad_width, mode='edge')
+    windows = np.lib.stride_tricks.sliding_window_view(padded, (kernel_size, kernel_size), axis=(0, 1))
+
+    filtered = np.empty_like(image_array)
+    for start in range(0, image_array.shape[0], NUMPY_MEDIAN_ROWS):
+        band = windows[start:start + NUMPY_MEDIAN_ROWS]
+        flat = band.reshape(band.shape[:-2] + (kernel_size * kernel_size,))
+        # The middle of an odd number of values is one of them, so the partition gives the exact median
+        middle = kernel_size * kernel_size // 2
+        filtered[start:start + NUMPY_MEDIAN_ROWS] = np.partition(flat, middle, axis=-1)[..., middle]
+    return filtered
+
+
+@backends.register('laplacian', 'manual', tunable=False)
+def _laplacian_manual(image_array: np.ndarray) -> np.ndarray:
+    return _per_channel(parallel_kernels.convolve, image_array, LAPLACIAN_KERNEL.astype(np.int64))
+
+
+@backends.register('laplacian', 'opencv')
+def _laplacian_opencv(image_array: np.ndarray) -> np.ndarray:
+    # Saturating the response to uint8 in the same pass
+    return laplacian(image_array)
+
+
+@backends.register('laplacian', 'numpy')
+def _laplacian_numpy(image_array: np.ndarray) -> np.ndarray:
+    # The four neighbours minus four times the center, with the reflected border of cv2.filter2D
+    pad_width = ((1, 1), (1, 1)) + ((0, 0),) * (image_array.ndim - 2)
+    padded = np.pad(image_array, pad_width, mode='reflect').astype(np.int16)
+    response = padded[:-2, 1:-1] + padded[2:, 1:-1] + padded[1:-1, :-2] + padded[1:-1, 2:]
+    response -= 4 * padded[1:-1, 1:-1]
+    return np.clip(response, 0, 255).astype(np.uint8)
+
+
+@backends.register('average', 'manual', tunable=False)
+def _average_manual(image_array: np.ndarray, kernel_size: int) -> np.ndarray:
+    # The average mask is a kernel of ones divided by the kernel size squared
+    mask = np.ones((kernel_size, kernel_size)) / (kernel_size ** 2)
+    return _per_channel(parallel_kernels.convolve, image_array, mask)
+
+
+@backends.register('average', 'opencv')
+def _average_opencv(image_array: np.ndarray, kernel_size: int) -> np.ndarray:
+    return cv2.blur(image_array, (kernel_size, kernel_size))
+
+
+@backends.register('average', 'integral')
+def _average_integral(image_array: np.ndarray, kernel_size: int) -> np.ndarray:
+    # Gather the window sums from the integral image shared by all kernel sizes
+    return integral_image(image_array, kernel_size).box_mean(kernel_size)
+
+
+@backends.register('average', 'fft')
+def _average_fft(image_array: np.ndarray, kernel_size: int) -> np.ndarray:
+    # The window sums as a product of spectra, which costs the same for any kernel size
+    radius = kernel_size // 2
+    pad_width = ((radius, radius), (radius, radius)) + ((0, 0),) * (image_array.ndim - 2)
+    padded = np.pad(image_array.astype(np.float64), pad_width, mode='reflect')
+    size = padded.shape[:2]
+    box = np.ones((kernel_size, kernel_size))
+    if image_array.ndim == 3:
+        box = box[:, :, np.newaxis]
+    spectrum = np.fft.rfft2(padded, axes=(0, 1)) * np.fft.rfft2(box, s=size, axes=(0, 1))
+    sums = np.fft.irfft2(spectrum, s=size, axes=(0, 1))[2 * radius:, 2 * radius:]
+    mean = sums / kernel_size ** 2
+    # The sums of integer images are integers over an odd area, so the mean is never halfway and rounds like
+    # cv2.blur, float images keep the fraction
+    if np.issubdtype(image_array.dtype, np.integer):
+        np.rint(mean, out=mean)
+    return mean.astype(image_array.dtype)
@@ -0,0 +1,291 @@
+import ast
+import glob
+import inspect
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from config import LOADER_POLL_MS, STREAM_QUEUE_SIZE, STREAM_WORKERS
+from image_export import export_image
+from image_loader import decode_image, folder_images
+from result_cache import PURE_OPERATIONS
+
+# Ends a queue, one per consumer
+_END = object()
+
+# The interval the stages check for a failure of another stage while waiting on a queue
+_WAIT_SECONDS = 0.1
+
+
+def _natural_key(path: str) -> List[Any]:
+    """
+    Sort key putting frame_2 before frame_10
+    """
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", os.path.basename(path))]
+
+
+def frame_paths(source: str) -> Iterator[str]:
+    """
+    Yield the frames of a sequence in order
+    Args:
+        source: A folder of frames, a numbered pattern such as frames/frame_%04d.png, or a glob pattern
+    Returns:
+        The paths of the frames, a numbered pattern is followed from 0 or 1 until the first missing number
+    """
+    if os.path.isdir(source):
+        paths = folder_images(os.path.join(source, "_"))
+        yield from sorted(paths, key=_natural_key)
+    elif "%" in source:
+        number = 0 if os.path.exists(source % 0) else 1
+        while os.path.exists(source % number):
+            yield source % number
+            number += 1
+    else:
+        yield from sorted(glob.glob(source), key=_natural_key)
+
+
+def parse_chain(spec: str) -> List[Tuple[str, Tuple[Any, ...]]]:
+    """
+    Parse a chain of core operations written as "operation arg arg; operation arg", for example
+    "apply_median_mask 3; rgb_image red"
+    Args:
+        spec: The chain, empty for none
+    Returns:
+        The name and arguments of each operation
+    """
+    operations = {name for names in PURE_OPERATIONS.values() for name in names}
+    chain = []
+    for step in filter(None, (part.strip() for part in spec.split(";"))):
+        name, *words = step.split()
+        if name not in operations:
+            raise ValueError(f"Unknown operation \"{name}\", expected one of: {', '.join(sorted(operations))}")
+
+        arguments = []
+        for word in words:
+            try:
+                arguments.append(ast.literal_eval(word))
+            except (ValueError, SyntaxError):
+                # Bare words such as red or hsv are string arguments
+                arguments.append(word)
+        chain.append((name, tuple(arguments)))
+    return chain
+
+
+def build_chain(steps: Iterable[Tuple[str, Tuple[Any, ...]]]) -> Callable[[np.ndarray], np.ndarray]:
+    """
+    Compose the core operations of a chain into one function
+    Args:
+        steps: The name and arguments of each operation
+    Returns:
+        Applies the operations in order to one frame
+    """
+    functions = []
+    for name, arguments in steps:
+        processor = next(processor for processor, names in PURE_OPERATIONS.items() if name in names)
+        # Every frame is seen once, so the frames bypass the result caches instead of evicting their entries
+        functions.append((inspect.unwrap(getattr(processor, name)), arguments))
+
+    def chain(frame: np.ndarray) -> np.ndarray:
+        for function, arguments in functions:
+            frame = function(frame, *arguments)
+        return frame
+
+    return chain
+
+
+def stream_frames(
+        paths: Iterable[str],
+        chain: Callable[[np.ndarray], np.ndarray],
+        output_dir: str,
+        extension: str = ".png",
+        settings: Optional[Dict[str, Any]] = None,
+        workers: int = STREAM_WORKERS,
+        queue_size: int = STREAM_QUEUE_SIZE
+) -> Dict[str, float]:
+    """
+    Decode, process and encode a frame sequence in three stages joined by bounded queues. The frames are read
+    from the generator as the queues drain, so at most a few frames are in memory whatever the length of the
+    sequence. Processing runs on several threads, the decoder and the encoder on one thread each.
+    Args:
+        paths: The frames, read lazily
+        chain: Processes one frame
+        output_dir: The folder of the outputs, named after their frames
+        extension: The file extension of the outputs
+        settings: The export settings of the encoder
+        workers: The number of processing threads
+        queue_size: The number of frames each queue holds
+    Returns:
+        The report with the frames, the wall seconds, the busy seconds of each stage and the frames per second
+    """
+    decoded: queue.Queue = queue.Queue(queue_size)
+    processed: queue.Queue = queue.Queue(queue_size)
+    failed = threading.Event()
+    errors: List[BaseException] = []
+    timings = {'decode': 0.0, 'process': 0.0, 'encode': 0.0}
+    lock = threading.Lock()
+
+    def put(target: queue.Queue, item: Any) -> bool:
+        while not failed.is_set():
+            try:
+                target.put(item, timeout=_WAIT_SECONDS)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def get(source: queue.Queue) -> Any:
+        while not failed.is_set():
+            try:
+                return source.get(timeout=_WAIT_SECONDS)
+            except queue.Empty:
+                pass
+        return _END
+
+    def timed(stage: str, function: Callable, *args) -> Any:
+        start = time.perf_counter()
+        result = function(*args)
+        with lock:
+            timings[stage] += time.perf_counter() - start
+        return result
+
+    def fail(error: BaseException):
+        with lock:
+            errors.append(error)
+        failed.set()
+
+    def decode():
+        try:
+            for path in paths:
+                if not put(decoded, (path, timed('decode', decode_image, path))):
+                    return
+        except BaseException as error:
+            fail(error)
+        finally:
+            for _ in range(workers):
+                put(decoded, _END)
+
+    def process():
+        try:
+            while True:
+                item = get(decoded)
+                if item is _END:
+                    return
+                path, frame = item
+                if not put(processed, (path, timed('process', chain, frame))):
+                    return
+        except BaseException as error:
+            fail(error)
+        finally:
+            put(processed, _END)
+
+    os.makedirs(output_dir, exist_ok=True)
+    threads = [threading.Thread(target=decode, name="frame-decode", daemon=True)]
+    threads += [
+        threading.Thread(target=process, name=f"frame-process-{index}", daemon=True) for index in range(workers)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+
+    # Encode on the calling thread until every processing thread has ended its queue
+    frames, output_bytes, ended = 0, 0, 0
+    try:
+        while ended < workers:
+            item = get(processed)
+            if item is _END:
+                ended += 1
+                if failed.is_set():
+                    break
+                continue
+            path, frame = item
+            output_path = os.path.join(output_dir, os.path.splitext(os.path.basename(path))[0] + extension)
+            output_bytes += timed('encode', export_image, frame, output_path, settings or {})
+            frames += 1
+    except BaseException as error:
+        fail(error)
+
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+    seconds = time.perf_counter() - start
+    return {
+        'frames': frames,
+        'bytes': output_bytes,
+        'seconds': seconds,
+        'frames_per_second': frames / seconds if seconds > 0 else 0.0,
+        'decode_seconds': timings['decode'],
+        'process_seconds': timings['process'],
+        'encode_seconds': timings['encode'],
+    }
+
+
+def format_stream_report(report: Dict[str, float]) -> str:
+    """
+    Format a stream report for the status bar, with the busy time of each stage to show the bottleneck
+    Args:
+        report: The report of stream_frames
+    Returns:
+        The report text
+    """
+    return (f"Streamed {report['frames']} frame(s) in {report['seconds']:.2f} s "
+            f"({report['frames_per_second']:.1f} fps), busy time: decode {report['decode_seconds']:.2f} s, "
+            f"process {report['process_seconds']:.2f} s, encode {report['encode_seconds']:.2f} s")
+
+
+class FrameStreamer:
+    """
+    Run frame streams off the UI thread and report back through Tk's event loop
+    """
+
+    def __init__(self, root):
+        """
+        Args:
+            root: The Tk root used to poll for the finished stream
+        """
+        self.root = root
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="frame-stream")
+
+    def stream(
+            self,
+            source: str,
+            chain: Callable[[np.ndarray], np.ndarray],
+            output_dir: str,
+            extension: str,
+            settings: Dict[str, Any],
+            on_done: Callable[[Dict[str, float]], None],
+            on_error: Callable[[BaseException], None]
+    ):
+        """
+        Stream a frame sequence in the background, the callbacks run on the UI thread
+        Args:
+            source: The folder or pattern of the frames
+            chain: Processes one frame
+            output_dir: The folder of the outputs
+            extension: The file extension of the outputs
+            settings: The export settings of the encoder
+            on_done: Receives the stream report
+            on_error: Receives the error that stopped the stream
+        """
+        future: Future = self._executor.submit(
+            stream_frames, frame_paths(source), chain, output_dir, extension, settings
+        )
+
+        def poll():
+            if not future.done():
+                self.root.after(LOADER_POLL_MS, poll)
+                return
+            error = future.exception()
+            if error is not None:
+                on_error(error)
+            else:
+                on_done(future.result())
+
+        poll()
@@ -0,0 +1,103 @@
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+FILTER_TYPES = ('ideal', 'butterworth', 'gaussian')
+FILTER_PASSES = ('lowpass', 'highpass', 'bandreject')
+
+
+@lru_cache(maxsize=32)
+def transfer_function(
+        shape: Tuple[int, int],
+        filter_type: str,
+        filter_pass: str,
+        cutoff: float,
+        order: int = 2,
+        band_width: float = 10.0
+) -> np.ndarray:
+    """
+    Build the transfer function H(u, v) of a frequency filter, cached per parameters
+    Args:
+        shape: The (height, width) of the spectrum
+        filter_type: 'ideal', 'butterworth' or 'gaussian'
+        filter_pass: 'lowpass', 'highpass' or 'bandreject'
+        cutoff: The cutoff frequency D0, or the center of the rejected band
+        order: The order n of the Butterworth filter
+        band_width: The width W of the rejected band
+    Returns:
+        The read-only float32 transfer function in the unshifted layout of np.fft.fft2
+    """
+    assert filter_type in FILTER_TYPES, f"Invalid filter type: {filter_type}"
+    assert filter_pass in FILTER_PASSES, f"Invalid filter pass: {filter_pass}"
+    assert cutoff > 0, "Cutoff frequency must be greater than 0"
+
+    # Distance of each frequency to the zero frequency, without shifting the spectrum
+    rows, columns = shape
+    u = np.fft.fftfreq(rows, d=1 / rows).astype(np.float32)
+    v = np.fft.fftfreq(columns, d=1 / columns).astype(np.float32)
+    distance_squared = u[:, np.newaxis] ** 2 + v[np.newaxis, :] ** 2
+    distance = np.sqrt(distance_squared)
+    cutoff = np.float32(cutoff)
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        if filter_pass == 'bandreject':
+            if filter_type == 'ideal':
+                transfer = (np.abs(distance - cutoff) > band_width / 2).astype(np.float32)
+            elif filter_type == 'butterworth':
+                ratio = distance * band_width / (distance_squared - cutoff ** 2)
+                transfer = 1 / (1 + ratio ** (2 * order))
+                transfer[distance_squared == cutoff ** 2] = 0
+            else:
+                ratio = (distance_squared - cutoff ** 2) / (distance * band_width)
+                transfer = 1 - np.exp(-ratio ** 2)
+                transfer[distance == 0] = 1
+        else:
+            if filter_type == 'ideal':
+                transfer = (distance <= cutoff).astype(np.float32)
+            elif filter_type == 'butterworth':
+                transfer = 1 / (1 + (distance / cutoff) ** (2 * order))
+            else:
+                transfer = np.exp(-distance_squared / (2 * cutoff ** 2))
+
+            if filter_pass == 'highpass':
+                transfer = 1 - transfer
+
+    transfer = transfer.astype(np.float32, copy=False)
+    transfer.flags.writeable = False
+    return transfer
+
+
+class SpectrumCache:
+    """
+    Keep the spectra of the last images by identity, so the same image is only transformed once
+    """
+
+    def __init__(self, max_entries: int = 4):
+        self.max_entries = max_entries
+        self._entries: List[Tuple[np.ndarray, np.ndarray]] = []
+
+    def get(self, image_array: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Get the cached spectrum of the image
+        Args:
+            image_array: The image
+        Returns:
+            The spectrum, or None when it is not cached
+        """
+        for source, spectrum in self._entries:
+            if source is image_array:
+                return spectrum
+        return None
+
+    def put(self, image_array: np.ndarray, spectrum: np.ndarray):
+        """
+        Cache the spectrum of the image, dropping the oldest entry when full
+        Args:
+            image_array: The image
+            spectrum: The spectrum of the image
+        """
+        spectrum.flags.writeable = False
+        self._entries.append((image_array, spectrum))
+        if len(self._entries) > self.max_entries:
+            self._entries.pop(0)
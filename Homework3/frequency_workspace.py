@@ -0,0 +1,86 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+FrequencyState = Tuple[np.ndarray, Optional[np.ndarray]]
+
+
+class FrequencyWorkspace:
+    """
+    The complex64 state of the step-wise DFT workflow for the main and compare images.
+    The stored arrays are never modified in place, so snapshots can be kept in the undo history
+    without copying.
+    """
+
+    def __init__(self):
+        self.main: Optional[np.ndarray] = None
+        self.compare: Optional[np.ndarray] = None
+
+    @property
+    def active(self) -> bool:
+        """
+        Whether the DFT workflow holds a state
+        """
+        return self.main is not None
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The number of bytes held by the current state
+        """
+        return sum(array.nbytes for array in (self.main, self.compare) if array is not None)
+
+    def arrays(
+            self,
+            main_image: np.ndarray,
+            compare_image: Optional[np.ndarray]
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Get the arrays the next step works on, the displayed images when the workflow is not active
+        Args:
+            main_image: The displayed main image
+            compare_image: The displayed compare image
+        Returns:
+            The main and compare arrays
+        """
+        if not self.active:
+            return main_image, compare_image
+        return self.main, self.compare
+
+    def store(self, main: np.ndarray, compare: Optional[np.ndarray] = None):
+        """
+        Store the result of a step in single precision
+        Args:
+            main: The main array
+            compare: The compare array, if any
+        """
+        self.main = main.astype(np.complex64, copy=False)
+        self.compare = None if compare is None else compare.astype(np.complex64, copy=False)
+
+    def snapshot(self) -> Optional[FrequencyState]:
+        """
+        Get the current state to keep in the history
+        Returns:
+            The main and compare arrays, or None when the workflow is not active
+        """
+        if not self.active:
+            return None
+        return self.main, self.compare
+
+    def restore(self, state: Optional[FrequencyState]):
+        """
+        Restore a state taken with snapshot, None releases the workspace
+        Args:
+            state: The state to restore
+        """
+        if state is None:
+            self.release()
+        else:
+            self.main, self.compare = state
+
+    def release(self):
+        """
+        Drop the buffers of the current state
+        """
+        self.main = None
+        self.compare = None
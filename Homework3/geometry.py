@@ -0,0 +1,226 @@
+import math
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from config import REMAP_CACHE_MAX_BYTES
+from image_arrays import to_array
+
+INTERPOLATIONS = {
+    'nearest': cv2.INTER_NEAREST,
+    'bilinear': cv2.INTER_LINEAR,
+    'bicubic': cv2.INTER_CUBIC,
+}
+
+# The PIL filters of the interpolations that widen with the scale when shrinking, so the result is antialiased
+_SHRINK_FILTERS = {
+    cv2.INTER_LINEAR: Image.Resampling.BILINEAR,
+    cv2.INTER_CUBIC: Image.Resampling.BICUBIC,
+}
+
+# An affine matrix as the six entries of its two rows, hashable for the map cache
+AffineKey = Tuple[float, float, float, float, float, float]
+
+# The remap grids of the recent transforms by output size, matrix and interpolation, least recently used first
+_grids: 'OrderedDict[Tuple[Tuple[int, int], AffineKey, int], Tuple[np.ndarray, Optional[np.ndarray]]]' = OrderedDict()
+_grid_bytes = 0
+
+
+def rotation(
+        shape: Tuple[int, ...],
+        angle: float,
+        scale: float = 1.0,
+        expand: bool = False
+) -> Tuple[np.ndarray, Tuple[int, int]]:
+    """
+    Get the matrix of a counter-clockwise rotation around the image center
+    Args:
+        shape: The shape of the image
+        angle: The angle in degrees
+        scale: The isotropic scale applied with the rotation
+        expand: Whether to grow the canvas to hold the whole rotated image, otherwise the original canvas is kept
+    Returns:
+        The 2x3 matrix and the (width, height) of the output
+    """
+    height, width = shape[:2]
+    matrix = cv2.getRotationMatrix2D(((width - 1) / 2, (height - 1) / 2), angle, scale)
+    if not expand:
+        return matrix, (width, height)
+
+    # Fit the canvas to the rotated corners and move the center to the new center
+    cos, sin = abs(matrix[0, 0]), abs(matrix[0, 1])
+    new_width = max(1, math.ceil(width * cos + height * sin - 1e-9))
+    new_height = max(1, math.ceil(width * sin + height * cos - 1e-9))
+    matrix[0, 2] += (new_width - width) / 2
+    matrix[1, 2] += (new_height - height) / 2
+    return matrix, (new_width, new_height)
+
+
+def remap_grids(
+        size: Tuple[int, int],
+        matrix: AffineKey,
+        interpolation: int
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Build the fixed-point source coordinates of every output pixel of an affine transform, cached up to
+    REMAP_CACHE_MAX_BYTES so the main and compare images and repeated transforms of images with the same size
+    skip the map computation
+    Args:
+        size: The (width, height) of the output
+        matrix: The six entries of the forward 2x3 matrix
+        interpolation: The OpenCV interpolation flag
+    Returns:
+        The read-only maps in the CV_16SC2 layout of cv2.convertMaps
+    """
+    global _grid_bytes
+    key = (size, matrix, interpolation)
+    if key in _grids:
+        _grids.move_to_end(key)
+        return _grids[key]
+
+    inverse = cv2.invertAffineTransform(np.array(matrix, dtype=np.float64).reshape(2, 3)).astype(np.float32)
+
+    width, height = size
+    x = np.arange(width, dtype=np.float32)
+    y = np.arange(height, dtype=np.float32)[:, np.newaxis]
+    map_x = inverse[0, 0] * x + (inverse[0, 1] * y + inverse[0, 2])
+    map_y = inverse[1, 0] * x + (inverse[1, 1] * y + inverse[1, 2])
+
+    map_xy, map_fraction = cv2.convertMaps(
+        map_x, map_y, cv2.CV_16SC2, nninterpolation=interpolation == cv2.INTER_NEAREST
+    )
+    map_xy.flags.writeable = False
+    if map_fraction is not None and map_fraction.size:
+        map_fraction.flags.writeable = False
+    else:
+        map_fraction = None
+
+    grid_bytes = map_xy.nbytes + (0 if map_fraction is None else map_fraction.nbytes)
+    if grid_bytes <= REMAP_CACHE_MAX_BYTES:
+        _grids[key] = map_xy, map_fraction
+        _grid_bytes += grid_bytes
+        while _grid_bytes > REMAP_CACHE_MAX_BYTES:
+            _, (evicted_xy, evicted_fraction) = _grids.popitem(last=False)
+            _grid_bytes -= evicted_xy.nbytes + (0 if evicted_fraction is None else evicted_fraction.nbytes)
+    return map_xy, map_fraction
+
+
+def warp_affine(
+        image_array: np.ndarray,
+        matrix: np.ndarray,
+        size: Tuple[int, int],
+        interpolation: int = cv2.INTER_LINEAR
+) -> np.ndarray:
+    """
+    Apply an affine transform through the cached remap grids, with the black border of cv2.warpAffine
+    Args:
+        image_array: The image to transform
+        matrix: The forward 2x3 matrix
+        size: The (width, height) of the output
+        interpolation: The OpenCV interpolation flag
+    Returns:
+        The transformed image
+    """
+    key = tuple(round(float(value), 9) for value in np.asarray(matrix).ravel())
+    map_xy, map_fraction = remap_grids(tuple(size), key, interpolation)
+    return cv2.remap(image_array, map_xy, map_fraction, interpolation)
+
+
+def scaling(shape: Tuple[int, ...], scale_factor: float) -> Tuple[np.ndarray, Tuple[int, int]]:
+    """
+    Get the matrix of a resize, aligned on pixel centers like cv2.resize
+    Args:
+        shape: The shape of the image
+        scale_factor: The scale factor, the output size is rounded down
+    Returns:
+        The 2x3 matrix and the (width, height) of the output
+    """
+    height, width = shape[:2]
+    new_width, new_height = math.floor(width * scale_factor), math.floor(height * scale_factor)
+
+    # cv2.resize scales by the ratio of the rounded sizes and maps pixel centers onto pixel centers
+    scale_x, scale_y = new_width / width, new_height / height
+    matrix = np.array([
+        [scale_x, 0, (scale_x - 1) / 2],
+        [0, scale_y, (scale_y - 1) / 2]
+    ])
+    return matrix, (new_width, new_height)
+
+
+def resize(image_array: np.ndarray, size: Tuple[int, int], interpolation: int = cv2.INTER_LINEAR) -> np.ndarray:
+    """
+    Resize an image. Enlarging runs cv2.resize, which matches PIL there. Shrinking with a bilinear or bicubic
+    filter runs PIL like the original tool, as its filter covers every source pixel of an output pixel where
+    cv2.resize only reads the nearest ones and aliases.
+    Args:
+        image_array: The image
+        size: The (width, height) of the result
+        interpolation: The OpenCV interpolation flag
+    Returns:
+        The resized image
+    """
+    shrinking = size[0] < image_array.shape[1] or size[1] < image_array.shape[0]
+    if shrinking and interpolation in _SHRINK_FILTERS:
+        try:
+            image = Image.fromarray(image_array)
+        except TypeError:
+            # Layouts PIL has no mode for, e.g. 16-bit color, are averaged over the source area instead
+            return cv2.resize(image_array, size, interpolation=cv2.INTER_AREA)
+        return to_array(image.resize(size, _SHRINK_FILTERS[interpolation]))
+    return cv2.resize(image_array, size, interpolation=interpolation)
+
+
+class AffineChain:
+    """
+    Consecutive geometric operations on an image, composed into one matrix. Every result is resampled once
+    from the image the chain started from, so queued rotations and resizes interpolate a single time.
+    """
+
+    def __init__(self, image_array: np.ndarray):
+        """
+        Args:
+            image_array: The image the chain starts from
+        """
+        self.base = image_array
+        self.matrix = np.eye(3)
+        self.size = (image_array.shape[1], image_array.shape[0])
+        self.result = image_array
+
+    def apply(
+            self,
+            transform: Callable[[Tuple[int, int]], Tuple[np.ndarray, Tuple[int, int]]],
+            interpolation: int = cv2.INTER_LINEAR
+    ) -> np.ndarray:
+        """
+        Add a geometric operation to the chain and render the composed transform
+        Args:
+            transform: Gets the 2x3 matrix and output size of the operation from the (height, width) it applies to
+            interpolation: The OpenCV interpolation flag
+        Returns:
+            The base image resampled once with all the operations of the chain
+        """
+        step, self.size = transform((self.size[1], self.size[0]))
+        self.matrix = np.vstack([step, [0, 0, 1]]) @ self.matrix
+        self.result = self.render(interpolation)
+        return self.result
+
+    def render(self, interpolation: int = cv2.INTER_LINEAR) -> np.ndarray:
+        """
+        Resample the base image with the composed transform
+        Args:
+            interpolation: The OpenCV interpolation flag
+        Returns:
+            The transformed image
+        """
+        matrix = self.matrix[:2]
+        scale_x, scale_y = matrix[0, 0], matrix[1, 1]
+
+        # A chain of resizes only is still a resize, which is faster and antialiased when shrinking
+        is_scale = abs(matrix[0, 1]) < 1e-12 and abs(matrix[1, 0]) < 1e-12
+        is_aligned = np.isclose(matrix[0, 2], (scale_x - 1) / 2) and np.isclose(matrix[1, 2], (scale_y - 1) / 2)
+        if is_scale and is_aligned and scale_x > 0 and scale_y > 0:
+            return resize(self.base, self.size, interpolation)
+        return warp_affine(self.base, matrix, self.size, interpolation)
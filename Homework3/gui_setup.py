@@ -2,8 +2,17 @@ import tkinter as tk
 from typing import TYPE_CHECKING
 
 from config import MAIN_THEME, MAIN_FONT_COLOR, SECONDARY_THEME
+from image_viewer import ImageViewer
 from panel_swapper import PanelSwapper
-from utils import open_image, save_image
+from utils import (
+    export_all_images,
+    open_image,
+    open_neighbour_image,
+    open_session,
+    save_image,
+    save_session,
+    stream_frames,
+)
 
 if TYPE_CHECKING:
     from app import ImageProcessorApp
@@ -34,6 +43,9 @@ def setup_gui(app):
     app.panel_swapper = PanelSwapper(app, operation_panel_container)
     app.panel_swapper.show_panel("HW3")
 
+    # Set up the status bar for the profiling readout
+    _setup_status_bar(app)
+
 
 def _setup_window(app: 'ImageProcessorApp'):
     """
@@ -70,13 +82,13 @@ def _setup_image_display_frame(app: 'ImageProcessorApp', parent_frame: tk.Frame)
     histogram_frame = tk.Frame(parent_frame, bg=MAIN_THEME, pady=10)
     histogram_frame.grid(row=1, column=1)
 
-    # Display the image using a label
-    app.image_label = tk.Label(image_frame, bg=MAIN_THEME)
-    app.image_label.pack()
+    # Display the image in a zoomable view, scroll to zoom, drag to pan and double click to fit
+    app.image_viewer = ImageViewer(image_frame)
+    app.image_viewer.pack()
 
-    # Display the histogram using a label
-    app.histogram_compare_label = tk.Label(histogram_frame, bg=MAIN_THEME)
-    app.histogram_compare_label.pack()
+    # Display the histogram or the comparison image in a second view
+    app.histogram_compare_viewer = ImageViewer(histogram_frame)
+    app.histogram_compare_viewer.pack()
 
     # Undo and redo buttons
     undo_button = tk.Button(parent_frame, text="Undo", command=app.undo_image)
@@ -110,3 +122,107 @@ def _setup_upload_download_frame(app: 'ImageProcessorApp', parent_frame: tk.Fram
     )
     app.open_button.pack(side=tk.LEFT)
     app.save_button.pack(side=tk.LEFT, padx=10)
+
+    # Buttons for stepping through the folder of the opened image
+    app.previous_button = tk.Button(
+        button_frame,
+        fg=MAIN_FONT_COLOR,
+        bg=SECONDARY_THEME,
+        text="< Previous",
+        command=lambda: open_neighbour_image(app, -1),
+    )
+    app.next_button = tk.Button(
+        button_frame,
+        fg=MAIN_FONT_COLOR,
+        bg=SECONDARY_THEME,
+        text="Next >",
+        command=lambda: open_neighbour_image(app, 1),
+    )
+    app.previous_button.pack(side=tk.LEFT)
+    app.next_button.pack(side=tk.LEFT, padx=10)
+
+    # Export settings and the button exporting the images and their history
+    export_frame = tk.Frame(parent_frame, bg=MAIN_THEME)
+    export_frame.grid(row=1, column=1, sticky="w")
+    app.export_format_menu = tk.OptionMenu(export_frame, app.export_format, "PNG", "JPEG", "TIFF", "BMP")
+    app.export_format_menu.pack(side=tk.LEFT)
+    app.export_all_button = tk.Button(
+        export_frame,
+        fg=MAIN_FONT_COLOR,
+        bg=SECONDARY_THEME,
+        text="Export All",
+        command=lambda: export_all_images(app),
+    )
+    app.export_all_button.pack(side=tk.LEFT, padx=10)
+
+    # Buttons for saving and reopening the images with their history
+    session_frame = tk.Frame(parent_frame, bg=MAIN_THEME)
+    session_frame.grid(row=2, column=1, sticky="w")
+    app.save_session_button = tk.Button(
+        session_frame,
+        fg=MAIN_FONT_COLOR,
+        bg=SECONDARY_THEME,
+        text="Save Session",
+        command=lambda: save_session(app),
+    )
+    app.open_session_button = tk.Button(
+        session_frame,
+        fg=MAIN_FONT_COLOR,
+        bg=SECONDARY_THEME,
+        text="Open Session",
+        command=lambda: open_session(app),
+    )
+    app.save_session_button.pack(side=tk.LEFT)
+    app.open_session_button.pack(side=tk.LEFT, padx=10)
+
+    encoder_frame = tk.Frame(parent_frame, bg=MAIN_THEME)
+    encoder_frame.grid(row=3, column=1, sticky="w")
+    quality_label = tk.Label(encoder_frame, text="JPEG quality", bg=MAIN_THEME, fg=MAIN_FONT_COLOR)
+    quality_label.pack(side=tk.LEFT)
+    app.jpeg_quality_input = tk.Entry(encoder_frame, textvariable=app.jpeg_quality, width=4)
+    app.jpeg_quality_input.pack(side=tk.LEFT, padx=5)
+    app.jpeg_subsampling_menu = tk.OptionMenu(encoder_frame, app.jpeg_subsampling, "4:4:4", "4:2:2", "4:2:0")
+    app.jpeg_subsampling_menu.pack(side=tk.LEFT, padx=5)
+    png_label = tk.Label(encoder_frame, text="PNG level", bg=MAIN_THEME, fg=MAIN_FONT_COLOR)
+    png_label.pack(side=tk.LEFT)
+    app.png_compress_level_input = tk.Entry(encoder_frame, textvariable=app.png_compress_level, width=3)
+    app.png_compress_level_input.pack(side=tk.LEFT, padx=5)
+    app.tiff_compression_menu = tk.OptionMenu(
+        encoder_frame,
+        app.tiff_compression,
+        "raw",
+        "tiff_lzw",
+        "tiff_adobe_deflate",
+        "packbits",
+    )
+    app.tiff_compression_menu.pack(side=tk.LEFT, padx=5)
+
+    # The operation chain streamed over a folder of frames, written in the export format
+    stream_frame = tk.Frame(parent_frame, bg=MAIN_THEME)
+    stream_frame.grid(row=4, column=1, sticky="w")
+    chain_label = tk.Label(stream_frame, text="Chain", bg=MAIN_THEME, fg=MAIN_FONT_COLOR)
+    chain_label.pack(side=tk.LEFT)
+    app.stream_chain_input = tk.Entry(stream_frame, textvariable=app.stream_chain, width=30)
+    app.stream_chain_input.pack(side=tk.LEFT, padx=5)
+    app.stream_button = tk.Button(
+        stream_frame,
+        fg=MAIN_FONT_COLOR,
+        bg=SECONDARY_THEME,
+        text="Stream Frames",
+        command=lambda: stream_frames(app),
+    )
+    app.stream_button.pack(side=tk.LEFT, padx=5)
+
+
+def _setup_status_bar(app: 'ImageProcessorApp'):
+    """
+    Set up the status bar showing the cost of the last operation
+    """
+    status_bar = tk.Label(
+        app.root,
+        textvariable=app.status_text,
+        anchor="w",
+        bg=SECONDARY_THEME,
+        fg=MAIN_FONT_COLOR,
+    )
+    status_bar.grid(row=1, column=0, columnspan=2, sticky="ew")
@@ -0,0 +1,45 @@
+from typing import Union
+
+import numpy as np
+from PIL import Image
+
+# PIL modes that have no direct array layout and the mode they are converted to on entry
+_ARRAY_MODES = {
+    "1": "L",
+    "P": "RGB",
+    "PA": "RGBA",
+    "LA": "RGBA",
+    "CMYK": "RGB",
+    "YCbCr": "RGB",
+}
+
+
+def to_array(image: Union[Image.Image, np.ndarray]) -> np.ndarray:
+    """
+    Get the pixels of an image as an array, arrays are returned as they are without copying
+    Args:
+        image: The PIL image or the array
+    Returns:
+        The pixel array
+    """
+    if isinstance(image, np.ndarray):
+        return image
+
+    if image.mode in _ARRAY_MODES:
+        image = image.convert(_ARRAY_MODES[image.mode])
+
+    return np.asarray(image)
+
+
+def to_pil_image(image: Union[Image.Image, np.ndarray]) -> Image.Image:
+    """
+    Convert a pixel array to a PIL image, only used at the display and save boundaries
+    Args:
+        image: The pixel array or the PIL image
+    Returns:
+        The PIL image
+    """
+    if isinstance(image, Image.Image):
+        return image
+
+    return Image.fromarray(image)
@@ -0,0 +1,196 @@
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from config import EXPORT_WORKERS, LOADER_POLL_MS
+from image_arrays import to_pil_image
+
+# The PIL format written for each file extension
+FORMATS = {
+    '.jpg': 'JPEG',
+    '.jpeg': 'JPEG',
+    '.png': 'PNG',
+    '.tif': 'TIFF',
+    '.tiff': 'TIFF',
+    '.bmp': 'BMP',
+}
+
+# The modes each format stores natively, anything else is converted to the closest one
+NATIVE_MODES = {
+    'JPEG': ('L', 'RGB', 'CMYK'),
+    'PNG': ('1', 'L', 'LA', 'I;16', 'RGB', 'RGBA'),
+    'TIFF': ('1', 'L', 'LA', 'I;16', 'I', 'F', 'RGB', 'RGBA', 'CMYK'),
+    'BMP': ('1', 'L', 'RGB'),
+}
+
+# The modes written for the formats PIL picks from other extensions
+GENERIC_MODES = ('L', 'RGB')
+
+DEFAULT_SETTINGS = {
+    'jpeg_quality': 95,
+    'jpeg_subsampling': '4:2:0',
+    'png_compress_level': 6,
+    'tiff_compression': 'tiff_lzw',
+    'tiff_strip_size': 65536,
+}
+
+
+def encoder_params(image_format: str, settings: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Pick the encoder parameters of a format from the export settings
+    Args:
+        image_format: The PIL format
+        settings: The export settings, missing entries use DEFAULT_SETTINGS
+    Returns:
+        The keyword arguments of Image.save
+    """
+    settings = {**DEFAULT_SETTINGS, **settings}
+    if image_format == 'JPEG':
+        return {'quality': int(settings['jpeg_quality']), 'subsampling': settings['jpeg_subsampling']}
+    if image_format == 'PNG':
+        return {'compress_level': int(settings['png_compress_level'])}
+    if image_format == 'TIFF':
+        compression = settings['tiff_compression']
+        # Pillow writes striped TIFFs only, the strip size bounds the bytes compressed per block
+        return {
+            'compression': None if compression == 'raw' else compression,
+            'strip_size': int(settings['tiff_strip_size']),
+        }
+    return {}
+
+
+def prepare_image(image_array: np.ndarray, image_format: Optional[str]) -> Image.Image:
+    """
+    Convert an array to a PIL image in its native mode, falling back to the closest mode the format stores
+    Args:
+        image_array: The image array
+        image_format: The PIL format, or None for a format PIL picks from the extension
+    Returns:
+        The image to encode
+    """
+    image = to_pil_image(image_array)
+    native_modes = NATIVE_MODES.get(image_format, GENERIC_MODES)
+    if image.mode in native_modes:
+        return image
+
+    if image.mode in ('I;16', 'I', 'F'):
+        # Keep the 8 most significant bits of 16-bit data, clip float data to the 8-bit range
+        if image.mode == 'F':
+            data = np.clip(image_array, 0, 255)
+        else:
+            data = image_array.astype(np.uint32) >> 8
+        return Image.fromarray(data.astype(np.uint8))
+    if image.mode == 'LA' and 'L' in native_modes:
+        return image.convert('L')
+    return image.convert('RGB')
+
+
+def export_image(image_array: np.ndarray, file_path: str, settings: Dict[str, Any]) -> int:
+    """
+    Encode an image to a file, the format follows the extension
+    Args:
+        image_array: The image array
+        file_path: The path of the file
+        settings: The export settings
+    Returns:
+        The size of the file in bytes
+    """
+    image_format = FORMATS.get(os.path.splitext(file_path)[1].lower())
+    if image_format is None:
+        # Other extensions, e.g. .gif, are saved by PIL with its defaults
+        prepare_image(image_array, None).save(file_path)
+        return os.path.getsize(file_path)
+
+    prepare_image(image_array, image_format).save(file_path, image_format, **encoder_params(image_format, settings))
+    return os.path.getsize(file_path)
+
+
+def export_batch(
+        jobs: List[Tuple[np.ndarray, str]],
+        settings: Dict[str, Any],
+        executor: ThreadPoolExecutor
+) -> Dict[str, float]:
+    """
+    Encode several images in parallel, the encoders of PIL release the GIL
+    Args:
+        jobs: The image arrays and their file paths
+        settings: The export settings
+        executor: The thread pool encoding the images
+    Returns:
+        The throughput report with the images, bytes, megapixels, seconds and megabytes per second
+    """
+    start = time.perf_counter()
+    sizes = list(executor.map(lambda job: export_image(job[0], job[1], settings), jobs))
+    seconds = time.perf_counter() - start
+    total_bytes = sum(sizes)
+    megapixels = sum(image.shape[0] * image.shape[1] for image, _ in jobs) / 1e6
+    return {
+        'images': len(jobs),
+        'bytes': total_bytes,
+        'megapixels': megapixels,
+        'seconds': seconds,
+        'megabytes_per_second': total_bytes / 1e6 / seconds if seconds > 0 else 0.0,
+    }
+
+
+def format_report(report: Dict[str, float]) -> str:
+    """
+    Format a throughput report for the status bar
+    Args:
+        report: The report of export_batch
+    Returns:
+        The report text
+    """
+    return (f"Exported {report['images']} image(s), {report['bytes'] / 1e6:.2f} MB, "
+            f"{report['megapixels']:.1f} MP in {report['seconds'] * 1000:.0f} ms "
+            f"({report['megabytes_per_second']:.1f} MB/s)")
+
+
+class ImageExporter:
+    """
+    Run export batches off the UI thread and report back through Tk's event loop
+    """
+
+    def __init__(self, root, workers: int = EXPORT_WORKERS):
+        """
+        Args:
+            root: The Tk root used to poll for the finished batch
+            workers: The number of encoding threads
+        """
+        self.root = root
+        self._encoders = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-export")
+        # Batches are queued on their own thread so a batch never waits on its own encoders
+        self._batches = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-export-batch")
+
+    def export(
+            self,
+            jobs: List[Tuple[np.ndarray, str]],
+            settings: Dict[str, Any],
+            on_done: Callable[[Dict[str, float]], None],
+            on_error: Callable[[BaseException], None]
+    ):
+        """
+        Export images in the background, the callbacks run on the UI thread
+        Args:
+            jobs: The image arrays and their file paths
+            settings: The export settings
+            on_done: Receives the throughput report
+            on_error: Receives the error of the first image that failed
+        """
+        future: Future = self._batches.submit(export_batch, jobs, settings, self._encoders)
+
+        def poll():
+            if not future.done():
+                self.root.after(LOADER_POLL_MS, poll)
+                return
+            error = future.exception()
+            if error is not None:
+                on_error(error)
+            else:
+                on_done(future.result())
+
+        poll()
@@ -0,0 +1,166 @@
+import os
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from config import LOADER_CACHE_ENTRIES, LOADER_POLL_MS, LOADER_PREFETCH_DISTANCE, LOADER_WORKERS
+from image_arrays import to_array
+
+
+def decode_image(file_path: str) -> np.ndarray:
+    """
+    Decode an image file into an array
+    Args:
+        file_path: The path of the image
+    Returns:
+        The image array
+    """
+    with Image.open(file_path) as image:
+        return to_array(image)
+
+
+def folder_images(file_path: str) -> List[str]:
+    """
+    List the images next to a file, sorted by name
+    Args:
+        file_path: A file in the folder
+    Returns:
+        The paths of the images PIL can open in the folder
+    """
+    folder = os.path.dirname(os.path.abspath(file_path))
+    extensions = set(Image.registered_extensions())
+    return sorted(
+        os.path.join(folder, name) for name in os.listdir(folder)
+        if os.path.splitext(name)[1].lower() in extensions and os.path.isfile(os.path.join(folder, name))
+    )
+
+
+class ImageLoader:
+    """
+    Decode images on worker threads and hand them to the UI thread through Tk's event loop. The decoded
+    images, and those being decoded, are kept in a bounded cache, so the neighbours of the opened file can be
+    prefetched while it is displayed.
+    """
+
+    def __init__(self, root, cache_entries: int = LOADER_CACHE_ENTRIES, workers: int = LOADER_WORKERS):
+        """
+        Args:
+            root: The Tk root used to poll for the decoded images
+            cache_entries: The number of decoded images kept
+            workers: The number of decoding threads
+        """
+        self.root = root
+        self.cache_entries = cache_entries
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-loader")
+        # The modification time and size each decoding was started for, with its future, by path
+        self._cache: 'OrderedDict[str, Tuple[Optional[Tuple[int, int]], Future]]' = OrderedDict()
+        # Only the last requested load reports back, so quickly stepping through a folder shows the last image
+        self._request = 0
+
+    def load(
+            self,
+            file_path: str,
+            on_loaded: Callable[[np.ndarray], None],
+            on_error: Callable[[BaseException], None]
+    ):
+        """
+        Decode an image in the background, the callbacks run on the UI thread
+        Args:
+            file_path: The path of the image
+            on_loaded: Receives the decoded image
+            on_error: Receives the error when the image can not be decoded
+        """
+        self._request += 1
+        request = self._request
+        future = self._submit(os.path.abspath(file_path))
+
+        def poll():
+            if request != self._request:
+                return
+            if not future.done():
+                self.root.after(LOADER_POLL_MS, poll)
+                return
+            error = future.exception()
+            if error is not None:
+                self._cache.pop(os.path.abspath(file_path), None)
+                on_error(error)
+            else:
+                on_loaded(future.result())
+
+        poll()
+
+    def prefetch(self, file_path: str, distance: int = LOADER_PREFETCH_DISTANCE):
+        """
+        Start decoding the images around a file in its folder
+        Args:
+            file_path: The opened file
+            distance: The number of images to prefetch on each side
+        """
+        paths = folder_images(file_path)
+        file_path = os.path.abspath(file_path)
+        if file_path not in paths:
+            return
+        index = paths.index(file_path)
+        for offset in range(1, distance + 1):
+            for neighbour in (index + offset, index - offset):
+                if 0 <= neighbour < len(paths):
+                    self._submit(paths[neighbour])
+
+    def _submit(self, file_path: str) -> Future:
+        """
+        Get the decoding of an image from the cache, or start it when the file is new or changed since
+        Args:
+            file_path: The absolute path of the image
+        Returns:
+            The future of the decoded image
+        """
+        stamp = ImageLoader._stamp(file_path)
+        entry = self._cache.get(file_path)
+        if entry is not None and entry[0] == stamp:
+            self._cache.move_to_end(file_path)
+            return entry[1]
+
+        if entry is not None:
+            entry[1].cancel()
+        future = self._executor.submit(decode_image, file_path)
+        self._cache[file_path] = (stamp, future)
+        self._cache.move_to_end(file_path)
+        while len(self._cache) > self.cache_entries:
+            _, (_, evicted) = self._cache.popitem(last=False)
+            evicted.cancel()
+        return future
+
+    @staticmethod
+    def _stamp(file_path: str) -> Optional[Tuple[int, int]]:
+        """
+        Get the modification time and size of a file, which change when the file is overwritten
+        Args:
+            file_path: The path of the file
+        Returns:
+            The modification time in nanoseconds and the size, or None when the file can not be read
+        """
+        try:
+            status = os.stat(file_path)
+        except OSError:
+            return None
+        return status.st_mtime_ns, status.st_size
+
+    @staticmethod
+    def neighbour(file_path: str, step: int) -> Optional[str]:
+        """
+        Get the image before or after a file in its folder
+        Args:
+            file_path: The current file
+            step: 1 for the next image, -1 for the previous one
+        Returns:
+            The path of the image, or None at the end of the folder
+        """
+        paths = folder_images(file_path)
+        file_path = os.path.abspath(file_path)
+        if file_path not in paths:
+            return None
+        index = paths.index(file_path) + step
+        return paths[index] if 0 <= index < len(paths) else None
@@ -1,34 +1,53 @@
+import tkinter as tk
 from tkinter import messagebox
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
 
+import cv2
+import numpy as np
+from PIL import ImageTk
+
+from geometry import INTERPOLATIONS, AffineChain, rotation, scaling
+from image_arrays import to_pil_image
+from image_stack import ImageStack
 from image_processor_core_hw1 import ImageProcessorCore
 from image_processor_core_hw3 import ImageProcessorCore3
 
 if TYPE_CHECKING:
     from app import ImageProcessorApp
 
+# The width of the gallery thumbnails and the gammas of the gamma gallery
+GALLERY_THUMBNAIL_WIDTH = 256
+GALLERY_GAMMAS = np.geomspace(0.25, 4, 16)
+
+
 class ImageOperationsHW1:
     def __init__(self, app: 'ImageProcessorApp'):
         self.app = app
+        # The operation being swept, the image it displayed last and the images it started from
+        self._sweep = None
+        # The affine chains of the main and compare images while geometric operations follow each other
+        self._affine_chains = None
 
     def apply_brightness_algorithm(self):
         """
         Apply the brightness algorithm to a pixel value
         """
-        if not self.app.image:
+        if self.app.image is None:
             messagebox.showinfo("Info", "Please open an image first")
             return
 
         algorithm = self.app.brightness_algorithm.get()
         alpha = self.app.brightness_alpha.get()
         beta = self.app.brightness_beta.get()
+        band_rows = self.app.band_rows.get()
 
         # Apply the brightness algorithm to the image
-        new_image = ImageProcessorCore.adjust_brightness(self.app.image, alpha, beta, algorithm)
+        new_image = ImageProcessorCore.adjust_brightness(self.app.image, alpha, beta, algorithm, band_rows)
 
         new_compare_image = None
-        if self.app.compare_image:
-            new_compare_image = ImageProcessorCore.adjust_brightness(self.app.compare_image, alpha, beta, algorithm)
+        if self.app.compare_image is not None:
+            new_compare_image = ImageProcessorCore.adjust_brightness(self.app.compare_image, alpha, beta, algorithm,
+                                                                     band_rows)
 
         # Update the image
         self.app.update_image([new_image, new_compare_image])
@@ -37,44 +56,55 @@ class ImageOperationsHW1:
         """
         Resize the image using the scale factor
         """
-        if not self.app.image:
+        if self.app.image is None:
             messagebox.showinfo("Info", "Please open an image first")
             return
 
         scale_factor = self.app.resize_scale.get()
+        if scale_factor <= 0:
+            messagebox.showinfo("Info", "Scale factor must be greater than 0")
+            return
 
         # Resize the image
-        new_image = ImageProcessorCore.resize_image(self.app.image, scale_factor)
-        new_compare_image = None
-        if self.app.compare_image:
-            new_compare_image = ImageProcessorCore.resize_image(self.app.compare_image, scale_factor)
-
-        # Update the image
-        self.app.update_image([new_image, new_compare_image])
+        self._apply_geometry(lambda shape: scaling(shape, scale_factor))
 
     def rotate_image(self):
         """
         Rotate the image using the angle
         """
-        if not self.app.image:
+        if self.app.image is None:
             return
 
         angle = self.app.rotate_angle.get()
+        expand = self.app.expand_canvas.get()
 
-        # Rotate the image
-        new_image = ImageProcessorCore.rotate_image(self.app.image, angle)
-        new_compare_image = None
-        if self.app.compare_image:
-            new_compare_image = ImageProcessorCore.rotate_image(self.app.compare_image, angle)
+        # Rotate the image, a compare image of the same size reuses the remap grids of the main image
+        self._apply_geometry(lambda shape: rotation(shape, angle, expand=expand))
 
-        # Update the image
-        self.app.update_image([new_image, new_compare_image])
+    def _apply_geometry(self, transform: Callable[[Tuple[int, int]], Tuple[np.ndarray, Tuple[int, int]]]):
+        """
+        Apply a geometric operation. While the displayed images are the results of the previous geometric
+        operations, the new one is composed with them and the images they started from are resampled once.
+        Args:
+            transform: Gets the 2x3 matrix and output size of the operation from the (height, width) it applies to
+        """
+        images = (self.app.image, self.app.compare_image)
+        chains = self._affine_chains
+        if chains is None or any(
+                (chain.result if chain is not None else None) is not image for chain, image in zip(chains, images)
+        ):
+            chains = tuple(None if image is None else AffineChain(image) for image in images)
+
+        interpolation = INTERPOLATIONS[self.app.interpolation.get().lower()]
+        new_images = [None if chain is None else chain.apply(transform, interpolation) for chain in chains]
+        self.app.update_image(new_images)
+        self._affine_chains = chains
 
     def apply_gray_level_slicing(self):
         """
         Apply gray level slicing to the image
         """
-        if not self.app.image:
+        if self.app.image is None:
             messagebox.showinfo("Info", "Please open an image first")
             return
 
@@ -82,30 +112,58 @@ class ImageOperationsHW1:
         max_gray = self.app.max_gray.get()
         preserve_original = self.app.preserve_original.get()
 
-        if min_gray > max_gray:
-            messagebox.showinfo("Info", "Min gray level must be less than max gray level")
+        # The band list replaces the single band of the min and max levels when given
+        try:
+            bands = self._parse_gray_bands(self.app.gray_bands.get())
+        except ValueError as error:
+            messagebox.showinfo("Info", str(error))
             return
-
-        # Apply gray-level slicing
-        sliced_image = ImageProcessorCore.gray_level_slicing(self.app.image, min_gray, max_gray, preserve_original)
-        new_compare_image = None
-        if self.app.compare_image:
-            new_compare_image = ImageProcessorCore.gray_level_slicing(self.app.compare_image, min_gray, max_gray, preserve_original)
-
-        self.app.update_image([sliced_image, new_compare_image])
+        if not bands:
+            if min_gray > max_gray:
+                messagebox.showinfo("Info", "Min gray level must be less than max gray level")
+                return
+            bands = [(min_gray, max_gray, 255)]
+
+        # Apply gray-level slicing, a LUT so both images go through it in one call
+        self._apply(
+            lambda image: ImageProcessorCore.multi_band_slicing(image, bands, preserve_original),
+            pixelwise=True
+        )
+
+    @staticmethod
+    def _parse_gray_bands(spec: str) -> List[Tuple[int, int, int]]:
+        """
+        Parse the gray level bands written as "min-max:level, min-max:level"
+        Args:
+            spec: The band list, empty for none
+        Returns:
+            The (min, max, level) of each band
+        """
+        bands = []
+        for item in filter(None, (part.strip() for part in spec.split(","))):
+            try:
+                levels, level = item.split(":")
+                min_gray, max_gray = levels.split("-")
+                band = (int(min_gray), int(max_gray), int(level))
+            except ValueError:
+                raise ValueError(f"Invalid band \"{item}\", expected min-max:level")
+            if not 0 <= band[0] <= band[1] <= 255 or not 0 <= band[2] <= 255:
+                raise ValueError(f"Invalid band \"{item}\", levels must be ordered between 0 and 255")
+            bands.append(band)
+        return bands
 
     def equalize_histogram(self):
         """
         Equalize the histogram of the image
         """
-        if not self.app.image:
+        if self.app.image is None:
             messagebox.showinfo("Info", "Please open an image first")
             return
 
         # Equalize the histogram
         new_image = ImageProcessorCore3.histogram_equalization(self.app.image)
         new_compare_image = None
-        if self.app.compare_image:
+        if self.app.compare_image is not None:
             new_compare_image = ImageProcessorCore3.histogram_equalization(self.app.compare_image)
 
         # Update the image
@@ -115,7 +173,7 @@ class ImageOperationsHW1:
         """
         Display the bit-plane image
         """
-        if not self.app.image:
+        if self.app.image is None:
             messagebox.showinfo("Info", "Please open an image first")
             return
 
@@ -125,46 +183,176 @@ class ImageOperationsHW1:
             messagebox.showinfo("Info", "Bit-plane level must be between 0 and 7")
             return
 
-        new_image = ImageProcessorCore.bit_plane_image(self.app.image, bit_plane)
+        self._apply(lambda image: ImageProcessorCore.bit_plane_image(image, bit_plane), pixelwise=True)
+
+    def show_bit_plane_gallery(self):
+        """
+        Show all eight bit-planes of the image in a separate window, without changing the history
+        """
+        if self.app.image is None:
+            messagebox.showinfo("Info", "Please open an image first")
+            return
+
+        bit_planes = list(range(7, -1, -1))
+        thumbnails = [
+            self._thumbnail(ImageProcessorCore.bit_plane_image(self.app.image, bit_plane)) for bit_plane in bit_planes
+        ]
+        self._show_gallery("Bit-Plane Gallery", thumbnails, [f"Bit {bit_plane}" for bit_plane in bit_planes])
+
+    def show_gamma_gallery(self):
+        """
+        Show the image at 16 gammas from 1/4 to 4 in a separate window, without changing the history. The variants
+        are one stack gathered from 16 LUTs in a single pass over the thumbnail.
+        """
+        if self.app.image is None:
+            messagebox.showinfo("Info", "Please open an image first")
+            return
+        if self.app.image.dtype != np.uint8:
+            messagebox.showinfo("Info", "The gamma gallery needs an 8-bit image")
+            return
+
+        luts = np.rint(255 * (np.arange(256) / 255) ** GALLERY_GAMMAS[:, np.newaxis]).astype(np.uint8)
+        variants = ImageStack.variants(self._thumbnail(self.app.image), luts)
+        self._show_gallery("Gamma Gallery", variants.images(), [f"Gamma {gamma:.2f}" for gamma in GALLERY_GAMMAS])
+
+    @staticmethod
+    def _thumbnail(image_array: np.ndarray) -> np.ndarray:
+        """
+        Scale an image down to a gallery thumbnail of at most GALLERY_THUMBNAIL_WIDTH pixels wide
+        """
+        height, width = image_array.shape[:2]
+        scale = min(1.0, GALLERY_THUMBNAIL_WIDTH / width)
+        thumbnail_size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        return cv2.resize(image_array, thumbnail_size, interpolation=cv2.INTER_AREA)
+
+    def _show_gallery(self, title: str, thumbnails: List[np.ndarray], captions: List[str]):
+        """
+        Show thumbnails with their captions in a separate window, four per row
+        """
+        gallery = tk.Toplevel(self.app.root)
+        gallery.title(title)
+        gallery.photo_images = []
+        for index, (thumbnail, caption) in enumerate(zip(thumbnails, captions)):
+            photo_image = ImageTk.PhotoImage(to_pil_image(thumbnail))
+            gallery.photo_images.append(photo_image)
+
+            frame = tk.Frame(gallery)
+            frame.grid(row=index // 4, column=index % 4, padx=5, pady=5)
+            tk.Label(frame, image=photo_image).pack()
+            tk.Label(frame, text=caption).pack()
+
+    def reconstruct_bit_planes(self):
+        """
+        Rebuild the image from the bit-planes listed in the subset entry
+        """
+        if self.app.image is None:
+            messagebox.showinfo("Info", "Please open an image first")
+            return
+
+        try:
+            bit_planes = [int(item) for item in self.app.bit_plane_subset.get().split(",") if item.strip()]
+        except ValueError:
+            messagebox.showinfo("Info", "Bit-planes must be a comma separated list such as 7,6,5")
+            return
+        if any(bit_plane < 0 or bit_plane > 7 for bit_plane in bit_planes):
+            messagebox.showinfo("Info", "Bit-plane level must be between 0 and 7")
+            return
+
+        new_image = ImageProcessorCore.reconstruct_bit_planes(self.app.image, bit_planes)
         new_compare_image = None
-        if self.app.compare_image:
-            new_compare_image = ImageProcessorCore.bit_plane_image(self.app.compare_image, bit_plane)
+        if self.app.compare_image is not None:
+            new_compare_image = ImageProcessorCore.reconstruct_bit_planes(self.app.compare_image, bit_planes)
         self.app.update_image([new_image, new_compare_image])
 
     def smooth_image(self):
         """
         Smooth the image
         """
-        if not self.app.image:
+        if self.app.image is None:
             messagebox.showinfo("Info", "Please open an image first")
             return
 
         smoothing_level = self.app.smoothing_level.get()
 
-        # Smooth the image
-        new_image = ImageProcessorCore.smooth_image(self.app.image, smoothing_level)
-        new_compare_image = None
-        if self.app.compare_image:
-            new_compare_image = ImageProcessorCore.smooth_image(self.app.compare_image, smoothing_level)
+        # Smooth the displayed images, each click stacks another blur
+        self._parameter_sweep(
+            "smooth", lambda image: ImageProcessorCore.smooth_image(image, smoothing_level), restart=True
+        )
 
-        # Update the image
-        self.app.update_image([new_image, new_compare_image])
+    def adjust_smoothing(self):
+        """
+        Smooth the images the last smoothing started from again with the current level, replacing its result
+        """
+        if self.app.image is None:
+            messagebox.showinfo("Info", "Please open an image first")
+            return
+
+        smoothing_level = self.app.smoothing_level.get()
+
+        # Smooth the images the level sweep started from
+        self._parameter_sweep("smooth", lambda image: ImageProcessorCore.smooth_image(image, smoothing_level))
 
     def sharpen_image(self):
         """
         Sharpen the image
         """
-        if not self.app.image:
+        if self.app.image is None:
             messagebox.showinfo("Info", "Please open an image first")
             return
 
         sharpening_level = self.app.sharpening_level.get()
+        band_rows = self.app.band_rows.get()
+        mode = self.app.sharpening_mode.get().lower()
 
         # Sharpen the image
-        new_image = ImageProcessorCore.sharpen_image(self.app.image, sharpening_level)
+        new_image = ImageProcessorCore.sharpen_image(self.app.image, sharpening_level, band_rows, mode)
         new_compare_image = None
-        if self.app.compare_image:
-            new_compare_image = ImageProcessorCore.sharpen_image(self.app.compare_image, sharpening_level)
+        if self.app.compare_image is not None:
+            new_compare_image = ImageProcessorCore.sharpen_image(self.app.compare_image, sharpening_level,
+                                                                 band_rows, mode)
 
         # Update the image
         self.app.update_image([new_image, new_compare_image])
+
+    def _apply(
+            self,
+            apply: Callable[[np.ndarray], np.ndarray],
+            pixelwise: bool = False,
+            batched: Optional[Callable[[ImageStack], ImageStack]] = None
+    ):
+        """
+        Apply an operation to the main and compare images. When they have the same shape and the operation can
+        run on a stack, both are processed in one call.
+        Args:
+            apply: Applies the operation to one image
+            pixelwise: Whether the operation works on each pixel on its own, so the stack can go through apply
+            batched: Applies the operation to a stack of images
+        """
+        images = [image for image in (self.app.image, self.app.compare_image) if image is not None]
+        if pixelwise and batched is None:
+            batched = lambda stack: stack.map_pixels(apply)
+
+        if batched is not None and len(images) > 1 and ImageStack.can_stack(images):
+            results = batched(ImageStack(images)).images()
+        else:
+            results = [apply(image) for image in images]
+        self.app.update_image([results[0], results[1] if len(results) > 1 else None])
+
+    def _parameter_sweep(self, name: str, apply: Callable[[np.ndarray], np.ndarray], restart: bool = False):
+        """
+        Apply an operation whose parameters are being swept. While the displayed image is the last result of
+        the same operation, it is applied again to the images the sweep started from and replaces that result
+        instead of stacking on top of it.
+        Args:
+            name: The name of the operation
+            apply: Applies the operation with the current parameters to one image
+            restart: Whether to start a new sweep from the displayed images even after the same operation
+        """
+        if not restart and self._sweep is not None and self._sweep[0] == name and self._sweep[1] is self.app.image:
+            sources, append_history = self._sweep[2], False
+        else:
+            sources, append_history = (self.app.image, self.app.compare_image), True
+
+        new_images = [apply(sources[0]), None if sources[1] is None else apply(sources[1])]
+        self.app.update_image(new_images, append_history=append_history)
+        self._sweep = (name, self.app.image, sources)
@@ -1,12 +1,12 @@
 from tkinter import messagebox
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable, Optional
 
 import numpy as np
-from PIL import Image
 
 from image_operations_hw1 import ImageOperationsHW1
 from image_processor_core_hw2 import ImageProcessorCore2
 from image_processor_core_hw3 import ImageProcessorCore3
+from image_stack import ImageStack
 
 if TYPE_CHECKING:
     from app import ImageProcessorApp
@@ -24,13 +24,13 @@ class ImageOperationsHW2(ImageOperationsHW1):
         Args:
             mask_size (int): The size of the median mask
         """
-        if not self.app.image:
+        if self.app.image is None:
             messagebox.showinfo("Info", "Please open an image first")
             return
 
         main_filtered_image = ImageProcessorCore2.apply_median_mask(self.app.image, mask_size)
 
-        if not self.app.compare_image:
+        if self.app.compare_image is None:
             self.app.update_image([main_filtered_image, None])
             return
 
@@ -41,13 +41,13 @@ class ImageOperationsHW2(ImageOperationsHW1):
         """
         Apply a Laplacian mask to the main image and, if present, the comparison image using OpenCV.
         """
-        if not self.app.image:
+        if self.app.image is None:
             messagebox.showinfo("Info", "Please open an image first")
             return
 
         main_filtered_image = ImageProcessorCore2.apply_laplacian_mask(self.app.image)
 
-        if not self.app.compare_image:
+        if self.app.compare_image is None:
             self.app.update_image([main_filtered_image, None])
             return
 
@@ -58,33 +58,25 @@ class ImageOperationsHW2(ImageOperationsHW1):
         """
         Apply the Fast Fourier Transform (FFT) to the main image and, if present, the comparison image.
         """
-        if not self.app.image:
+        if self.app.image is None:
             messagebox.showinfo("Info", "Please open an image first")
             return
 
-        # Compute FFT on the main image
-        main_fft_image = ImageProcessorCore2.apply_fft(self.app.image)
-
-        if not self.app.compare_image:
-            self.app.update_image([main_fft_image, None])
-            return
-
-        # Compute FFT on the comparison image
-        compare_fft_image = ImageProcessorCore2.apply_fft(self.app.compare_image)
-        self.app.update_image([main_fft_image, compare_fft_image])
+        # Compute the spectra of the main and comparison images, in one batched FFT when they have the same shape
+        self._apply(ImageProcessorCore2.apply_fft, batched=ImageStack.fft_magnitude)
 
     def apply_inverse_fft_magnitude_only(self):
         """
         Apply the Inverse Fast Fourier Transform (FFT) to the main image and, if present, the comparison image.
         """
-        if not self.app.image:
+        if self.app.image is None:
             messagebox.showinfo("Info", "Please open an image first")
             return
 
         # Compute FFT on the main image
         main_fft_image = ImageProcessorCore2.inverse_fft_magnitude_only(self.app.image)
 
-        if not self.app.compare_image:
+        if self.app.compare_image is None:
             self.app.update_image([main_fft_image, None])
             return
 
@@ -96,14 +88,14 @@ class ImageOperationsHW2(ImageOperationsHW1):
         """
         Apply the Inverse Fast Fourier Transform (FFT) to the main image and, if present, the comparison image.
         """
-        if not self.app.image:
+        if self.app.image is None:
             messagebox.showinfo("Info", "Please open an image first")
             return
 
         # Compute FFT on the main image
         main_fft_image = ImageProcessorCore2.inverse_fft_phase_only(self.app.image)
 
-        if not self.app.compare_image:
+        if self.app.compare_image is None:
             self.app.update_image([main_fft_image, None])
             return
 
@@ -111,82 +103,147 @@ class ImageOperationsHW2(ImageOperationsHW1):
         compare_fft_image = ImageProcessorCore2.inverse_fft_phase_only(self.app.compare_image)
         self.app.update_image([main_fft_image, compare_fft_image])
 
+    def apply_frequency_filter(self):
+        """
+        Apply the selected frequency domain filter, changing the parameters reuses the spectrum of the
+        images the filter started from
+        """
+        if self.app.image is None:
+            messagebox.showinfo("Info", "Please open an image first")
+            return
+
+        filter_type = self.app.filter_type.get().lower()
+        filter_pass = self.app.filter_pass.get().lower().replace("-", "")
+        cutoff = self.app.filter_cutoff.get()
+        order = self.app.filter_order.get()
+        band_width = self.app.filter_band_width.get()
+
+        if cutoff <= 0 or order <= 0 or band_width <= 0:
+            messagebox.showinfo("Info", "Cutoff, order and band width must be greater than 0")
+            return
+
+        self._parameter_sweep(
+            "frequency_filter",
+            lambda image: ImageProcessorCore2.apply_frequency_filter(
+                image, filter_type, filter_pass, cutoff, order, band_width
+            )
+        )
+
     def multiply_by_neg_1(self):
         """
         Step 1: Multiply the image by (-1)^(x+y)
         """
-        if not self.app.image:
+        if self.app.image is None:
             messagebox.showinfo("Info", "Please open an image first")
             return
 
-        image_array = np.array(self.app.image)
-        main_filtered_array = ImageProcessorCore2.multiply_by_neg_1(image_array)
-        main_filtered_image = Image.fromarray(main_filtered_array.astype(np.uint8))
-        self.app.temp_array = main_filtered_array
-        self.app.update_image([main_filtered_image, None])
+        # The workflow always starts again from the displayed images
+        main_array = ImageProcessorCore2.multiply_by_neg_1(np.asarray(self.app.image))
+        compare_array = None
+        if self.app.compare_image is not None:
+            compare_array = ImageProcessorCore2.multiply_by_neg_1(np.asarray(self.app.compare_image))
+
+        self._update_frequency_step(main_array, compare_array, lambda array: array.astype(np.uint8))
 
     def compute_dft(self):
         """
         Step 2: Compute the DFT and return the magnitude spectrum.
         """
-        if not self.app.image:
+        if self.app.image is None:
             messagebox.showinfo("Info", "Please open an image first")
             return
 
-        if self.app.temp_array is None:
-            self.app.temp_array = np.array(self.app.image)
-
-        main_fft_array = ImageProcessorCore2.compute_dft(self.app.temp_array)
-        main_filtered_image = Image.fromarray(main_fft_array.real.astype(np.uint8))
-        self.app.temp_array = main_fft_array
-        self.app.update_image([main_filtered_image, None])
+        self._apply_frequency_step(
+            ImageProcessorCore2.compute_dft,
+            lambda array: array.real.astype(np.uint8)
+        )
 
     def take_conjugate(self):
         """
         Step 3: Compute the DFT and return the magnitude spectrum of the conjugate.
         """
-        if not self.app.image:
+        if self.app.image is None:
             messagebox.showinfo("Info", "Please open an image first")
             return
 
-        if self.app.temp_array is None:
-            self.app.temp_array = np.array(self.app.image)
-
-        main_conjugate_array = ImageProcessorCore2.take_conjugate(self.app.temp_array)
-        main_filtered_image = Image.fromarray(
-            (np.abs(main_conjugate_array) / np.max(np.abs(main_conjugate_array)) * 255).astype(np.uint8)
+        self._apply_frequency_step(
+            ImageProcessorCore2.take_conjugate,
+            lambda array: (np.abs(array) / np.max(np.abs(array)) * 255).astype(np.uint8)
         )
-        self.app.temp_array = main_conjugate_array
-        self.app.update_image([main_filtered_image, None])
 
     def compute_inverse_dft(self):
         """
         Step 4: Compute the inverse DFT.
         """
-        if not self.app.image:
+        if self.app.image is None:
             messagebox.showinfo("Info", "Please open an image first")
             return
 
-        if self.app.temp_array is None:
-            self.app.temp_array = np.array(self.app.image)
-
-        main_inverse_dft = ImageProcessorCore2.compute_inverse_dft(self.app.temp_array)
-        main_filtered_image = Image.fromarray(main_inverse_dft.real.astype(np.uint8))
-        self.app.temp_array = main_inverse_dft
-        self.app.update_image([main_filtered_image, None])
+        self._apply_frequency_step(
+            ImageProcessorCore2.compute_inverse_dft,
+            lambda array: array.real.astype(np.uint8)
+        )
 
     def multiply_by_neg_1_final(self):
         """
         Step 5: Multiply the real part of the result by (-1)^(x+y)
         """
-        if not self.app.image:
+        if self.app.image is None:
             messagebox.showinfo("Info", "Please open an image first")
             return
 
-        if self.app.temp_array is None:
-            self.app.temp_array = np.array(self.app.image)
+        self._apply_frequency_step(
+            ImageProcessorCore2.multiply_by_neg_1,
+            lambda array: array.real.astype(np.uint8)
+        )
+
+    def _apply_frequency_step(
+            self,
+            step: Callable[[np.ndarray], np.ndarray],
+            to_display: Callable[[np.ndarray], np.ndarray]
+    ):
+        """
+        Apply a step of the DFT workflow to the workspace state of the main and compare images
+        Args:
+            step: The core function of the step
+            to_display: Converts the result of the step to the displayed image
+        """
+        main_array, compare_array = self.app.frequency_workspace.arrays(self.app.image, self.app.compare_image)
+        main_result = step(main_array)
+        compare_result = None if compare_array is None else step(compare_array)
+        self._update_frequency_step(main_result, compare_result, to_display)
+
+    def _update_frequency_step(
+            self,
+            main_array: np.ndarray,
+            compare_array: Optional[np.ndarray],
+            to_display: Callable[[np.ndarray], np.ndarray]
+    ):
+        """
+        Display the result of a step of the DFT workflow and keep its state in the workspace
+        Args:
+            main_array: The result of the step for the main image
+            compare_array: The result of the step for the compare image, if any
+            to_display: Converts the result of the step to the displayed image
+        """
+        main_filtered_image = to_display(main_array)
+        compare_filtered_image = None if compare_array is None else to_display(compare_array)
+        self.app.update_image([main_filtered_image, compare_filtered_image], frequency_state=(main_array, compare_array))
+
+    def centered_round_trip(self):
+        """
+        Steps 1-5 at once: run the whole centered DFT round trip on one complex buffer per image
+        """
+        if self.app.image is None:
+            messagebox.showinfo("Info", "Please open an image first")
+            return
+
+        main_result = ImageProcessorCore2.centered_round_trip(self.app.image)
+        main_filtered_image = main_result.real.astype(np.uint8)
+
+        if self.app.compare_image is None:
+            self.app.update_image([main_filtered_image, None])
+            return
 
-        main_filtered_array = ImageProcessorCore2.multiply_by_neg_1(self.app.temp_array)
-        main_filtered_image = Image.fromarray(main_filtered_array.real.astype(np.uint8))
-        self.app.temp_array = main_filtered_array
-        self.app.update_image([main_filtered_image, None])
\ No newline at end of file
+        compare_result = ImageProcessorCore2.centered_round_trip(self.app.compare_image)
+        self.app.update_image([main_filtered_image, compare_result.real.astype(np.uint8)])
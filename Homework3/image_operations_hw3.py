@@ -19,18 +19,11 @@ class ImageOperationsHW3(ImageOperationsHW2):
         display them as 24-bit color images respectively.
         """
         assert color in ['red', 'green', 'blue'], f"Invalid color: {color}"
-        if not self.app.image:
+        if self.app.image is None:
             messagebox.showinfo("Info", "No image to process")
             return
 
-        main_filtered_image = ImageProcessorCore3.rgb_image(self.app.image, color)
-
-        if not self.app.compare_image:
-            self.app.update_image([main_filtered_image, None])
-            return
-
-        compare_filtered_image = ImageProcessorCore3.rgb_image(self.app.compare_image, color)
-        self.app.update_image([main_filtered_image, compare_filtered_image])
+        self._apply(lambda image: ImageProcessorCore3.rgb_image(image, color), pixelwise=True)
 
     def hsi_image(self, channel: str):
         """
@@ -38,51 +31,47 @@ class ImageOperationsHW3(ImageOperationsHW2):
         display them as 8-bit gray-level images respectively.
         """
         assert channel in ['hue', 'saturation', 'intensity'], f"Invalid channel: {channel}"
-        if not self.app.image:
+        if self.app.image is None:
             messagebox.showinfo("Info", "No image to process")
             return
 
-        main_filtered_image = ImageProcessorCore3.hsi_image(self.app.image, channel)
-
-        if not self.app.compare_image:
-            self.app.update_image([main_filtered_image, None])
-            return
-
-        compare_filtered_image = ImageProcessorCore3.hsi_image(self.app.compare_image, channel)
-        self.app.update_image([main_filtered_image, compare_filtered_image])
+        color_model = self.app.color_model.get().lower()
+        use_lut = self.app.hsi_lookup.get()
+        self._apply(lambda image: ImageProcessorCore3.hsi_image(image, channel, color_model, use_lut), pixelwise=True)
 
     def complement_image(self):
         """
         Get the complement of the image and compare image
         """
-        if not self.app.image:
+        if self.app.image is None:
             messagebox.showinfo("Info", "No image to process")
             return
 
-        main_filtered_image = ImageProcessorCore3.complement_image(self.app.image)
-
-        if not self.app.compare_image:
-            self.app.update_image([main_filtered_image, None])
-            return
-
-        compare_filtered_image = ImageProcessorCore3.complement_image(self.app.compare_image)
-        self.app.update_image([main_filtered_image, compare_filtered_image])
+        self._apply(ImageProcessorCore3.complement_image, pixelwise=True)
 
     def rgb_histogram_equalization(self):
         """
         Perform histogram equalization on the RGB image
         """
-        if not self.app.image:
+        if self.app.image is None:
             messagebox.showinfo("Info", "No image to process")
             return
 
-        main_filtered_image = ImageProcessorCore3.histogram_equalization(self.app.image)
+        mode = self.app.equalization_mode.get().lower()
+        color_model = self.app.color_model.get().lower()
+        clip_limit = self.app.clahe_clip_limit.get()
+        if mode == 'clahe' and clip_limit <= 0:
+            messagebox.showinfo("Info", "Clip limit must be greater than 0")
+            return
+
+        main_filtered_image = ImageProcessorCore3.histogram_equalization(self.app.image, mode, color_model, clip_limit)
 
-        if not self.app.compare_image:
+        if self.app.compare_image is None:
             self.app.update_image([main_filtered_image, None])
             return
 
-        compare_filtered_image = ImageProcessorCore3.histogram_equalization(self.app.compare_image)
+        compare_filtered_image = ImageProcessorCore3.histogram_equalization(self.app.compare_image, mode, color_model,
+                                                                            clip_limit)
         self.app.update_image([main_filtered_image, compare_filtered_image])
 
     def apply_averaging_mask(self, mask_size: int = 3):
@@ -92,69 +81,90 @@ class ImageOperationsHW3(ImageOperationsHW2):
         Args:
             mask_size (int): The size of the averaging mask
         """
-        if not self.app.image:
+        if self.app.image is None:
             messagebox.showinfo("Info", "Please open an image first")
             return
 
         main_filtered_image = ImageProcessorCore3.apply_average_mask(self.app.image, mask_size)
 
-        if not self.app.compare_image:
+        if self.app.compare_image is None:
             self.app.update_image([main_filtered_image, None])
             return
 
         compare_filtered_image = ImageProcessorCore3.apply_average_mask(self.app.compare_image, mask_size)
         self.app.update_image([main_filtered_image, compare_filtered_image])
 
+    def apply_box_average(self):
+        """
+        Apply an average filter of any size with the integral image backend, changing the size reuses
+        the summed-area table of the images the filter started from
+        """
+        if self.app.image is None:
+            messagebox.showinfo("Info", "Please open an image first")
+            return
+
+        kernel_size = self.app.average_kernel_size.get()
+        if kernel_size <= 0 or kernel_size % 2 == 0:
+            messagebox.showinfo("Info", "Kernel size must be a positive odd number")
+            return
+
+        self._parameter_sweep(
+            "box_average",
+            lambda image: ImageProcessorCore3.apply_average_mask(image, kernel_size, backend='integral')
+        )
+
     def apply_sharpening_mask(self, model: str):
         """
         Apply a sharpening mask to both the main and comparison images using OpenCV.
         """
         assert model in ['rgb', 'hsi'], f"Invalid model: {model}"
 
-        if not self.app.image:
+        if self.app.image is None:
             messagebox.showinfo("Info", "Please open an image first")
             return
 
-        main_filtered_image = ImageProcessorCore3.apply_sharpening_mask(self.app.image, model)
+        color_model = self.app.color_model.get().lower()
+        band_rows = self.app.band_rows.get()
+        mode = self.app.sharpening_mode.get().lower()
+        main_filtered_image = ImageProcessorCore3.apply_sharpening_mask(self.app.image, model, color_model, band_rows,
+                                                                        mode)
 
-        if not self.app.compare_image:
+        if self.app.compare_image is None:
             self.app.update_image([main_filtered_image, None])
             return
 
-        compare_filtered_image = ImageProcessorCore3.apply_sharpening_mask(self.app.compare_image, model)
+        compare_filtered_image = ImageProcessorCore3.apply_sharpening_mask(self.app.compare_image, model, color_model,
+                                                                           band_rows, mode)
         self.app.update_image([main_filtered_image, compare_filtered_image])
 
     def hue_mask(self, lower_hue: int, upper_hue: int):
         """
         Apply a hue mask to the image
         """
-        if not self.app.image:
+        if self.app.image is None:
             messagebox.showinfo("Info", "Please open an image first")
             return
 
-        main_filtered_image = ImageProcessorCore3.hue_mask(self.app.image, lower_hue, upper_hue)
-
-        if not self.app.compare_image:
-            self.app.update_image([main_filtered_image, None])
-            return
-
-        compare_filtered_image = ImageProcessorCore3.hue_mask(self.app.compare_image, lower_hue, upper_hue)
-        self.app.update_image([main_filtered_image, compare_filtered_image])
+        color_model = self.app.color_model.get().lower()
+        use_lut = self.app.hsi_lookup.get()
+        self._apply(
+            lambda image: ImageProcessorCore3.hue_mask(image, lower_hue, upper_hue, color_model, use_lut),
+            pixelwise=True
+        )
 
     def saturation_mask(self, lower_saturation: int, upper_saturation: int):
         """
         Apply a saturation mask to the image
         """
-        if not self.app.image:
+        if self.app.image is None:
             messagebox.showinfo("Info", "Please open an image first")
             return
 
-        main_filtered_image = ImageProcessorCore3.saturation_mask(self.app.image, lower_saturation, upper_saturation)
-
-        if not self.app.compare_image:
-            self.app.update_image([main_filtered_image, None])
-            return
-
-        compare_filtered_image = ImageProcessorCore3.saturation_mask(self.app.compare_image, lower_saturation,
-                                                                     upper_saturation)
-        self.app.update_image([main_filtered_image, compare_filtered_image])
+        color_model = self.app.color_model.get().lower()
+        use_lut = self.app.hsi_lookup.get()
+        self._apply(
+            lambda image: ImageProcessorCore3.saturation_mask(
+                image, lower_saturation, upper_saturation, color_model, use_lut
+            ),
+            pixelwise=True
+        )
\ No newline at end of file
@@ -1,20 +1,33 @@
 import math
+from functools import lru_cache
 from tkinter import messagebox
+from typing import List, Tuple
 
 import cv2
 import numpy as np
 from PIL import Image
 
+from band_processing import adjust_brightness_bands, sharpen_bands
+from bit_planes import bit_plane_stack
+from geometry import INTERPOLATIONS, resize, rotation, warp_affine
+from image_arrays import to_array
+from scale_space import scale_space
+from sharpening import sharpen
+
 # This is for working with the PIL library older
 if not hasattr(Image, 'Resampling'):
     Image.Resampling = Image
 
-USE_MANUALLY_FUNCTION = False
-
 
 class ImageProcessorCore:
     @staticmethod
-    def adjust_brightness(image: Image.Image, alpha: float, beta: float, algorithm: str) -> Image.Image:
+    def adjust_brightness(
+            image: np.ndarray,
+            alpha: float,
+            beta: float,
+            algorithm: str,
+            band_rows: int = 0
+    ) -> np.ndarray:
         """
         Adjust the brightness of an image using a linear, exponential, or logarithmic algorithm
         Args:
@@ -22,15 +35,20 @@ class ImageProcessorCore:
             alpha: The alpha value for the algorithm
             beta: The beta value for the algorithm
             algorithm: The algorithm to use for adjusting the brightness
+            band_rows: The number of rows per band for the chunked evaluation, 0 to process the whole image
         Returns:
             The adjusted image
         """
-        image_array = np.array(image, dtype=np.float32)
-
         if beta <= 1 and algorithm == "Logarithmic":
             messagebox.showerror("Error", "Beta value must be greater than 1 for logarithmic algorithm")
             raise ValueError("Beta value must be greater than 1 for logarithmic algorithm")
 
+        # Evaluate in row bands to bound the float temporaries by the band size
+        if band_rows > 0 and algorithm in ("Linear", "Exponential", "Logarithmic"):
+            return adjust_brightness_bands(to_array(image), alpha, beta, algorithm, band_rows)
+
+        image_array = to_array(image).astype(np.float32)
+
         if algorithm == "Linear":
             new_image = alpha * image_array + beta
         elif algorithm == "Exponential":
@@ -50,42 +68,57 @@ class ImageProcessorCore:
         # Clip the values to 0-255
         new_image = np.clip(new_image, 0, 255)
 
-        return Image.fromarray(new_image.astype(np.uint8))
+        return new_image.astype(np.uint8)
 
     @staticmethod
-    def resize_image(image: Image.Image, scale_factor: float) -> Image.Image:
+    def resize_image(image: np.ndarray, scale_factor: float, interpolation: str = 'bilinear') -> np.ndarray:
         """
-        Resize an image using bilinear interpolation
+        Resize an image
         Args:
             image: The image to resize
             scale_factor: The scale factor for resizing
+            interpolation: 'nearest', 'bilinear' or 'bicubic'
         Returns:
             The resized image
         """
-        # Use PIL's built-in resize function with bilinear interpolation
-        return image.resize(
+        image_array = to_array(image)
+        height, width = image_array.shape[:2]
+
+        # A separable resize, which is faster than any remap for a pure scale
+        return resize(
+            image_array,
             (
-                math.floor(image.width * scale_factor),
-                math.floor(image.height * scale_factor)
+                math.floor(width * scale_factor),
+                math.floor(height * scale_factor)
             ),
-            Image.Resampling.BILINEAR
+            INTERPOLATIONS[interpolation]
         )
 
     @staticmethod
-    def rotate_image(image: Image.Image, angle: float) -> Image.Image:
+    def rotate_image(
+            image: np.ndarray,
+            angle: float,
+            expand: bool = False,
+            interpolation: str = 'bilinear'
+    ) -> np.ndarray:
         """
         Rotate an image by a given angle
         Args:
             image: The image to rotate
             angle: The angle to rotate the image by
+            expand: Whether to grow the canvas to hold the whole rotated image
+            interpolation: 'nearest', 'bilinear' or 'bicubic'
         Returns:
             The rotated image
         """
-        # Use PIL's built-in rotate function with bilinear
-        return image.rotate(angle, resample=Image.Resampling.BILINEAR)
+        image_array = to_array(image)
+
+        # Rotate counter-clockwise around the center, reusing the remap grids of the same size and angle
+        rotation_matrix, size = rotation(image_array.shape, angle, expand=expand)
+        return warp_affine(image_array, rotation_matrix, size, INTERPOLATIONS[interpolation])
 
     @staticmethod
-    def gray_level_slicing(image: Image.Image, min_gray: int, max_gray: int, preserve_original: bool) -> Image.Image:
+    def gray_level_slicing(image: np.ndarray, min_gray: int, max_gray: int, preserve_original: bool) -> np.ndarray:
         """
         Perform gray level slicing on an image
         Args:
@@ -98,25 +131,52 @@ class ImageProcessorCore:
             The sliced image
         """
         assert 0 <= min_gray <= 255, "Min gray level must be between 0 and 255"
-        image_array = np.array(image)
+        return ImageProcessorCore.multi_band_slicing(image, [(min_gray, max_gray, 255)], preserve_original)
 
-        # Create a mask for the selected gray levels
-        mask = (image_array >= min_gray) & (image_array <= max_gray)
+    @staticmethod
+    def multi_band_slicing(
+            image: np.ndarray,
+            bands: List[Tuple[int, int, int]],
+            preserve_original: bool
+    ) -> np.ndarray:
+        """
+        Perform gray level slicing with several bands, each mapped to its own output level. The bands are
+        compiled into one 256-entry LUT applied in a single pass, to every channel of an RGB image.
+        Args:
+            image: The input image to apply gray level slicing
+            bands: The (min, max, level) of each band, a later band overrides the earlier ones where they overlap
+            preserve_original: Whether to preserve the original values of unselected areas, otherwise they are 0
 
-        # Create a new image with the selected gray levels
-        new_image = np.zeros_like(image_array)
+        Returns:
+            The sliced image
+        """
+        image_array = to_array(image)
+        assert image_array.dtype == np.uint8, "Gray level slicing needs an 8-bit image"
+        return cv2.LUT(image_array, ImageProcessorCore.gray_level_slicing_lut(tuple(bands), preserve_original))
 
-        # Slice the image using the mask
-        new_image[mask] = 255
+    @staticmethod
+    @lru_cache(maxsize=16)
+    def gray_level_slicing_lut(bands: Tuple[Tuple[int, int, int], ...], preserve_original: bool) -> np.ndarray:
+        """
+        Build the LUT of a gray level slicing
+        Args:
+            bands: The (min, max, level) of each band
+            preserve_original: Whether unselected levels map to themselves, otherwise to 0
 
-        # Preserve the original values of unselected areas
-        if preserve_original:
-            new_image[~mask] = image_array[~mask]
+        Returns:
+            The read-only uint8 LUT
+        """
+        lut = np.arange(256, dtype=np.uint8) if preserve_original else np.zeros(256, dtype=np.uint8)
+        for min_gray, max_gray, level in bands:
+            assert 0 <= min_gray <= max_gray, "Band levels must be ordered and not negative"
+            assert 0 <= level <= 255, "Output level must be between 0 and 255"
+            lut[min_gray:max_gray + 1] = level
 
-        return Image.fromarray(new_image)
+        lut.flags.writeable = False
+        return lut
 
     @staticmethod
-    def bit_plane_image(image: Image.Image, bit_plane: int) -> Image.Image:
+    def bit_plane_image(image: np.ndarray, bit_plane: int) -> np.ndarray:
         """
         Display the bit-plane images for the input image
         Args:
@@ -127,16 +187,23 @@ class ImageProcessorCore:
         """
         assert 0 <= bit_plane <= 7, "Bit-plane level must be between 0 and 7"
 
-        # Extract the specified bit-plane by bitwise shifting and masking
-        bit_plane_image = (np.array(image) >> bit_plane) & 1
-
-        # Scale the bit-plane image to the full 0-255 range for display purposes
-        bit_plane_image = bit_plane_image * 255
+        # Unpack the plane from the packed decomposition of the image, scaled to the full 0-255 range for display
+        return bit_plane_stack(to_array(image)).plane(bit_plane)
 
-        return Image.fromarray(bit_plane_image)
+    @staticmethod
+    def reconstruct_bit_planes(image: np.ndarray, bit_planes: List[int]) -> np.ndarray:
+        """
+        Rebuild the image from a subset of its bit-planes
+        Args:
+            image: The input image to decompose
+            bit_planes: The bit-planes to keep, the other bits are 0
+        Returns:
+            The reconstructed image
+        """
+        return bit_plane_stack(to_array(image)).reconstruct(bit_planes)
 
     @staticmethod
-    def smooth_image(image: Image.Image, smoothing_level: int) -> Image.Image:
+    def smooth_image(image: np.ndarray, smoothing_level: int) -> np.ndarray:
         """
         Smooth the image
         Args:
@@ -146,23 +213,40 @@ class ImageProcessorCore:
             The smoothed image
         """
         assert smoothing_level > 0, "Smoothing level must be greater than 0"
-        # As kernel size must be odd, we multiply the smoothing level by 2 and add 1
-        smoothing_level = int(2 * smoothing_level + 1)
 
-        # Apply Gaussian blur to the image
-        return Image.fromarray(cv2.GaussianBlur(np.array(image), (smoothing_level, smoothing_level), 0))
+        # Apply Gaussian blur to the image, the kernel size is 2 * level + 1 as it must be odd. The scale space
+        # of the image keeps the previous levels, so a higher level only blurs the difference.
+        return scale_space(to_array(image)).smooth(int(smoothing_level))
 
     @staticmethod
-    def sharpen_image(image: Image.Image, sharpening_level: int) -> Image.Image:
+    def sharpen_image(
+            image: np.ndarray,
+            sharpening_level: int,
+            band_rows: int = 0,
+            mode: str = 'laplacian'
+    ) -> np.ndarray:
         """
         Sharpen the image
         Args:
             image: The input image to apply sharpening
             sharpening_level: The level of sharpening
+            band_rows: The number of rows per band for the chunked evaluation, 0 to process the whole image
+            mode: 'laplacian' to subtract the float Laplacian, 'fused' for the same result in one kernel pass,
+                or 'unsharp' for unsharp masking with the level as the high-boost weight
         Returns:
             The sharpened image
         """
-        image_array = np.array(image)
+        image_array = to_array(image)
+
+        # The fused kernels run in one pass without float temporaries, so they need no bands
+        if mode == 'fused':
+            return sharpen(image_array, sharpening_level)
+        if mode == 'unsharp':
+            return sharpen(image_array, sharpening_level, 'unsharp')
+
+        # Evaluate in row bands to bound the float temporaries by the band size
+        if band_rows > 0:
+            return sharpen_bands(image_array, sharpening_level, band_rows)
 
         # Create a Laplacian filter
         laplacian = cv2.Laplacian(image_array, cv2.CV_64F)
@@ -171,4 +255,4 @@ class ImageProcessorCore:
         # Clip the result
         sharpened_image = np.clip(sharpened_image, 0, 255).astype(np.uint8)
 
-        return Image.fromarray(sharpened_image)
+        return sharpened_image
@@ -1,12 +1,19 @@
-import cv2
+from typing import Callable, Optional
+
 import numpy as np
 from PIL import Image
 
+import parallel_kernels
+from filter_backends import backends
+from frequency_filters import SpectrumCache, transfer_function
+from image_arrays import to_array
+
 # This is for working with the PIL library older
 if not hasattr(Image, 'Resampling'):
     Image.Resampling = Image
 
-USE_MANUALLY_FUNCTION = False
+# The spectra of the recently filtered images, reused while the filter parameters change
+_spectrum_cache = SpectrumCache()
 
 
 class ImageProcessorCore2:
@@ -20,41 +27,16 @@ class ImageProcessorCore2:
         Returns:
             The convolved image
         """
-        width, height = image_array.shape[0], image_array.shape[1]
         mask_width, mask_height = mask.shape
         assert mask_width % 2 == 1 and mask_height % 2 == 1, "Mask dimensions must be odd"
 
-        # Calculate the padding needed for the mask
-        padding_width = mask_width // 2
-        padding_height = mask_height // 2
-        result_image = np.zeros((width, height), dtype=np.float32)
-
-        # Pad the image with zeros
-        padded_image = np.pad(
-            image_array,
-            ((padding_width, padding_width),
-             (padding_height, padding_height)),
-            mode='constant',
-            constant_values=0
-        )
-
-        # Convolve the image with the mask
-        for i in range(width):
-            for j in range(height):
-                # The region mask is the region of the image that the mask will be applied to
-                region_mask = padded_image[
-                                  i:i + mask_height,
-                                  j:j + mask_width
-                              ]
-                # Apply the mask to the region
-                result_image[i, j] = np.sum(region_mask * mask)
-
-        return result_image.clip(0, 255).astype(np.uint8)
+        # Convolve pixel by pixel, the rows split in bands over the worker processes
+        return parallel_kernels.convolve(image_array, mask)
 
     @staticmethod
-    def apply_median_mask(image: Image.Image, kernel_size: int) -> Image.Image:
+    def apply_median_mask(image: np.ndarray, kernel_size: int) -> np.ndarray:
         """
-        Apply a median filter to image using OpenCV
+        Apply a median filter to image with the backend chosen for its size
         Args:
             image: The input image to apply the median mask
             kernel_size: The size of the kernel for the median
@@ -64,52 +46,28 @@ class ImageProcessorCore2:
         assert kernel_size % 2 == 1, "Kernel size must be odd"
 
         # Convert the main image to OpenCV format
-        image_array = np.array(image)
+        image_array = to_array(image)
 
-        if USE_MANUALLY_FUNCTION:
-            filtered = np.zeros_like(image_array)
-            padding = kernel_size // 2
-            for i in range(padding, image_array.shape[0] - padding):
-                for j in range(padding, image_array.shape[1] - padding):
-                    region = image_array[i - padding:i + padding + 1, j - padding:j + padding + 1]
-                    filtered[i, j] = np.median(region)
-        else:
-            # Apply the median mask using OpenCV
-            filtered = cv2.medianBlur(image_array, kernel_size)
-
-        return Image.fromarray(filtered)
+        # The manual, NumPy or OpenCV median, the fastest one for this size unless a backend is forced
+        return backends.dispatch('median', image_array, kernel_size)
 
     @staticmethod
-    def apply_laplacian_mask(image: Image.Image) -> Image.Image:
+    def apply_laplacian_mask(image: np.ndarray) -> np.ndarray:
         """
-        Apply a Laplacian mask to the image using OpenCV
+        Apply a Laplacian mask to the image with the backend chosen for its size
         Args:
             image: The input image to apply the Laplacian mask
         Returns:
             The image with the Laplacian mask applied
         """
         # Convert the main image to OpenCV format
-        image_array = np.array(image)
-
-        if USE_MANUALLY_FUNCTION:
-            # The laplacian mask
-            laplacian_mask = np.array([
-                [0, 1, 0],
-                [1, -4, 1],
-                [0, 1, 0]
-            ])
+        image_array = to_array(image)
 
-            # Call the convolution function to apply the mask
-            filtered_array = ImageProcessorCore2.convolution(image_array, laplacian_mask)
-        else:
-            # Apply the Laplacian mask using OpenCV
-            filtered_array = cv2.Laplacian(image_array, cv2.CV_64F)
-            filtered_array = np.clip(filtered_array, 0, 255).astype(np.uint8)
-
-        return Image.fromarray(filtered_array)
+        # The manual, NumPy or OpenCV Laplacian, the fastest one for this size unless a backend is forced
+        return backends.dispatch('laplacian', image_array)
 
     @staticmethod
-    def apply_fft(image: Image.Image) -> Image.Image:
+    def apply_fft(image: np.ndarray) -> np.ndarray:
         """
         Apply Fast Fourier Transform to the image
         Args:
@@ -118,7 +76,7 @@ class ImageProcessorCore2:
             The image with FFT applied
         """
         # Convert the main image to OpenCV format
-        image_array = np.array(image)
+        image_array = to_array(image)
 
         # Apply FFT using numpy
         fft_result  = np.fft.fft2(image_array)
@@ -130,19 +88,19 @@ class ImageProcessorCore2:
         # Scale the magnitude spectrum to 0-255 for display
         scaled_magnitude = (magnitude_spectrum / np.max(magnitude_spectrum) * 255).astype(np.uint8)
 
-        return Image.fromarray(scaled_magnitude)
+        return scaled_magnitude
 
     @staticmethod
-    def inverse_fft_magnitude_only(image: Image.Image) -> Image.Image:
+    def inverse_fft_magnitude_only(image: np.ndarray) -> np.ndarray:
         """
         Perform inverse FFT using only the magnitude information of an image.
         Args:
-            image (Image.Image): The input image.
+            image (np.ndarray): The input image.
         Returns:
-            Image.Image: The reconstructed image from magnitude only.
+            np.ndarray: The reconstructed image from magnitude only.
         """
         # Convert the main image to OpenCV format
-        image_array = np.array(image)
+        image_array = to_array(image)
 
         # Apply FFT using numpy
         fft_result = np.fft.fft2(image_array)
@@ -158,19 +116,19 @@ class ImageProcessorCore2:
         # Clip the image to 0-255
         clipped_image = np.clip(reconstructed_image, 0, 255).astype(np.uint8)
 
-        return Image.fromarray(clipped_image)
+        return clipped_image
 
     @staticmethod
-    def inverse_fft_phase_only(image: Image.Image) -> Image.Image:
+    def inverse_fft_phase_only(image: np.ndarray) -> np.ndarray:
         """
         Perform inverse FFT using only the phase information of an image.
         Args:
-            image (Image.Image): The input image.
+            image (np.ndarray): The input image.
         Returns:
-            Image.Image: The reconstructed image from phase only.
+            np.ndarray: The reconstructed image from phase only.
         """
         # Convert the main image to OpenCV format
-        image_array = np.array(image)
+        image_array = to_array(image)
 
         # Apply FFT using numpy
         fft_result = np.fft.fft2(image_array)
@@ -186,7 +144,20 @@ class ImageProcessorCore2:
         # Clip the image to 0-255 for display
         scaled_image = (reconstructed_image / np.max(reconstructed_image) * 255).astype(np.uint8)
 
-        return Image.fromarray(scaled_image)
+        return scaled_image
+
+    @staticmethod
+    def flip_checkerboard_signs(array: np.ndarray) -> np.ndarray:
+        """
+        Negate the pixels where x+y is odd in place, which is the same as multiplying by (-1)^(x+y)
+        Args:
+            array: The signed, float or complex array to flip, grayscale or RGB
+        Returns:
+            The same array
+        """
+        array[0::2, 1::2] *= -1
+        array[1::2, 0::2] *= -1
+        return array
 
     @staticmethod
     def multiply_by_neg_1(image_array: np.array) -> np.array:
@@ -197,16 +168,9 @@ class ImageProcessorCore2:
         Returns:
             The image multiplied by (-1)^(x+y)
         """
-        # if image is grayscale
-        if len(image_array.shape) == 2:
-            x, y = np.indices(image_array.shape)
-            result_array = image_array * ((-1) ** (x + y))
-            return result_array
-        # if image is RGB
-        else:
-            x, y = np.indices(image_array.shape[:2])
-            result_array = image_array * ((-1) ** (x + y))[:, :, np.newaxis]
-            return result_array
+        # Copy to the smallest signed type that holds the negated values and flip the odd pixels
+        result_array = image_array.astype(np.result_type(image_array, np.int8))
+        return ImageProcessorCore2.flip_checkerboard_signs(result_array)
 
     @staticmethod
     def compute_dft(image_array: np.array) -> np.array:
@@ -240,3 +204,82 @@ class ImageProcessorCore2:
             The real part of the inverse DFT
         """
         return np.fft.ifft2(fft_result)
+
+    @staticmethod
+    def centered_round_trip(
+            image_array: np.ndarray,
+            on_step: Optional[Callable[[str, np.ndarray], None]] = None,
+            dtype: type = np.complex128
+    ) -> np.ndarray:
+        """
+        Run the whole multiply/DFT/conjugate/IDFT/multiply sequence on a single complex buffer
+        Args:
+            image_array: The input image
+            on_step: Called with the step name and the buffer after each step to inspect it, the buffer
+                is overwritten by the next step so it must be copied to be kept
+            dtype: The complex type of the buffer
+        Returns:
+            The complex result of the last step
+        """
+        buffer = np.empty(image_array.shape, dtype=dtype)
+        np.copyto(buffer, image_array)
+
+        def transform(function: Callable):
+            # One axis at a time, over the same axes as fft2 in compute_dft, writing back into the buffer
+            for axis in (-1, -2):
+                function(buffer, axis=axis, out=buffer)
+
+        steps = [
+            ("multiply", lambda: ImageProcessorCore2.flip_checkerboard_signs(buffer)),
+            ("dft", lambda: transform(np.fft.fft)),
+            ("conjugate", lambda: np.conjugate(buffer, out=buffer)),
+            ("inverse_dft", lambda: transform(np.fft.ifft)),
+            ("multiply_final", lambda: ImageProcessorCore2.flip_checkerboard_signs(buffer)),
+        ]
+        for name, step in steps:
+            step()
+            if on_step is not None:
+                on_step(name, buffer)
+
+        return buffer
+
+    @staticmethod
+    def apply_frequency_filter(
+            image: np.ndarray,
+            filter_type: str,
+            filter_pass: str,
+            cutoff: float,
+            order: int = 2,
+            band_width: float = 10.0
+    ) -> np.ndarray:
+        """
+        Apply an ideal, Butterworth or Gaussian filter in the frequency domain. The spectrum of the image
+        and the transfer function are cached, so changing the parameters only costs one multiply and
+        one inverse DFT.
+        Args:
+            image: The input image to filter
+            filter_type: 'ideal', 'butterworth' or 'gaussian'
+            filter_pass: 'lowpass', 'highpass' or 'bandreject'
+            cutoff: The cutoff frequency D0, or the center of the rejected band
+            order: The order n of the Butterworth filter
+            band_width: The width W of the rejected band
+        Returns:
+            The filtered image
+        """
+        image_array = to_array(image)
+
+        spectrum = _spectrum_cache.get(image_array)
+        if spectrum is None:
+            # Move the channels first so the DFT runs over the two image axes of each channel
+            channels = image_array if image_array.ndim == 2 else np.moveaxis(image_array, -1, 0)
+            spectrum = ImageProcessorCore2.compute_dft(np.ascontiguousarray(channels, dtype=np.float32))
+            _spectrum_cache.put(image_array, spectrum)
+
+        transfer = transfer_function(image_array.shape[:2], filter_type, filter_pass, cutoff, order, band_width)
+        filtered_array = ImageProcessorCore2.compute_inverse_dft(spectrum * transfer).real
+
+        if image_array.ndim == 3:
+            filtered_array = np.moveaxis(filtered_array, 0, -1)
+
+        # Round instead of truncating, so a unit transfer function gives the input back
+        return np.clip(np.rint(filtered_array), 0, 255).astype(np.uint8)
@@ -1,31 +1,36 @@
+from typing import Optional
+
 import cv2
 import numpy as np
 from PIL import Image
 
-from image_processor_core_hw2 import ImageProcessorCore2
+from band_processing import sharpen_bands
+from color_space import convert_from_rgb, hsi_to_rgb, rgb_to_hsi
+from equalization import clahe_channels, equalization_luts, equalize_channels
+from filter_backends import backends
+from image_arrays import to_array
+from sharpening import sharpen
 
 # This is for working with the PIL library older
 if not hasattr(Image, 'Resampling'):
     Image.Resampling = Image
 
-USE_MANUALLY_FUNCTION = False
-
 
 class ImageProcessorCore3:
     @staticmethod
-    def rgb_image(image: Image.Image, color: str) -> Image.Image:
+    def rgb_image(image: np.ndarray, color: str) -> np.ndarray:
         """
         Get its “Red component image”, “Green component image”, and “Blue component image” and
         display them as 24-bit color images respectively.
 
         Args:
-            image (Image.Image): The image to process
+            image (np.ndarray): The image to process
             color (str): The color to extract
 
         Returns:
-            Image.Image: The processed image
+            np.ndarray: The processed image
         """
-        image_array = np.array(image)
+        image_array = to_array(image)
         result_array = np.zeros_like(image_array)
 
         # Apply the RGB model selection
@@ -36,24 +41,26 @@ class ImageProcessorCore3:
         elif color == 'blue':
             result_array[:, :, 2] = image_array[:, :, 2]
 
-        return Image.fromarray(result_array.astype(np.uint8))
+        return result_array.astype(np.uint8, copy=False)
 
     @staticmethod
-    def hsi_image(image: Image.Image, channel: str) -> Image.Image:
+    def hsi_image(image: np.ndarray, channel: str, color_model: str = 'hsv', use_lut: bool = False) -> np.ndarray:
         """
         Get its “Hue component image”, “Saturation component image”, and “Intensity component image” and
         display them as 8-bit gray-level images respectively.
 
         Args:
-            image (Image.Image): The image to process
+            image (np.ndarray): The image to process
             channel (str): The channel to extract
+            color_model (str): 'hsv' for OpenCV's HSV or 'hsi' for the arccos-based HSI
+            use_lut (bool): Whether to use the lookup table for the HSI conversion
 
         Returns:
-            Image.Image: The processed image
+            np.ndarray: The processed image
         """
         # Convert the image to HSI
-        image_array = np.array(image)
-        hsi_image = cv2.cvtColor(image_array, cv2.COLOR_RGB2HSV)
+        image_array = to_array(image)
+        hsi_image = convert_from_rgb(image_array, color_model, use_lut)
 
         # For the result, we consider the image as 3D or 2D and select the channel
         result_array = np.zeros_like(image_array) \
@@ -68,100 +75,131 @@ class ImageProcessorCore3:
         elif channel == 'intensity':
             result_array[:, :] = hsi_image[:, :, 2]
 
-        return Image.fromarray(result_array.astype(np.uint8))
+        return result_array.astype(np.uint8, copy=False)
 
     @staticmethod
-    def complement_image(image: Image.Image) -> Image.Image:
+    def complement_image(image: np.ndarray) -> np.ndarray:
         """
         Get the complement of the image
 
         Args:
-            image (Image.Image): The image to process
+            image (np.ndarray): The image to process
 
         Returns:
-            Image.Image: The processed image
+            np.ndarray: The processed image
         """
-        image_array = np.array(image)
+        image_array = to_array(image)
         result_array = 255 - image_array
 
-        return Image.fromarray(result_array.astype(np.uint8))
+        return result_array.astype(np.uint8, copy=False)
 
 
     @staticmethod
-    def histogram_equalization(image: Image.Image) -> Image.Image:
+    def histogram_equalization(
+            image: np.ndarray,
+            mode: str = 'rgb',
+            color_model: str = 'hsv',
+            clip_limit: float = 2.0,
+            tile_grid: int = 8
+    ) -> np.ndarray:
         """
         Perform histogram equalization on the RGB image
 
         Args:
-            image (Image.Image): The image to process
+            image (np.ndarray): The image to process
+            mode (str): 'rgb' to equalize every channel, 'intensity' to equalize the intensity and keep the
+                hue, or 'clahe' for contrast limited adaptive equalization of every channel
+            color_model (str): The intensity model of the 'intensity' mode, 'hsv' or 'hsi'
+            clip_limit (float): The contrast limit of the 'clahe' mode
+            tile_grid (int): The number of tiles per side of the 'clahe' mode
 
         Returns:
-            Image.Image: The processed image
+            np.ndarray: The processed image
         """
-        image_array = np.array(image)
-        result_array = np.zeros_like(image_array)
-
-        # Check image channels
-        if image_array.ndim == 2:
-            # Apply histogram equalization if the image is grayscale
-            return Image.fromarray(cv2.equalizeHist(np.array(image)))
-        else:
-            # Apply histogram equalization for each channel
-            for i in range(3):
-                result_array[:, :, i] = cv2.equalizeHist(image_array[:, :, i])
-
-        return Image.fromarray(result_array.astype(np.uint8))
+        image_array = to_array(image)
+
+        if mode == 'clahe':
+            return clahe_channels(image_array, clip_limit, (tile_grid, tile_grid))
+        if mode == 'rgb' or image_array.ndim == 2:
+            # Equalize all the channels with one stacked LUT
+            return equalize_channels(image_array)
+        if mode != 'intensity':
+            raise ValueError("Invalid equalization mode")
+
+        if color_model == 'hsi':
+            # Equalize the quantized intensity and write the mapped level back into the float HSI image
+            hsi_image = rgb_to_hsi(image_array, quantize=False)
+            intensity = np.rint(hsi_image[:, :, 2] * 255).astype(np.uint8)
+            hsi_image[:, :, 2] = equalization_luts(intensity)[0][intensity] / np.float32(255)
+            return hsi_to_rgb(hsi_image)
+
+        # Equalize the value channel of HSV
+        h, s, v = cv2.split(cv2.cvtColor(image_array, cv2.COLOR_RGB2HSV))
+        return cv2.cvtColor(cv2.merge((h, s, equalize_channels(v))), cv2.COLOR_HSV2RGB)
 
     @staticmethod
-    def apply_average_mask(image: Image.Image, kernel_size: int) -> Image.Image:
+    def apply_average_mask(image: np.ndarray, kernel_size: int, backend: Optional[str] = None) -> np.ndarray:
         """
-        Apply an average filter to image using OpenCV
+        Apply an average filter to image
         Args:
             image: The input image to apply the average mask
             kernel_size: The size of the kernel for the average
+            backend: 'manual' for the convolution, 'opencv' for cv2.blur, 'integral' for the cached summed-area
+                table of the image, which serves any kernel size with four lookups per pixel, 'fft' for the
+                product of spectra, or None for the fastest one for this size
         Returns:
             The image with the average mask applied
         """
         assert kernel_size % 2 == 1, "Kernel size must be odd"
 
         # Convert the main image to OpenCV format
-        image_array = np.array(image)
-
-        if USE_MANUALLY_FUNCTION:
-            # The average mask is a kernel of ones divided by the kernel size squared
-            mask = np.ones((kernel_size, kernel_size)) / (kernel_size ** 2)
-
-            if image_array.ndim == 2:
-                # Call the convolution function to apply the mask
-                filtered_array = ImageProcessorCore2.convolution(image_array, mask)
-            else:
-                # Apply the average mask to each channel
-                filtered_array = np.zeros_like(image_array)
-                for i in range(3):
-                    filtered_array[:, :, i] = ImageProcessorCore2.convolution(image_array[:, :, i], mask)
-        else:
-            # Apply the average mask using OpenCV
-            filtered_array = cv2.blur(image_array, (kernel_size, kernel_size))
+        image_array = to_array(image)
 
-        return Image.fromarray(filtered_array)
+        return backends.dispatch('average', image_array, kernel_size, backend=backend)
 
     @staticmethod
-    def apply_sharpening_mask(image: Image.Image, model: str) -> Image.Image:
+    def apply_sharpening_mask(
+            image: np.ndarray,
+            model: str,
+            color_model: str = 'hsv',
+            band_rows: int = 0,
+            mode: str = 'laplacian'
+    ) -> np.ndarray:
         """
         Apply a sharpening mask to the image using OpenCV
         Args:
             image: The input image to apply the sharpening mask
             model: The model to use for sharpening
+            color_model: The intensity model used by the 'hsi' sharpening, 'hsv' or 'hsi'
+            band_rows: The number of rows per band for the chunked evaluation, 0 to process the whole image
+            mode: 'laplacian' to subtract the float Laplacian, 'fused' for the same result in one kernel pass,
+                or 'unsharp' for unsharp masking, the float HSI intensity is always sharpened with the Laplacian
         Returns:
             The image with the sharpening mask applied
         """
-        image_array = np.array(image)
-
-        if model == 'rgb':
+        image_array = to_array(image)
+
+        if model == 'rgb' and mode != 'laplacian':
+            sharpened_image = sharpen(image_array, 1, 'unsharp' if mode == 'unsharp' else 'laplacian')
+        elif model == 'rgb' and band_rows > 0:
+            # Evaluate in row bands to bound the float temporaries by the band size
+            sharpened_image = sharpen_bands(image_array, 1, band_rows)
+        elif model == 'rgb':
             # Create a Laplacian filter
             laplacian = cv2.Laplacian(image_array, cv2.CV_64F)
             sharpened_image = image_array - laplacian
             sharpened_image = np.clip(sharpened_image, 0, 255).astype(np.uint8)
+        elif model == 'hsi' and color_model == 'hsi':
+            # Convert the image to HSI, keeping the float values so the round trip is lossless
+            hsi_image = rgb_to_hsi(image_array, quantize=False)
+
+            # Apply the Laplacian filter to the intensity channel in the 0-255 range
+            intensity = hsi_image[:, :, 2] * 255
+            laplacian = cv2.Laplacian(intensity, cv2.CV_32F)
+            hsi_image[:, :, 2] = np.clip(intensity - laplacian, 0, 255) / 255
+
+            # Convert the image back to RGB
+            sharpened_image = hsi_to_rgb(hsi_image)
         elif model == 'hsi':
             # Convert the image to HSI
             hsi_image = cv2.cvtColor(image_array, cv2.COLOR_RGB2HSV)
@@ -170,9 +208,14 @@ class ImageProcessorCore3:
             h, s, v = cv2.split(hsi_image)
 
             # Apply the Laplacian filter to the intensity channel
-            laplacian = cv2.Laplacian(v, cv2.CV_64F)
-            sharpened_image = v - laplacian
-            sharpened_image = np.clip(sharpened_image, 0, 255).astype(np.uint8)
+            if mode != 'laplacian':
+                sharpened_image = sharpen(v, 1, 'unsharp' if mode == 'unsharp' else 'laplacian')
+            elif band_rows > 0:
+                sharpened_image = sharpen_bands(v, 1, band_rows)
+            else:
+                laplacian = cv2.Laplacian(v, cv2.CV_64F)
+                sharpened_image = v - laplacian
+                sharpened_image = np.clip(sharpened_image, 0, 255).astype(np.uint8)
 
             # Merge the HSI channels
             sharpened_image = cv2.merge((h, s, sharpened_image))
@@ -182,23 +225,31 @@ class ImageProcessorCore3:
         else:
             raise ValueError("Invalid sharpening model")
 
-        return Image.fromarray(sharpened_image)
+        return sharpened_image
 
     @staticmethod
-    def hue_mask(image: Image.Image, lower_hue: int, upper_hue: int) -> Image.Image:
+    def hue_mask(
+            image: np.ndarray,
+            lower_hue: int,
+            upper_hue: int,
+            color_model: str = 'hsv',
+            use_lut: bool = False
+    ) -> np.ndarray:
         """
         Apply a hue mask to the image
         Args:
             image: The input image to apply the hue mask
-            lower_hue: The lower hue value
-            upper_hue: The upper hue value
+            lower_hue: The lower hue value, 0-179 for 'hsv' and 0-255 for 'hsi'
+            upper_hue: The upper hue value, 0-179 for 'hsv' and 0-255 for 'hsi'
+            color_model: 'hsv' for OpenCV's HSV or 'hsi' for the arccos-based HSI
+            use_lut: Whether to use the lookup table for the HSI conversion
         Returns:
             The image with the hue mask applied
         """
-        image_array = np.array(image)
+        image_array = to_array(image)
 
         # Convert the image to HSI
-        hsi_image = cv2.cvtColor(image_array, cv2.COLOR_RGB2HSV)
+        hsi_image = convert_from_rgb(image_array, color_model, use_lut)
 
         # Split H, S, and V channels
         h, s, v = cv2.split(hsi_image)
@@ -209,23 +260,31 @@ class ImageProcessorCore3:
         # Apply the mask to the original image to show only the selected hue range
         result = cv2.bitwise_and(image_array, image_array, mask=hue_mask)
 
-        return Image.fromarray(result)
+        return result
 
     @staticmethod
-    def saturation_mask(image: Image.Image, lower_saturation: int, upper_saturation: int) -> Image.Image:
+    def saturation_mask(
+            image: np.ndarray,
+            lower_saturation: int,
+            upper_saturation: int,
+            color_model: str = 'hsv',
+            use_lut: bool = False
+    ) -> np.ndarray:
         """
         Apply a saturation mask to the image
         Args:
             image: The input image to apply the saturation mask
             lower_saturation: The lower saturation value
             upper_saturation: The upper saturation value
+            color_model: 'hsv' for OpenCV's HSV or 'hsi' for the arccos-based HSI
+            use_lut: Whether to use the lookup table for the HSI conversion
         Returns:
             The image with the saturation mask applied
         """
-        image_array = np.array(image)
+        image_array = to_array(image)
 
         # Convert the image to HSI
-        hsi_image = cv2.cvtColor(image_array, cv2.COLOR_RGB2HSV)
+        hsi_image = convert_from_rgb(image_array, color_model, use_lut)
 
         # Split H, S, and V channels
         h, s, v = cv2.split(hsi_image)
@@ -236,4 +295,4 @@ class ImageProcessorCore3:
         # Apply the mask to the original image to show only the selected saturation range
         result = cv2.bitwise_and(image_array, image_array, mask=saturation_mask)
 
-        return Image.fromarray(result)
\ No newline at end of file
+        return result
\ No newline at end of file
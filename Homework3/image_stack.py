@@ -0,0 +1,101 @@
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+
+class ImageStack:
+    """
+    N images of the same shape and type held in one contiguous (N, H, W[, C]) array, so an operation runs over
+    the whole set in one call instead of once per image
+    """
+
+    def __init__(self, images: Sequence[np.ndarray]):
+        """
+        Args:
+            images: The images, all with the same shape and dtype
+        """
+        if not ImageStack.can_stack(images):
+            raise ValueError("The images of a stack must have the same shape and dtype")
+        self.array = np.stack(images)
+
+    @staticmethod
+    def can_stack(images: Sequence[Optional[np.ndarray]]) -> bool:
+        """
+        Check whether images can be stacked
+        Args:
+            images: The images
+        Returns:
+            Whether there is at least one image and they all have the same shape and dtype
+        """
+        if not images or any(image is None for image in images):
+            return False
+        first = images[0]
+        return all(image.shape == first.shape and image.dtype == first.dtype for image in images)
+
+    @classmethod
+    def from_array(cls, array: np.ndarray) -> 'ImageStack':
+        """
+        Wrap an array whose first axis indexes the images, without copying it
+        Args:
+            array: The (N, H, W[, C]) array
+        Returns:
+            The stack
+        """
+        stack = cls.__new__(cls)
+        stack.array = array
+        return stack
+
+    def __len__(self) -> int:
+        return self.array.shape[0]
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        return self.array[index]
+
+    def images(self) -> List[np.ndarray]:
+        """
+        Get the images as views into the stack
+        Returns:
+            The images
+        """
+        return list(self.array)
+
+    def map_pixels(self, function: Callable[[np.ndarray], np.ndarray]) -> 'ImageStack':
+        """
+        Apply an operation that works on each pixel on its own (LUTs, color conversions, channel splits) to the
+        whole stack in one call, by handing it the stack as a single image with the images on top of each other
+        Args:
+            function: The operation on one image
+        Returns:
+            The stack of the results
+        """
+        count, height = self.array.shape[:2]
+        rows = self.array.reshape((count * height,) + self.array.shape[2:])
+        result = function(rows)
+        return ImageStack.from_array(result.reshape((count, height) + result.shape[1:]))
+
+    @staticmethod
+    def variants(image: np.ndarray, luts: np.ndarray) -> 'ImageStack':
+        """
+        Map one image through several LUTs in one gather, e.g. to compare the variants of a parameter
+        Args:
+            image: The 8-bit image
+            luts: The (N, 256) LUTs
+        Returns:
+            The stack of the N variants
+        """
+        luts = np.asarray(luts)
+        return ImageStack.from_array(luts[:, image])
+
+    def fft_magnitude(self) -> 'ImageStack':
+        """
+        The log magnitude spectra of ImageProcessorCore2.apply_fft, computed for the whole stack in one batched
+        FFT and scaled to 0-255 per image
+        Returns:
+            The stack of the spectra
+        """
+        # The same axes as apply_fft on each image, shifted on every axis but the one of the images
+        image_axes = tuple(range(1, self.array.ndim))
+        spectrum = np.fft.fftshift(np.fft.fft2(self.array), axes=image_axes)
+        magnitude = np.log(np.abs(spectrum) + 1)
+        maximum = magnitude.max(axis=image_axes, keepdims=True)
+        return ImageStack.from_array((magnitude / maximum * 255).astype(np.uint8))
@@ -0,0 +1,216 @@
+import math
+import tkinter as tk
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import ImageTk
+
+from config import MAIN_THEME, VIEWER_SIZE, VIEWER_TILE_CACHE, VIEWER_TILE_SIZE
+from image_arrays import to_pil_image
+
+# The zoom limits relative to the zoom that fits the image, and the zoom step of one wheel notch
+MIN_ZOOM_RATIO = 0.25
+MAX_ZOOM = 32.0
+ZOOM_STEP = 1.25
+
+
+class ImagePyramid:
+    """
+    The image at halving resolutions, each level built on first use from the closest finer level
+    """
+
+    def __init__(self, image_array: np.ndarray, tile_size: int = VIEWER_TILE_SIZE):
+        """
+        Args:
+            image_array: The full resolution image
+            tile_size: The coarsest level is the first one that fits in a tile
+        """
+        height, width = image_array.shape[:2]
+        self.max_level = max(0, math.ceil(math.log2(max(height, width) / tile_size)))
+        self._levels: Dict[int, np.ndarray] = {0: image_array}
+
+    def level(self, index: int) -> np.ndarray:
+        """
+        Get a level of the pyramid
+        Args:
+            index: The level, 0 for the full resolution, each level halves the previous one
+        Returns:
+            The image at the level
+        """
+        index = min(max(index, 0), self.max_level)
+        if index not in self._levels:
+            finer = max(level for level in self._levels if level < index)
+            source = self._levels[finer]
+            factor = 2 ** (index - finer)
+            size = (max(1, math.ceil(source.shape[1] / factor)), max(1, math.ceil(source.shape[0] / factor)))
+            self._levels[index] = cv2.resize(source, size, interpolation=cv2.INTER_AREA)
+        return self._levels[index]
+
+
+class ImageViewer(tk.Canvas):
+    """
+    A zoomable and pannable view of an image. Only the tiles in view are rendered, from the pyramid level
+    closest to the zoom, so large images stay interactive. The wheel zooms around the cursor, dragging pans,
+    and a double click fits the image again.
+    """
+
+    def __init__(self, parent: tk.Widget, size: int = VIEWER_SIZE, **kwargs):
+        """
+        Args:
+            parent: The parent widget
+            size: The width and height of the view in pixels
+        """
+        super().__init__(parent, width=size, height=size, bg=MAIN_THEME, highlightthickness=0, **kwargs)
+        self.size = size
+        self.pyramid: Optional[ImagePyramid] = None
+        self.image_shape: Tuple[int, ...] = (0, 0)
+        self.zoom = 1.0
+        self.fit_zoom = 1.0
+        # The position of the top left corner of the view in full resolution pixels
+        self.offset_x = 0.0
+        self.offset_y = 0.0
+
+        self._tiles: 'OrderedDict[Tuple[int, int, int, int, float], Any]' = OrderedDict()
+        self._visible_tiles: List[Any] = []
+        self._drag_start: Optional[Tuple[int, int]] = None
+
+        self.bind("<ButtonPress-1>", self._start_drag)
+        self.bind("<B1-Motion>", self._drag)
+        self.bind("<Double-Button-1>", lambda event: self.fit())
+        self.bind("<MouseWheel>", lambda event: self._zoom_at(event.x, event.y, 1 if event.delta > 0 else -1))
+        self.bind("<Button-4>", lambda event: self._zoom_at(event.x, event.y, 1))
+        self.bind("<Button-5>", lambda event: self._zoom_at(event.x, event.y, -1))
+
+    def set_image(self, image_array: np.ndarray):
+        """
+        Show a new image fitted to the view
+        Args:
+            image_array: The image to show
+        """
+        self.pyramid = ImagePyramid(image_array)
+        self.image_shape = image_array.shape
+        self._tiles.clear()
+
+        # Fit the whole image, never enlarging it
+        height, width = image_array.shape[:2]
+        self.fit_zoom = min(1.0, self.size / width, self.size / height)
+        self.fit()
+
+    def fit(self):
+        """
+        Fit the whole image in the view and center it
+        """
+        if self.pyramid is None:
+            return
+        height, width = self.image_shape[:2]
+        self.zoom = self.fit_zoom
+        self.offset_x = (width - self.size / self.zoom) / 2
+        self.offset_y = (height - self.size / self.zoom) / 2
+        self.render()
+
+    def render(self):
+        """
+        Draw the tiles in view from the pyramid level closest to the zoom
+        """
+        self.delete("tile")
+        self._visible_tiles = []
+        if self.pyramid is None:
+            return
+
+        # The finest level that is not smaller than the view needs, and the zoom of that level onto the view
+        level_index = min(max(0, int(math.floor(math.log2(1 / self.zoom) + 1e-9))), self.pyramid.max_level)
+        level = self.pyramid.level(level_index)
+        factor = 2 ** level_index
+        scale = self.zoom * factor
+        level_height, level_width = level.shape[:2]
+        # Zoomed past the full resolution, the tiles cover fewer pixels so the rendered tiles keep their size
+        tile_size = max(1, int(VIEWER_TILE_SIZE / max(scale, 1.0)))
+
+        # The visible range in level pixels, and the pan offset in view pixels
+        left, top = self.offset_x / factor, self.offset_y / factor
+        right, bottom = left + self.size / scale, top + self.size / scale
+        view_x, view_y = round(self.offset_x * self.zoom), round(self.offset_y * self.zoom)
+
+        first_column = max(0, int(left // tile_size))
+        last_column = min((level_width - 1) // tile_size, int(right // tile_size))
+        first_row = max(0, int(top // tile_size))
+        last_row = min((level_height - 1) // tile_size, int(bottom // tile_size))
+        for row in range(first_row, last_row + 1):
+            for column in range(first_column, last_column + 1):
+                photo_image = self._tile(level, level_index, tile_size, row, column, scale)
+                x, y = round(column * tile_size * scale) - view_x, round(row * tile_size * scale) - view_y
+                self.create_image(x, y, image=photo_image, anchor="nw", tags="tile")
+                self._visible_tiles.append(photo_image)
+
+    def _tile(self, level: np.ndarray, level_index: int, tile_size: int, row: int, column: int, scale: float) -> Any:
+        """
+        Get the PhotoImage of a tile at the scale, rendering it on a cache miss
+        Args:
+            level: The pyramid level
+            level_index: The index of the level
+            tile_size: The size of the tiles in level pixels
+            row: The row of the tile
+            column: The column of the tile
+            scale: The zoom of the level onto the view
+        Returns:
+            The PhotoImage of the tile
+        """
+        key = (level_index, tile_size, row, column, round(scale, 6))
+        photo_image = self._tiles.get(key)
+        if photo_image is not None:
+            self._tiles.move_to_end(key)
+            return photo_image
+
+        # Size the tile from its rounded edges so neighbouring tiles meet without gaps
+        top, left = row * tile_size, column * tile_size
+        bottom, right = min(top + tile_size, level.shape[0]), min(left + tile_size, level.shape[1])
+        size = (
+            max(1, round(right * scale) - round(left * scale)),
+            max(1, round(bottom * scale) - round(top * scale))
+        )
+        tile = level[top:bottom, left:right]
+        if size != (tile.shape[1], tile.shape[0]):
+            # Show the pixels as blocks when zooming in past the full resolution
+            interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_NEAREST
+            tile = cv2.resize(tile, size, interpolation=interpolation)
+
+        photo_image = ImageTk.PhotoImage(to_pil_image(np.ascontiguousarray(tile)))
+        self._tiles[key] = photo_image
+        if len(self._tiles) > VIEWER_TILE_CACHE:
+            self._tiles.popitem(last=False)
+        return photo_image
+
+    def _start_drag(self, event: tk.Event):
+        """
+        Remember where the drag started
+        """
+        self._drag_start = (event.x, event.y)
+
+    def _drag(self, event: tk.Event):
+        """
+        Pan the view with the mouse
+        """
+        if self._drag_start is None or self.pyramid is None:
+            return
+        self.offset_x -= (event.x - self._drag_start[0]) / self.zoom
+        self.offset_y -= (event.y - self._drag_start[1]) / self.zoom
+        self._drag_start = (event.x, event.y)
+        self.render()
+
+    def _zoom_at(self, x: int, y: int, steps: int):
+        """
+        Zoom keeping the image point under the cursor in place
+        Args:
+            x: The x position of the cursor in the view
+            y: The y position of the cursor in the view
+            steps: The number of zoom steps, negative to zoom out
+        """
+        if self.pyramid is None:
+            return
+        zoom = min(max(self.zoom * ZOOM_STEP ** steps, self.fit_zoom * MIN_ZOOM_RATIO), MAX_ZOOM)
+        self.offset_x += x / self.zoom - x / zoom
+        self.offset_y += y / self.zoom - y / zoom
+        self.zoom = zoom
+        self.render()
@@ -0,0 +1,161 @@
+import csv
+import json
+import os
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+
+class OperationProfiler:
+    """
+    Record the wall time, CPU time and peak allocated memory of the image operations
+    """
+
+    CSV_FIELDS = ["timestamp", "name", "depth", "wall_ms", "cpu_ms", "peak_bytes"]
+    MAX_RECORDS = 1000
+
+    def __init__(
+            self,
+            log_path: Optional[str] = None,
+            trace_memory: bool = False,
+            on_record: Optional[Callable[[Dict[str, Any], List[Dict[str, Any]]], None]] = None
+    ):
+        """
+        Args:
+            log_path: The CSV or JSONL file to append the records to, or None to disable logging
+            trace_memory: Whether to track the peak allocated bytes with tracemalloc
+            on_record: Called with a top-level record and its nested stage records when it finishes
+        """
+        self.log_path = log_path
+        self.trace_memory = trace_memory
+        self.on_record = on_record
+        self.records: Deque[Dict[str, Any]] = deque(maxlen=self.MAX_RECORDS)
+        self._stack: List[Dict[str, Any]] = []
+        self._children: List[Dict[str, Any]] = []
+
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def measure(self, name: str):
+        """
+        Measure the block as one record, nested blocks are recorded as stages of the outer one
+        Args:
+            name: The name of the operation or stage
+        """
+        frame = {"name": name, "start_bytes": 0, "peak_seen": 0}
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            # Keep the peak of the outer block before resetting it for this block
+            if self._stack:
+                self._stack[-1]["peak_seen"] = max(self._stack[-1]["peak_seen"], peak)
+            tracemalloc.reset_peak()
+            frame["start_bytes"] = current
+        self._stack.append(frame)
+
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start_wall
+            cpu = time.process_time() - start_cpu
+            self._stack.pop()
+
+            peak_bytes = 0
+            if self.trace_memory:
+                peak = max(frame["peak_seen"], tracemalloc.get_traced_memory()[1])
+                peak_bytes = max(0, peak - frame["start_bytes"])
+                if self._stack:
+                    self._stack[-1]["peak_seen"] = max(self._stack[-1]["peak_seen"], peak)
+
+            self._finish({
+                "timestamp": time.time(),
+                "name": name,
+                "depth": len(self._stack),
+                "wall_ms": round(wall * 1000, 3),
+                "cpu_ms": round(cpu * 1000, 3),
+                "peak_bytes": peak_bytes,
+            })
+
+    def wrap(self, function: Callable, name: str) -> Callable:
+        """
+        Wrap a function so that every call is measured
+        Args:
+            function: The function to wrap
+            name: The name to record the calls under
+        Returns:
+            The wrapped function
+        """
+        def wrapper(*args, **kwargs):
+            with self.measure(name):
+                return function(*args, **kwargs)
+
+        wrapper.__name__ = getattr(function, "__name__", name)
+        wrapper.__doc__ = getattr(function, "__doc__", None)
+        return wrapper
+
+    def instrument(self, operations: Any):
+        """
+        Replace every public method of the operations object with a measured one
+        Args:
+            operations: The ImageOperations instance to instrument
+        """
+        for attribute in dir(operations):
+            if attribute.startswith("_"):
+                continue
+            method = getattr(operations, attribute)
+            if callable(method):
+                setattr(operations, attribute, self.wrap(method, attribute))
+
+    @staticmethod
+    def format_record(record: Dict[str, Any], stages: List[Dict[str, Any]]) -> str:
+        """
+        Format a record and its stages as a single status line
+        Args:
+            record: The top-level record
+            stages: The nested stage records
+        Returns:
+            The status line
+        """
+        text = f"{record['name']}: {record['wall_ms']:.1f} ms wall, {record['cpu_ms']:.1f} ms CPU"
+        if record["peak_bytes"]:
+            text += f", {record['peak_bytes'] / 2 ** 20:.1f} MiB peak"
+        if stages:
+            text += " (" + ", ".join(f"{stage['name']} {stage['wall_ms']:.1f} ms" for stage in stages) + ")"
+        return text
+
+    def _finish(self, record: Dict[str, Any]):
+        """
+        Store, log and report a finished record
+        """
+        self.records.append(record)
+        self._write_log(record)
+
+        if record["depth"] > 0:
+            self._children.append(record)
+            return
+
+        stages, self._children = self._children, []
+        if self.on_record is not None:
+            self.on_record(record, stages)
+
+    def _write_log(self, record: Dict[str, Any]):
+        """
+        Append the record to the log file, the format follows the file extension
+        """
+        if not self.log_path:
+            return
+
+        if self.log_path.lower().endswith(".csv"):
+            write_header = not os.path.exists(self.log_path)
+            with open(self.log_path, "a", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=self.CSV_FIELDS)
+                if write_header:
+                    writer.writeheader()
+                writer.writerow(record)
+        else:
+            with open(self.log_path, "a") as f:
+                f.write(json.dumps(record) + "\n")
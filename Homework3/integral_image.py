@@ -0,0 +1,116 @@
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+# The smallest border kept around the table, enough for kernels up to 51x51 without a rebuild
+MIN_PADDING = 25
+
+# The integral images of the recently filtered images
+_cache: List['IntegralImage'] = []
+_CACHE_ENTRIES = 2
+
+
+class IntegralImage:
+    """
+    The summed-area table of an image, padded by reflection like cv2.blur's default border, so a box
+    sum of any size is four lookups per pixel
+    """
+
+    def __init__(self, image_array: np.ndarray, padding: int):
+        """
+        Args:
+            image_array: The image to sum
+            padding: The border added around the image, the largest kernel radius the table serves
+        """
+        self.source = image_array
+        self.padding = padding
+        self._padded = cv2.copyMakeBorder(image_array, padding, padding, padding, padding, cv2.BORDER_REFLECT_101)
+
+        # 32-bit sums are enough for 8-bit images while the sum of the whole padded image fits, cv2.integral
+        # only takes them for 8-bit images
+        area = self._padded.shape[0] * self._padded.shape[1]
+        uint8 = image_array.dtype == np.uint8
+        self._depth = cv2.CV_32S if uint8 and np.iinfo(np.uint8).max * area < 2 ** 31 else cv2.CV_64F
+        self.table = cv2.integral(self._padded, sdepth=self._depth)
+        self._squared_table: Optional[np.ndarray] = None
+
+    def box_sum(self, kernel_size: int, squared: bool = False) -> np.ndarray:
+        """
+        Get the sum over the kernel window around each pixel
+        Args:
+            kernel_size: The odd size of the square window
+            squared: Whether to sum the squared pixel values instead
+        Returns:
+            The float64 window sums
+        """
+        radius = kernel_size // 2
+        assert kernel_size % 2 == 1, "Kernel size must be odd"
+        assert radius <= self.padding, "Kernel is larger than the padding of the table"
+
+        if squared and self._squared_table is None:
+            _, self._squared_table = cv2.integral2(self._padded, sdepth=self._depth, sqdepth=cv2.CV_64F)
+        table = self._squared_table if squared else self.table
+
+        # Gather the four corners of every window from the shared table
+        height, width = self.source.shape[:2]
+        top = left = self.padding - radius
+        bottom, right = top + kernel_size, left + kernel_size
+        window_sum = table[bottom:bottom + height, right:right + width].astype(np.float64)
+        window_sum -= table[top:top + height, right:right + width]
+        window_sum -= table[bottom:bottom + height, left:left + width]
+        window_sum += table[top:top + height, left:left + width]
+        return window_sum
+
+    def box_mean(self, kernel_size: int) -> np.ndarray:
+        """
+        Get the mean over the kernel window around each pixel
+        Args:
+            kernel_size: The odd size of the square window
+        Returns:
+            The mean image with the dtype of the source
+        """
+        mean = self.box_sum(kernel_size)
+        mean /= kernel_size ** 2
+        # Integer images round like cv2.blur, float images keep the fraction
+        if np.issubdtype(self.source.dtype, np.integer):
+            np.rint(mean, out=mean)
+        return mean.astype(self.source.dtype)
+
+    def local_variance(self, kernel_size: int) -> np.ndarray:
+        """
+        Get the variance over the kernel window around each pixel
+        Args:
+            kernel_size: The odd size of the square window
+        Returns:
+            The float64 variance
+        """
+        area = kernel_size ** 2
+        mean = self.box_sum(kernel_size) / area
+        variance = self.box_sum(kernel_size, squared=True) / area
+        variance -= mean ** 2
+        return np.maximum(variance, 0, out=variance)
+
+
+def integral_image(image_array: np.ndarray, kernel_size: int) -> IntegralImage:
+    """
+    Get the integral image of an image, reusing the cached table while it is large enough for the kernel
+    Args:
+        image_array: The image
+        kernel_size: The odd size of the kernel that will be queried
+    Returns:
+        The integral image
+    """
+    radius = kernel_size // 2
+    for index, entry in enumerate(_cache):
+        if entry.source is image_array:
+            if entry.padding >= radius:
+                return entry
+            del _cache[index]
+            break
+
+    entry = IntegralImage(image_array, max(radius, MIN_PADDING))
+    _cache.append(entry)
+    if len(_cache) > _CACHE_ENTRIES:
+        _cache.pop(0)
+    return entry
@@ -0,0 +1,166 @@
+import weakref
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+import numpy as np
+
+from result_cache import CACHED_OPERATIONS
+
+_PLAIN_TYPES = (bool, int, float, str, type(None))
+
+
+class OperationMemo:
+    """
+    Keep the latest results of the core operations in memory, keyed by the versions of their input images and
+    their parameters, so switching back to a result seen a moment ago skips the computation. An image gets a
+    version when it is tracked, the app tracks every image it displays, and calls on untracked images always
+    run. The memo keeps its own read-only copy of each result and hands out copies of it.
+    """
+
+    def __init__(self, max_bytes: int):
+        """
+        Args:
+            max_bytes: The bytes of results kept, the least recently used results are dropped above it
+        """
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+        self._results: 'OrderedDict[Tuple[Hashable, ...], np.ndarray]' = OrderedDict()
+        # The versions of the tracked images by their id, the references drop an entry with its image
+        self._versions: Dict[int, Tuple[weakref.ref, int]] = {}
+        self._next_version = 0
+
+    def track(self, image_array: np.ndarray) -> int:
+        """
+        Give an image a version, an image keeps its version when it is tracked again, e.g. after an undo. A
+        tracked image must not be changed in place.
+        Args:
+            image_array: The image
+        Returns:
+            The version
+        """
+        entry = self._versions.get(id(image_array))
+        if entry is not None and entry[0]() is image_array:
+            return entry[1]
+
+        version = self._next_version
+        self._next_version += 1
+        reference = weakref.ref(image_array, lambda _, key=id(image_array): self._versions.pop(key, None))
+        self._versions[id(image_array)] = (reference, version)
+        return version
+
+    def key(self, operation: str, args: Iterable[Any], kwargs: Dict[str, Any]) -> Optional[Tuple[Hashable, ...]]:
+        """
+        Get the key of a call
+        Args:
+            operation: The name of the operation
+            args: The positional arguments
+            kwargs: The keyword arguments
+        Returns:
+            The key, or None when an argument can not be part of a key
+        """
+        try:
+            return operation, self._describe(tuple(args)), self._describe(tuple(sorted(kwargs.items())))
+        except TypeError:
+            return None
+
+    def wrap(self, function: Callable, operation: str) -> Callable:
+        """
+        Wrap an operation so that its array results are memoized
+        Args:
+            function: The operation
+            operation: The name of the operation in the keys
+        Returns:
+            The wrapped operation
+        """
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            key = self.key(operation, args, kwargs)
+            if key is None:
+                return function(*args, **kwargs)
+
+            result = self._results.get(key)
+            if result is not None:
+                self.hits += 1
+                self._results.move_to_end(key)
+                return result.copy()
+
+            self.misses += 1
+            result = function(*args, **kwargs)
+            if isinstance(result, np.ndarray) and result.nbytes <= self.max_bytes:
+                stored = result.copy()
+                stored.flags.writeable = False
+                self._results[key] = stored
+                self.bytes += stored.nbytes
+                while self.bytes > self.max_bytes:
+                    _, evicted = self._results.popitem(last=False)
+                    self.bytes -= evicted.nbytes
+            return result
+
+        wrapper.memoized = True
+        return wrapper
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        The share of the lookups that hit
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def statistics(self) -> Dict[str, float]:
+        """
+        Get the hit and miss counts and the memory held
+        Returns:
+            The hits, misses, hit rate, results and bytes
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+            'results': len(self._results),
+            'bytes': self.bytes,
+        }
+
+    def clear(self):
+        """
+        Drop every memoized result
+        """
+        self._results.clear()
+        self.bytes = 0
+
+    def _describe(self, value: Any) -> Hashable:
+        """
+        Turn an argument into a hashable part of a key
+        Args:
+            value: The argument
+        Returns:
+            The part of the key
+        """
+        if isinstance(value, np.ndarray):
+            entry = self._versions.get(id(value))
+            if entry is None or entry[0]() is not value:
+                raise TypeError("Can not memoize an untracked image")
+            return 'array', entry[1]
+        if isinstance(value, (list, tuple)):
+            return type(value).__name__, tuple(self._describe(item) for item in value)
+        if isinstance(value, _PLAIN_TYPES) or isinstance(value, np.generic):
+            return type(value).__name__, value
+        raise TypeError(f"Can not memoize an argument of type {type(value).__name__}")
+
+
+def install(memo: OperationMemo, operations: Dict[type, Iterable[str]] = None):
+    """
+    Put the memo in front of the core operations, on top of the result cache when it is installed
+    Args:
+        memo: The memo
+        operations: The method names of each core class, CACHED_OPERATIONS by default
+    """
+    for processor, names in (operations or CACHED_OPERATIONS).items():
+        for name in names:
+            function = processor.__dict__[name].__func__
+            if getattr(function, "memoized", False):
+                function = function.__wrapped__
+            setattr(processor, name, staticmethod(memo.wrap(function, f"{processor.__name__}.{name}")))
@@ -48,8 +48,15 @@ def _setup_contrast_brightness_frame(app: 'ImageProcessorApp', parent_frame: tk.
         width=10,
         command=app.operations.apply_brightness_algorithm,
     )
+    app.gamma_gallery_button = tk.Button(
+        menu_frame,
+        text="Gamma Gallery",
+        width=12,
+        command=app.operations.show_gamma_gallery,
+    )
     app.brightness_menu.pack(side=tk.LEFT, padx=5)
     app.brightness_apply_button.pack(side=tk.LEFT, padx=5)
+    app.gamma_gallery_button.pack(side=tk.LEFT, padx=5)
 
     # Alpha frame for adjusting
     alpha_frame = tk.Frame(parent_frame, bg=MAIN_THEME)
@@ -122,6 +129,26 @@ def _setup_resize_rotate_frame(app: 'ImageProcessorApp', parent_frame: tk.Frame)
     )
     app.rotate_button.pack(side=tk.LEFT, padx=5)
 
+    # Interpolation of resize and rotate, and whether rotate grows the canvas
+    geometry_frame = tk.Frame(parent_frame, bg=MAIN_THEME)
+    geometry_frame.pack(anchor="w", pady=5)
+    app.interpolation_menu = tk.OptionMenu(
+        geometry_frame,
+        app.interpolation,
+        "Nearest",
+        "Bilinear",
+        "Bicubic",
+    )
+    app.interpolation_menu.pack(side=tk.LEFT, padx=5)
+    app.expand_canvas_checkbox = tk.Checkbutton(
+        geometry_frame,
+        text="Expand Canvas",
+        variable=app.expand_canvas,
+        onvalue=True,
+        offvalue=False,
+    )
+    app.expand_canvas_checkbox.pack(side=tk.LEFT, padx=5)
+
 def _setup_gray_level_slicing_frame(app: 'ImageProcessorApp', parent_frame: tk.Frame):
     """
     Set up the frame for gray level slicing.
@@ -180,6 +207,19 @@ def _setup_gray_level_slicing_frame(app: 'ImageProcessorApp', parent_frame: tk.F
     )
     app.max_gray_input.pack(side=tk.LEFT, padx=5)
 
+    # Frame for the band list, which replaces the min and max levels when given
+    bands_frame = tk.Frame(parent_frame, bg=MAIN_THEME)
+    bands_frame.pack(anchor="w", pady=5)
+    bands_label = tk.Label(bands_frame, text="Bands (min-max:level, ...)", bg=MAIN_THEME, fg=MAIN_FONT_COLOR)
+    bands_label.pack(side=tk.LEFT, padx=5)
+    app.gray_bands_input = tk.Entry(
+        bands_frame,
+        textvariable=app.gray_bands,
+        width=20,
+    )
+    app.gray_bands_input.pack(side=tk.LEFT, padx=5)
+
+
 def _setup_histogram_equalization_frame(app: 'ImageProcessorApp', parent_frame: tk.Frame):
     """
     Set up the frame for histogram equalization.
@@ -239,6 +279,31 @@ def _setup_bit_plane_frame(app: 'ImageProcessorApp', parent_frame: tk.Frame):
         command=app.operations.display_bit_plane_image,
     )
     app.bit_plane_button.pack(side=tk.LEFT, padx=5)
+    app.bit_plane_gallery_button = tk.Button(
+        scale_frame,
+        text="All Planes",
+        width=10,
+        command=app.operations.show_bit_plane_gallery,
+    )
+    app.bit_plane_gallery_button.pack(side=tk.LEFT, padx=5)
+
+    # Reconstruction from a subset of the bit-planes
+    reconstruct_frame = tk.Frame(parent_frame, bg=MAIN_THEME)
+    reconstruct_frame.pack(anchor="w", pady=5)
+    app.bit_plane_subset_input = tk.Entry(
+        reconstruct_frame,
+        textvariable=app.bit_plane_subset,
+        width=10,
+    )
+    app.bit_plane_subset_input.pack(side=tk.LEFT, padx=5)
+    app.bit_plane_reconstruct_button = tk.Button(
+        reconstruct_frame,
+        text="Reconstruct",
+        width=10,
+        command=app.operations.reconstruct_bit_planes,
+    )
+    app.bit_plane_reconstruct_button.pack(side=tk.LEFT, padx=5)
+
 
 def _setup_smoothing_sharpening_frame(app: 'ImageProcessorApp', parent_frame: tk.Frame):
     """
@@ -269,6 +334,13 @@ def _setup_smoothing_sharpening_frame(app: 'ImageProcessorApp', parent_frame: tk
         command=app.operations.smooth_image,
     )
     app.smoothing_button.pack(side=tk.LEFT, padx=5)
+    app.smoothing_adjust_button = tk.Button(
+        smoothing_frame,
+        text="Adjust",
+        width=10,
+        command=app.operations.adjust_smoothing,
+    )
+    app.smoothing_adjust_button.pack(side=tk.LEFT, padx=5)
 
     # Sharpening label and input box
     sharpening_frame = tk.Frame(parent_frame, bg=MAIN_THEME)
@@ -286,3 +358,29 @@ def _setup_smoothing_sharpening_frame(app: 'ImageProcessorApp', parent_frame: tk
         command=app.operations.sharpen_image,
     )
     app.sharpening_button.pack(side=tk.LEFT, padx=5)
+
+    # Sharpening mode, also used by the sharpening masks of homework 3
+    mode_frame = tk.Frame(parent_frame, bg=MAIN_THEME)
+    mode_frame.pack(anchor="w", pady=5)
+    mode_label = tk.Label(mode_frame, text="Sharpening mode", bg=MAIN_THEME, fg=MAIN_FONT_COLOR)
+    mode_label.pack(side=tk.LEFT, padx=5)
+    app.sharpening_mode_menu = tk.OptionMenu(
+        mode_frame,
+        app.sharpening_mode,
+        "Laplacian",
+        "Fused",
+        "Unsharp",
+    )
+    app.sharpening_mode_menu.pack(side=tk.LEFT, padx=5)
+
+    # Band size for the chunked evaluation of brightness and sharpening, 0 processes the whole image
+    band_frame = tk.Frame(parent_frame, bg=MAIN_THEME)
+    band_frame.pack(anchor="w", pady=5)
+    app.band_rows_input = tk.Entry(
+        band_frame,
+        textvariable=app.band_rows,
+        width=10,
+    )
+    app.band_rows_input.pack(side=tk.LEFT, padx=5)
+    band_label = tk.Label(band_frame, text="Band rows (0 = off)", bg=MAIN_THEME, fg=MAIN_FONT_COLOR)
+    band_label.pack(side=tk.LEFT, padx=5)
@@ -18,6 +18,7 @@ def create_hw2_panel(app: 'ImageProcessorApp', container: tk.Frame):
     _setup_bar_test_buttons_frame(app, panel)
     _setup_lenna_buttons_frame(app, panel)
     _setup_dip_buttons_frame(app, panel)
+    _setup_frequency_filter_frame(app, panel)
     return panel
 
 
@@ -270,4 +271,86 @@ def _setup_dip_buttons_frame(app: 'ImageProcessorApp', parent_frame: tk.Frame):
         text="Multiply by (-1)^(x+y)",
         command=app.operations.multiply_by_neg_1_final
     )
+    round_trip_button = tk.Button(
+        button_frame_3,
+        text="All Steps at Once",
+        command=app.operations.centered_round_trip
+    )
     step_5_button.pack(side=tk.LEFT)
+    round_trip_button.pack(side=tk.LEFT, padx=10)
+
+
+def _setup_frequency_filter_frame(app: 'ImageProcessorApp', parent_frame: tk.Frame):
+    """
+    Set up the frame for the ideal, Butterworth and Gaussian frequency domain filters
+    """
+    # Create labels for the frequency filters
+    filter_text = tk.Label(
+        parent_frame,
+        text="Frequency Domain Filters",
+        bg=MAIN_THEME,
+        fg=MAIN_FONT_COLOR,
+    )
+    filter_text.pack(anchor="w", pady=5)
+
+    # Menus for selecting the filter
+    menu_frame = tk.Frame(parent_frame, bg=MAIN_THEME)
+    menu_frame.pack(anchor="w", pady=5)
+    app.filter_type_menu = tk.OptionMenu(
+        menu_frame,
+        app.filter_type,
+        "Ideal",
+        "Butterworth",
+        "Gaussian",
+    )
+    app.filter_pass_menu = tk.OptionMenu(
+        menu_frame,
+        app.filter_pass,
+        "Low-pass",
+        "High-pass",
+        "Band-reject",
+    )
+    app.filter_apply_button = tk.Button(
+        menu_frame,
+        text="Apply",
+        width=10,
+        command=app.operations.apply_frequency_filter,
+    )
+    app.filter_type_menu.pack(side=tk.LEFT, padx=5)
+    app.filter_pass_menu.pack(side=tk.LEFT, padx=5)
+    app.filter_apply_button.pack(side=tk.LEFT, padx=5)
+
+    # Sliding the cutoff applies the filter again to the same images
+    cutoff_frame = tk.Frame(parent_frame, bg=MAIN_THEME)
+    cutoff_frame.pack(anchor="w", pady=5)
+    cutoff_label = tk.Label(cutoff_frame, text="Cutoff", bg=MAIN_THEME, fg=MAIN_FONT_COLOR)
+    cutoff_label.pack(side=tk.LEFT, padx=5)
+    app.filter_cutoff_scale = tk.Scale(
+        cutoff_frame,
+        from_=1,
+        to=256,
+        orient=tk.HORIZONTAL,
+        variable=app.filter_cutoff,
+        command=lambda _: app.operations.apply_frequency_filter(),
+    )
+    app.filter_cutoff_scale.pack(side=tk.LEFT, padx=5)
+
+    # Order of the Butterworth filter and width of the rejected band
+    parameter_frame = tk.Frame(parent_frame, bg=MAIN_THEME)
+    parameter_frame.pack(anchor="w", pady=5)
+    order_label = tk.Label(parameter_frame, text="Order", bg=MAIN_THEME, fg=MAIN_FONT_COLOR)
+    order_label.pack(side=tk.LEFT, padx=5)
+    app.filter_order_input = tk.Entry(
+        parameter_frame,
+        textvariable=app.filter_order,
+        width=5,
+    )
+    app.filter_order_input.pack(side=tk.LEFT, padx=5)
+    band_width_label = tk.Label(parameter_frame, text="Band width", bg=MAIN_THEME, fg=MAIN_FONT_COLOR)
+    band_width_label.pack(side=tk.LEFT, padx=5)
+    app.filter_band_width_input = tk.Entry(
+        parameter_frame,
+        textvariable=app.filter_band_width,
+        width=5,
+    )
+    app.filter_band_width_input.pack(side=tk.LEFT, padx=5)
@@ -110,6 +110,27 @@ def _setup_hsi_buttons_frame(app: 'ImageProcessorApp', parent_frame: tk.Frame):
     app.saturation_button.pack(side=tk.LEFT, padx=10)
     app.intensity_button.pack(side=tk.LEFT)
 
+    # Color model used by the HSI operations, the masks and the histogram
+    model_frame = tk.Frame(parent_frame, bg=MAIN_THEME)
+    model_frame.pack(anchor="w", pady=5)
+    model_label = tk.Label(model_frame, text="Color model", bg=MAIN_THEME, fg=MAIN_FONT_COLOR)
+    model_label.pack(side=tk.LEFT, padx=5)
+    app.color_model_menu = tk.OptionMenu(
+        model_frame,
+        app.color_model,
+        "HSV",
+        "HSI",
+    )
+    app.color_model_menu.pack(side=tk.LEFT, padx=5)
+    app.hsi_lookup_checkbox = tk.Checkbutton(
+        model_frame,
+        text="HSI LUT",
+        variable=app.hsi_lookup,
+        onvalue=True,
+        offvalue=False,
+    )
+    app.hsi_lookup_checkbox.pack(side=tk.LEFT, padx=5)
+
 
 """
 Do color complements to enhance the detail in the image by
@@ -151,6 +172,26 @@ def _setup_complement_histogram_equalization_frame(app: 'ImageProcessorApp', par
     app.complement_button.pack(side=tk.LEFT)
     app.histogram_button.pack(side=tk.LEFT, padx=10)
 
+    # Equalization mode and the clip limit of CLAHE
+    mode_frame = tk.Frame(parent_frame, bg=MAIN_THEME)
+    mode_frame.pack(anchor="w", pady=5)
+    app.equalization_mode_menu = tk.OptionMenu(
+        mode_frame,
+        app.equalization_mode,
+        "RGB",
+        "Intensity",
+        "CLAHE",
+    )
+    app.equalization_mode_menu.pack(side=tk.LEFT, padx=5)
+    clip_limit_label = tk.Label(mode_frame, text="Clip limit", bg=MAIN_THEME, fg=MAIN_FONT_COLOR)
+    clip_limit_label.pack(side=tk.LEFT, padx=5)
+    app.clahe_clip_limit_input = tk.Entry(
+        mode_frame,
+        textvariable=app.clahe_clip_limit,
+        width=10,
+    )
+    app.clahe_clip_limit_input.pack(side=tk.LEFT, padx=5)
+
 
 """
 Please do image smoothing with a 5x5 average kernel and
@@ -204,6 +245,23 @@ def _setup_smoothing_sharpening_frame(app: 'ImageProcessorApp', parent_frame: tk
     )
     app.rgb_image_sharpening_button_hsi_model.pack(side=tk.LEFT)
 
+    # Average of any size from the integral image
+    box_frame = tk.Frame(parent_frame, bg=MAIN_THEME)
+    box_frame.pack(anchor="w", pady=5)
+    app.average_kernel_size_input = tk.Entry(
+        box_frame,
+        textvariable=app.average_kernel_size,
+        width=10,
+    )
+    app.average_kernel_size_input.pack(side=tk.LEFT, padx=5)
+    app.box_average_button = tk.Button(
+        box_frame,
+        text="Box Average",
+        width=10,
+        command=app.operations.apply_box_average,
+    )
+    app.box_average_button.pack(side=tk.LEFT, padx=5)
+
 
 """
 Find some proper masks of saturation and hue component
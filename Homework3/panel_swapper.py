@@ -14,6 +14,7 @@ class PanelSwapper:
         self.app = app
         self.container = container
         self.panels = {}
+        self.current_panel = None
 
         # Create swap buttons
         button_frame = tk.Frame(container, bg=MAIN_THEME)
@@ -34,3 +35,8 @@ class PanelSwapper:
         for panel in self.panels.values():
             panel.pack_forget()
         self.panels[panel_name].pack(fill=tk.BOTH, expand=True)
+
+        # Leaving HW2 leaves the step-wise DFT workflow, so its buffers are released
+        if self.current_panel == "HW2" and panel_name != "HW2":
+            self.app.release_frequency_workspace()
+        self.current_panel = panel_name
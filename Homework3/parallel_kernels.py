@@ -0,0 +1,188 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from config import PARALLEL_BANDS_PER_WORKER, PARALLEL_MIN_ROWS, PARALLEL_WORKERS
+
+# The name, shape and dtype of an array in shared memory, all a worker needs to attach to it
+ArraySpec = Tuple[str, Tuple[int, ...], str]
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def convolve_band(padded: np.ndarray, mask: np.ndarray, output: np.ndarray, start: int, stop: int):
+    """
+    Convolve the rows start to stop of the image, pixel by pixel like ImageProcessorCore2.convolution
+    Args:
+        padded: The zero-padded image, its rows around the band are the halo
+        mask: The mask
+        output: The uint8 output image, only the rows of the band are written
+        start: The first row of the band
+        stop: The row after the last one
+    """
+    mask_height, mask_width = mask.shape
+    for i in range(start, stop):
+        for j in range(output.shape[1]):
+            # The region mask is the region of the image that the mask will be applied to
+            region_mask = padded[i:i + mask_height, j:j + mask_width]
+            output[i, j] = np.clip(np.float32(np.sum(region_mask * mask)), 0, 255)
+
+
+def median_band(image: np.ndarray, kernel_size: int, output: np.ndarray, start: int, stop: int):
+    """
+    Median filter the rows start to stop of the image, pixel by pixel like the manual median of
+    ImageProcessorCore2.apply_median_mask
+    Args:
+        image: The image, its rows around the band are the halo
+        kernel_size: The size of the kernel
+        output: The output image, only the rows of the band are written
+        start: The first row of the band
+        stop: The row after the last one
+    """
+    padding = kernel_size // 2
+    for i in range(start, stop):
+        for j in range(padding, image.shape[1] - padding):
+            region = image[i - padding:i + padding + 1, j - padding:j + padding + 1]
+            output[i, j] = np.median(region)
+
+
+_KERNELS = {
+    'convolve': convolve_band,
+    'median': median_band,
+}
+
+
+def _run_band(kernel: str, source: ArraySpec, output: ArraySpec, argument, start: int, stop: int):
+    """
+    Run a kernel on a band in a worker process, reading and writing the shared arrays in place
+    """
+    source_memory = shared_memory.SharedMemory(name=source[0])
+    output_memory = shared_memory.SharedMemory(name=output[0])
+    try:
+        source_array = np.ndarray(source[1], dtype=source[2], buffer=source_memory.buf)
+        output_array = np.ndarray(output[1], dtype=output[2], buffer=output_memory.buf)
+        _KERNELS[kernel](source_array, argument, output_array, start, stop)
+        # The views must go before the memory is closed
+        del source_array, output_array
+    finally:
+        source_memory.close()
+        output_memory.close()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """
+    Get the worker pool, started on first use. The workers are spawned, so they do not inherit the Tk state.
+    """
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=PARALLEL_WORKERS or os.cpu_count(),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def _bands(start: int, stop: int, count: int) -> List[Tuple[int, int]]:
+    """
+    Split a range of rows into at most count bands of nearly equal size
+    """
+    edges = np.linspace(start, stop, min(count, max(1, stop - start)) + 1).round().astype(int)
+    return [(int(low), int(high)) for low, high in zip(edges[:-1], edges[1:]) if high > low]
+
+
+def run_bands(
+        kernel: str,
+        source: np.ndarray,
+        argument,
+        output: np.ndarray,
+        rows: Tuple[int, int]
+) -> np.ndarray:
+    """
+    Run a kernel over row bands of an image on the worker pool. The source and output are copied into shared
+    memory once, the workers get their names and write their bands straight into the output, so no pixel data
+    is pickled. Small images run in this process.
+    Args:
+        kernel: The name of the kernel
+        source: The image the kernel reads, with the rows around each band as its halo
+        argument: The mask or kernel size
+        output: The initial output, its rows outside the bands are kept
+        rows: The range of output rows to compute
+    Returns:
+        The output
+    """
+    workers = PARALLEL_WORKERS or os.cpu_count() or 1
+    if workers <= 1 or rows[1] - rows[0] < PARALLEL_MIN_ROWS:
+        _KERNELS[kernel](source, argument, output, *rows)
+        return output
+
+    memories = []
+    try:
+        specs = []
+        for array in (source, output):
+            memory = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+            memories.append(memory)
+            np.ndarray(array.shape, dtype=array.dtype, buffer=memory.buf)[...] = array
+            specs.append((memory.name, array.shape, array.dtype.str))
+
+        pool = _get_pool()
+        futures = [
+            pool.submit(_run_band, kernel, specs[0], specs[1], argument, start, stop)
+            for start, stop in _bands(rows[0], rows[1], workers * PARALLEL_BANDS_PER_WORKER)
+        ]
+        for future in futures:
+            future.result()
+
+        return np.ndarray(output.shape, dtype=output.dtype, buffer=memories[1].buf).copy()
+    finally:
+        for memory in memories:
+            memory.close()
+            memory.unlink()
+
+
+def convolve(image_array: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """
+    Convolve a grayscale image with a mask, zero padded, in parallel row bands
+    Args:
+        image_array: The image
+        mask: The mask, with odd dimensions
+    Returns:
+        The convolved uint8 image
+    """
+    padding_height, padding_width = mask.shape[0] // 2, mask.shape[1] // 2
+    padded = np.pad(
+        image_array,
+        ((padding_height, padding_height), (padding_width, padding_width)),
+        mode='constant',
+        constant_values=0
+    )
+    output = np.zeros(image_array.shape[:2], dtype=np.uint8)
+    return run_bands('convolve', padded, np.asarray(mask), output, (0, image_array.shape[0]))
+
+
+def median(image_array: np.ndarray, kernel_size: int) -> np.ndarray:
+    """
+    Median filter an image in parallel row bands, the border the kernel does not fit in stays black
+    Args:
+        image_array: The image
+        kernel_size: The odd size of the kernel
+    Returns:
+        The filtered image
+    """
+    padding = kernel_size // 2
+    output = np.zeros_like(image_array)
+    rows = (padding, max(padding, image_array.shape[0] - padding))
+    return run_bands('median', image_array, kernel_size, output, rows)
+
+
+def shutdown():
+    """
+    Stop the worker pool
+    """
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
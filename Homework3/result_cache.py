@@ -0,0 +1,290 @@
+import glob
+import hashlib
+import inspect
+import os
+import tempfile
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import numpy as np
+
+from image_processor_core_hw1 import ImageProcessorCore
+from image_processor_core_hw2 import ImageProcessorCore2
+from image_processor_core_hw3 import ImageProcessorCore3
+
+# The core operations whose result only depends on their arguments. The steps of the DFT workflow work in place
+# and adjust_brightness reports errors in a dialog, so they are not part of it.
+PURE_OPERATIONS = {
+    ImageProcessorCore: (
+        'resize_image', 'rotate_image', 'multi_band_slicing', 'bit_plane_image', 'reconstruct_bit_planes',
+        'smooth_image', 'sharpen_image',
+    ),
+    ImageProcessorCore2: (
+        'convolution', 'apply_median_mask', 'apply_laplacian_mask', 'apply_fft', 'inverse_fft_magnitude_only',
+        'inverse_fft_phase_only', 'apply_frequency_filter',
+    ),
+    ImageProcessorCore3: (
+        'rgb_image', 'hsi_image', 'complement_image', 'histogram_equalization', 'apply_average_mask',
+        'apply_sharpening_mask', 'hue_mask', 'saturation_mask',
+    ),
+}
+
+# The pixelwise operations (LUTs, channel splits and color conversions) run faster than their input is hashed
+_PIXELWISE_OPERATIONS = {
+    'multi_band_slicing', 'bit_plane_image', 'reconstruct_bit_planes', 'rgb_image', 'hsi_image', 'complement_image',
+    'hue_mask', 'saturation_mask',
+}
+
+# The pure operations worth caching
+CACHED_OPERATIONS = {
+    processor: tuple(name for name in names if name not in _PIXELWISE_OPERATIONS)
+    for processor, names in PURE_OPERATIONS.items()
+}
+
+# The parameter types that have a stable text form for the cache key
+_PLAIN_TYPES = (bool, int, float, str, type(None))
+
+
+def code_version(directory: str) -> str:
+    """
+    Hash the sources of the program, so any change to the code invalidates the cached results
+    Args:
+        directory: The folder of the sources
+    Returns:
+        The hex digest of the sources
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    for path in sorted(glob.glob(os.path.join(directory, "*.py"))):
+        with open(path, "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+def _describe(value: Any, digest: 'hashlib.blake2b') -> bool:
+    """
+    Add an argument to the hash of a call
+    Args:
+        value: The argument
+        digest: The hash of the call
+    Returns:
+        Whether the argument can be part of a cache key
+    """
+    if isinstance(value, np.ndarray):
+        digest.update(f"array{value.shape}{value.dtype.str}".encode())
+        digest.update(np.ascontiguousarray(value).data)
+        return True
+    if isinstance(value, (list, tuple)):
+        digest.update(f"{type(value).__name__}{len(value)}".encode())
+        return all(_describe(item, digest) for item in value)
+    if isinstance(value, _PLAIN_TYPES) or isinstance(value, np.generic):
+        digest.update(f"{type(value).__name__}:{value!r};".encode())
+        return True
+    return False
+
+
+class ResultCache:
+    """
+    A persistent cache of operation results in a folder, one .npy file per result. The files are named by the
+    hash of the input contents, the operation, its parameters and the code version. Files are written to a
+    temporary name and renamed, so processes sharing the folder never read a partial result, and the least
+    recently used files are removed once the folder exceeds its size.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, min_seconds: float = 0.0, version: str = ""):
+        """
+        Args:
+            directory: The folder of the cached results, ~ is expanded to the home folder
+            max_bytes: The size of the folder above which the least recently used results are removed
+            min_seconds: Results computed faster than this are not stored, they are cheaper to compute again
+            version: The code version, part of every key
+        """
+        self.directory = os.path.expanduser(directory)
+        self.max_bytes = max_bytes
+        self.min_seconds = min_seconds
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        os.makedirs(self.directory, exist_ok=True)
+        self._bytes = self._scan_bytes()
+
+    def key(self, operation: str, args: Iterable[Any], kwargs: Dict[str, Any]) -> Optional[str]:
+        """
+        Get the key of a call
+        Args:
+            operation: The name of the operation
+            args: The positional arguments
+            kwargs: The keyword arguments
+        Returns:
+            The hex key, or None when an argument can not be hashed
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"{self.version}:{operation}:".encode())
+        if not _describe(tuple(args), digest):
+            return None
+        if not _describe(tuple(sorted(kwargs.items())), digest):
+            return None
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """
+        Read a cached result, marking it as recently used
+        Args:
+            key: The key of the call
+        Returns:
+            The result, or None on a miss
+        """
+        path = self._path(key)
+        try:
+            result = np.load(path, allow_pickle=False)
+            os.utime(path)
+        except (FileNotFoundError, ValueError, OSError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def put(self, key: str, result: np.ndarray):
+        """
+        Store a result atomically and evict the least recently used results above the size limit
+        Args:
+            key: The key of the call
+            result: The result array
+        """
+        handle, temporary_path = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        try:
+            with os.fdopen(handle, "wb") as file:
+                np.save(file, result, allow_pickle=False)
+            os.replace(temporary_path, self._path(key))
+        except OSError:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            return
+
+        self.writes += 1
+        self._bytes += os.path.getsize(self._path(key))
+        if self._bytes > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        """
+        Remove the least recently used results until the folder fits in its size limit
+        """
+        entries = []
+        for path in glob.glob(os.path.join(self.directory, "*.npy")):
+            try:
+                status = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((status.st_mtime, status.st_size, path))
+
+        # Other processes may share the folder, so the size is measured again rather than trusted
+        self._bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if self._bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            self._bytes -= size
+
+    def wrap(self, function: Callable, operation: str) -> Callable:
+        """
+        Wrap an operation so that its array results are cached
+        Args:
+            function: The operation
+            operation: The name of the operation in the keys
+        Returns:
+            The wrapped operation
+        """
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            key = self.key(operation, args, kwargs)
+            if key is None:
+                return function(*args, **kwargs)
+
+            result = self.get(key)
+            if result is not None:
+                return result
+
+            start = time.perf_counter()
+            result = function(*args, **kwargs)
+            if isinstance(result, np.ndarray) and time.perf_counter() - start >= self.min_seconds:
+                self.put(key, result)
+            return result
+
+        return wrapper
+
+    def statistics(self) -> Dict[str, float]:
+        """
+        Get the hit and miss counts of this process and the size of the folder
+        Returns:
+            The hits, misses, hit rate, writes, evictions and bytes
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'writes': self.writes,
+            'evictions': self.evictions,
+            'bytes': self._bytes,
+        }
+
+    def clear(self):
+        """
+        Remove every cached result
+        """
+        for path in glob.glob(os.path.join(self.directory, "*.npy")):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self._bytes = 0
+
+    def _path(self, key: str) -> str:
+        """
+        Get the file of a key
+        """
+        return os.path.join(self.directory, f"{key}.npy")
+
+    def _scan_bytes(self) -> int:
+        """
+        Measure the size of the cached results in the folder
+        """
+        total = 0
+        for path in glob.glob(os.path.join(self.directory, "*.npy")):
+            try:
+                total += os.path.getsize(path)
+            except FileNotFoundError:
+                pass
+        return total
+
+
+def install(cache: ResultCache, operations: Dict[type, Iterable[str]] = None):
+    """
+    Replace the core operations with cached ones, this removes any other wrapper installed before
+    Args:
+        cache: The result cache
+        operations: The method names of each core class, CACHED_OPERATIONS by default
+    """
+    for processor, names in (operations or CACHED_OPERATIONS).items():
+        for name in names:
+            # Installing twice would wrap the wrapper, keep the original operation
+            function = inspect.unwrap(processor.__dict__[name].__func__)
+            setattr(processor, name, staticmethod(cache.wrap(function, f"{processor.__name__}.{name}")))
+
+
+def uninstall(operations: Dict[type, Iterable[str]] = None):
+    """
+    Restore the original core operations, removing every installed wrapper
+    Args:
+        operations: The method names of each core class, CACHED_OPERATIONS by default
+    """
+    for processor, names in (operations or CACHED_OPERATIONS).items():
+        for name in names:
+            setattr(processor, name, staticmethod(inspect.unwrap(processor.__dict__[name].__func__)))
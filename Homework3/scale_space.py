@@ -0,0 +1,116 @@
+from collections import OrderedDict
+from typing import List
+
+import cv2
+import numpy as np
+
+# The number of blurred levels kept per image and the bytes they may hold
+MAX_LEVELS = 8
+MAX_BYTES = 64 * 1024 * 1024
+
+# The scale spaces of the recently smoothed images
+_cache: List['GaussianScaleSpace'] = []
+_CACHE_ENTRIES = 2
+
+
+def level_sigma(smoothing_level: int) -> float:
+    """
+    Get the sigma OpenCV derives for the kernel size of a smoothing level when sigma is 0
+    Args:
+        smoothing_level: The level of smoothing, the kernel size is 2 * level + 1
+    Returns:
+        The standard deviation of the Gaussian
+    """
+    return 0.3 * (smoothing_level - 1) + 0.8
+
+
+class GaussianScaleSpace:
+    """
+    Blurred versions of an image at increasing sigmas. A new sigma is reached by blurring the closest
+    cached level below it with sqrt(sigma^2 - sigma_cached^2), as two Gaussians compose into one whose
+    variance is the sum, so stepping the level up only costs the small incremental blur.
+    """
+
+    def __init__(self, image_array: np.ndarray, max_levels: int = MAX_LEVELS, max_bytes: int = MAX_BYTES):
+        """
+        Args:
+            image_array: The image to blur
+            max_levels: The number of blurred levels kept
+            max_bytes: The bytes of blurred levels kept, the least recently used levels are dropped above it
+        """
+        self.source = image_array
+        self.max_levels = max_levels
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        # The levels are kept in float32 so the incremental blurs do not accumulate rounding
+        self._levels: 'OrderedDict[float, np.ndarray]' = OrderedDict()
+
+    def smooth(self, smoothing_level: int) -> np.ndarray:
+        """
+        Get the image blurred like cv2.GaussianBlur with the kernel size of the smoothing level
+        Args:
+            smoothing_level: The level of smoothing, the kernel size is 2 * level + 1
+        Returns:
+            The blurred image with the dtype of the source
+        """
+        assert smoothing_level > 0, "Smoothing level must be greater than 0"
+
+        sigma = level_sigma(smoothing_level)
+        kernel_size = 2 * smoothing_level + 1
+        level = self._levels.get(sigma)
+        if level is not None:
+            self._levels.move_to_end(sigma)
+            return self._to_source_dtype(level)
+
+        # Start from the coarsest cached level below the sigma when its incremental kernel, sized by OpenCV
+        # as 8 sigma for float images, is at most half the direct one, as float taps cost about twice as much
+        base_sigma = max((cached for cached in self._levels if cached < sigma), default=0.0)
+        step = np.sqrt(sigma ** 2 - base_sigma ** 2)
+        if base_sigma > 0 and 2 * (int(round(8 * step + 1)) | 1) <= kernel_size:
+            level = cv2.GaussianBlur(self._levels[base_sigma], (0, 0), step)
+            result = self._to_source_dtype(level)
+        else:
+            result = cv2.GaussianBlur(self.source, (kernel_size, kernel_size), 0)
+            level = result.astype(np.float32)
+
+        if level.nbytes <= self.max_bytes:
+            self._levels[sigma] = level
+            self.bytes += level.nbytes
+            while len(self._levels) > self.max_levels or self.bytes > self.max_bytes:
+                self.bytes -= self._levels.popitem(last=False)[1].nbytes
+        return result
+
+    def _to_source_dtype(self, level: np.ndarray) -> np.ndarray:
+        """
+        Convert a float32 level back to the dtype of the source
+        Args:
+            level: The blurred level
+        Returns:
+            The rounded and saturated level
+        """
+        if self.source.dtype == np.uint8:
+            # Round and saturate in one pass, the levels are never negative
+            return cv2.convertScaleAbs(level)
+        if np.issubdtype(self.source.dtype, np.integer):
+            info = np.iinfo(self.source.dtype)
+            return np.clip(np.rint(level), info.min, info.max).astype(self.source.dtype)
+        return level.astype(self.source.dtype)
+
+
+def scale_space(image_array: np.ndarray) -> GaussianScaleSpace:
+    """
+    Get the scale space of an image, reusing the cached one for the same image
+    Args:
+        image_array: The image
+    Returns:
+        The scale space
+    """
+    for entry in _cache:
+        if entry.source is image_array:
+            return entry
+
+    entry = GaussianScaleSpace(image_array)
+    _cache.append(entry)
+    if len(_cache) > _CACHE_ENTRIES:
+        _cache.pop(0)
+    return entry
@@ -0,0 +1,258 @@
+import json
+import os
+import zipfile
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from config import SESSION_CHUNK_BYTES, SESSION_COMPRESS_LEVEL
+
+if TYPE_CHECKING:
+    from app import ImageProcessorApp
+
+SESSION_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+
+class LazyImage:
+    """
+    An array stored in a session file, its chunks are only decompressed when the pixels are needed
+    """
+
+    def __init__(self, archive: zipfile.ZipFile, key: str, entry: Dict[str, Any]):
+        """
+        Args:
+            archive: The open session file
+            key: The key of the array in the manifest
+            entry: The shape, dtype and chunk rows of the array
+        """
+        self.archive = archive
+        self.key = key
+        self.shape = tuple(entry['shape'])
+        self.dtype = np.dtype(entry['dtype'])
+        self.chunk_rows = entry['chunk_rows']
+        self._array: Optional[np.ndarray] = None
+
+    def rows(self, start: int, stop: int) -> np.ndarray:
+        """
+        Read a range of rows, decompressing only the chunks that cover it
+        Args:
+            start: The first row
+            stop: The row after the last one
+        Returns:
+            The rows
+        """
+        if self._array is not None:
+            return self._array[start:stop]
+
+        first_chunk, last_chunk = start // self.chunk_rows, (max(stop, start + 1) - 1) // self.chunk_rows
+        band = np.concatenate([self._chunk(index) for index in range(first_chunk, last_chunk + 1)])
+        offset = first_chunk * self.chunk_rows
+        return band[start - offset:stop - offset]
+
+    def load(self) -> np.ndarray:
+        """
+        Read the whole array, chunk by chunk into one buffer, and keep it
+        Returns:
+            The array
+        """
+        if self._array is None:
+            array = np.empty(self.shape, dtype=self.dtype)
+            for index, start in enumerate(range(0, max(self.shape[0], 1), self.chunk_rows)):
+                array[start:start + self.chunk_rows] = self._chunk(index)
+            self._array = array
+        return self._array
+
+    def stored_chunks(self) -> Optional[Iterator[bytes]]:
+        """
+        Get the stored chunks of an array that was not loaded, so it can be copied to another session file
+        without decompressing all of it at once
+        Returns:
+            The chunks, or None when the array is loaded
+        """
+        if self._array is not None:
+            return None
+        count = len(range(0, max(self.shape[0], 1), self.chunk_rows))
+        return (self.archive.read(f"arrays/{self.key}/{index}") for index in range(count))
+
+    def rebind(self, archive: zipfile.ZipFile, key: str):
+        """
+        Read the array from another session file holding the same chunks
+        Args:
+            archive: The open session file
+            key: The key of the array in its manifest
+        """
+        self.archive = archive
+        self.key = key
+
+    def _chunk(self, index: int) -> np.ndarray:
+        """
+        Decompress a chunk of rows
+        Args:
+            index: The index of the chunk
+        Returns:
+            The rows of the chunk
+        """
+        data = self.archive.read(f"arrays/{self.key}/{index}")
+        return np.frombuffer(data, dtype=self.dtype).reshape((-1,) + self.shape[1:])
+
+
+def materialize(value: Any) -> Any:
+    """
+    Get the array behind a value that may be a lazy session image
+    Args:
+        value: An array, a LazyImage or None
+    Returns:
+        The array or None
+    """
+    return value.load() if isinstance(value, LazyImage) else value
+
+
+def materialize_entry(entry: List[Any]) -> List[Any]:
+    """
+    Load the images and the DFT state of a history entry in place
+    Args:
+        entry: The main image, the compare image and the DFT workflow state
+    Returns:
+        The entry
+    """
+    entry[0], entry[1] = materialize(entry[0]), materialize(entry[1])
+    if entry[2] is not None:
+        entry[2] = tuple(materialize(array) for array in entry[2])
+    return entry
+
+
+class _SessionWriter:
+    """
+    Write arrays into a session file once each, however many states share them
+    """
+
+    def __init__(self, archive: zipfile.ZipFile):
+        self.archive = archive
+        self.arrays: Dict[str, Dict[str, Any]] = {}
+        # The lazy images copied without loading them, with their keys in the new file
+        self.lazy_images: List[Tuple[LazyImage, str]] = []
+        self._keys: Dict[int, str] = {}
+        # The stored values, kept alive so their ids are not reused by other arrays during the save
+        self._values: List[Any] = []
+
+    def add(self, value: Any) -> Optional[str]:
+        """
+        Store an array in row chunks, each compressed on its own. A lazy image that was not loaded has its
+        chunks copied one at a time.
+        Args:
+            value: An array, a LazyImage or None
+        Returns:
+            The key of the array in the manifest, or None
+        """
+        if value is None:
+            return None
+        if id(value) in self._keys:
+            return self._keys[id(value)]
+
+        key = str(len(self.arrays))
+        chunks = value.stored_chunks() if isinstance(value, LazyImage) else None
+        if chunks is not None:
+            for index, chunk in enumerate(chunks):
+                self.archive.writestr(f"arrays/{key}/{index}", chunk)
+            shape, dtype, chunk_rows = value.shape, value.dtype, value.chunk_rows
+            self.lazy_images.append((value, key))
+        else:
+            array = np.ascontiguousarray(materialize(value))
+            row_bytes = max(1, array[:1].nbytes)
+            chunk_rows = max(1, SESSION_CHUNK_BYTES // row_bytes)
+            for index, start in enumerate(range(0, max(array.shape[0], 1), chunk_rows)):
+                self.archive.writestr(f"arrays/{key}/{index}", array[start:start + chunk_rows].tobytes())
+            shape, dtype = array.shape, array.dtype
+            # A loaded lazy image and its array are the same version
+            self._keys[id(array)] = key
+            self._values.append(array)
+
+        self.arrays[key] = {'shape': list(shape), 'dtype': dtype.str, 'chunk_rows': chunk_rows}
+        self._keys[id(value)] = key
+        self._values.append(value)
+        return key
+
+    def add_entry(self, entry: List[Any]) -> Dict[str, Any]:
+        """
+        Store a history entry
+        Args:
+            entry: The main image, the compare image and the DFT workflow state
+        Returns:
+            The keys of the entry
+        """
+        frequency = None if entry[2] is None else [self.add(array) for array in entry[2]]
+        return {'image': self.add(entry[0]), 'compare': self.add(entry[1]), 'frequency': frequency}
+
+
+def save_session(app: 'ImageProcessorApp', file_path: str):
+    """
+    Save the images, the undo and redo history and the DFT workflow state to a session file
+    Args:
+        app: The application
+        file_path: The path of the session file
+    """
+    temporary_path = f"{file_path}.tmp"
+    with zipfile.ZipFile(temporary_path, "w", zipfile.ZIP_DEFLATED, compresslevel=SESSION_COMPRESS_LEVEL) as archive:
+        writer = _SessionWriter(archive)
+        manifest = {
+            'version': SESSION_VERSION,
+            'current': writer.add_entry([app.image, app.compare_image, app.frequency_workspace.snapshot()]),
+            'history': [writer.add_entry(entry) for entry in app.image_history],
+            'redo': [writer.add_entry(entry) for entry in app.redo_stack],
+        }
+        manifest['arrays'] = writer.arrays
+        archive.writestr(MANIFEST_NAME, json.dumps(manifest))
+
+    if app.session_archive is not None:
+        app.session_archive.close()
+        app.session_archive = None
+    os.replace(temporary_path, file_path)
+
+    # The versions that were not loaded are read from the new file from now on, it may have replaced their old one
+    if writer.lazy_images:
+        app.session_archive = zipfile.ZipFile(file_path, "r")
+        for lazy_image, key in writer.lazy_images:
+            lazy_image.rebind(app.session_archive, key)
+
+
+def open_session(app: 'ImageProcessorApp', file_path: str):
+    """
+    Open a session file. Only the displayed images are read, the history is loaded when it is viewed.
+    Args:
+        app: The application
+        file_path: The path of the session file
+    """
+    archive = zipfile.ZipFile(file_path, "r")
+    try:
+        manifest = json.loads(archive.read(MANIFEST_NAME))
+        if manifest.get('version') != SESSION_VERSION:
+            raise ValueError(f"Unsupported session version: {manifest.get('version')}")
+    except Exception:
+        archive.close()
+        raise
+
+    arrays = {key: LazyImage(archive, key, entry) for key, entry in manifest['arrays'].items()}
+
+    def entry_of(keys: Dict[str, Any]) -> List[Any]:
+        frequency = None if keys['frequency'] is None else tuple(
+            None if key is None else arrays[key] for key in keys['frequency']
+        )
+        return [
+            None if keys['image'] is None else arrays[keys['image']],
+            None if keys['compare'] is None else arrays[keys['compare']],
+            frequency
+        ]
+
+    if app.session_archive is not None:
+        app.session_archive.close()
+    app.session_archive = archive
+
+    current = materialize_entry(entry_of(manifest['current']))
+    app.image_history = [entry_of(keys) for keys in manifest['history']]
+    app.redo_stack = [entry_of(keys) for keys in manifest['redo']]
+    app.image_path = None
+    app.image = None
+    app.compare_image = current[1]
+    app.frequency_workspace.restore(current[2])
+    app.update_image(current, append_history=False)
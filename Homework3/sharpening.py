@@ -0,0 +1,72 @@
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+SHARPENING_VARIANTS = ('laplacian', 'unsharp')
+
+# The 4-neighbour Laplacian computed by cv2.Laplacian with ksize=1
+LAPLACIAN_KERNEL = np.array([
+    [0, 1, 0],
+    [1, -4, 1],
+    [0, 1, 0]
+], dtype=np.float32)
+LAPLACIAN_KERNEL.flags.writeable = False
+
+
+@lru_cache(maxsize=16)
+def sharpening_kernel(variant: str, weight: float) -> np.ndarray:
+    """
+    Fold a sharpening operation into a single 3x3 kernel
+    Args:
+        variant: 'laplacian' for identity - weight * Laplacian, or 'unsharp' for
+            identity + weight * (identity - 3x3 Gaussian), which is high-boost filtering for a weight above 1
+        weight: The weight of the Laplacian or of the unsharp mask
+    Returns:
+        The read-only float32 kernel
+    """
+    assert variant in SHARPENING_VARIANTS, f"Invalid sharpening variant: {variant}"
+
+    identity = np.zeros((3, 3), dtype=np.float32)
+    identity[1, 1] = 1
+    if variant == 'laplacian':
+        kernel = identity - np.float32(weight) * LAPLACIAN_KERNEL
+    else:
+        gaussian = cv2.getGaussianKernel(3, 0, ktype=cv2.CV_32F)
+        kernel = identity + np.float32(weight) * (identity - gaussian @ gaussian.T)
+
+    kernel.flags.writeable = False
+    return kernel
+
+
+def sharpen(image_array: np.ndarray, weight: float, variant: str = 'laplacian') -> np.ndarray:
+    """
+    Sharpen the image in one filtering pass with the folded kernel. For uint8 images OpenCV accumulates in
+    float32 and saturates straight into the uint8 result, without the float64 Laplacian and the clipping pass.
+    The border is reflected like cv2.Laplacian, so for integer weights the result equals
+    clip(image - weight * Laplacian).
+    Args:
+        image_array: The image to sharpen
+        weight: The weight of the Laplacian or of the unsharp mask
+        variant: 'laplacian' or 'unsharp'
+    Returns:
+        The sharpened uint8 image
+    """
+    kernel = sharpening_kernel(variant, float(weight))
+    if image_array.dtype == np.uint8:
+        return cv2.filter2D(image_array, -1, kernel)
+
+    # Other depths are filtered in float32 and clipped like the Laplacian path
+    filtered = cv2.filter2D(image_array.astype(np.float32, copy=False), cv2.CV_32F, kernel)
+    return np.clip(filtered, 0, 255, out=filtered).astype(np.uint8)
+
+
+def laplacian(image_array: np.ndarray) -> np.ndarray:
+    """
+    Apply the Laplacian kernel and saturate the response to uint8 in one pass
+    Args:
+        image_array: The uint8 image
+    Returns:
+        The clipped Laplacian response
+    """
+    return cv2.filter2D(image_array, -1, LAPLACIAN_KERNEL)
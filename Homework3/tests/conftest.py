@@ -0,0 +1,39 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# The modules of the tool sit flat in the folder above the tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def rng() -> np.random.Generator:
+    return np.random.default_rng(0)
+
+
+@pytest.fixture
+def color_image(rng: np.random.Generator) -> np.ndarray:
+    """
+    A smooth 8-bit RGB image with an odd size, so the tests also cover the borders of tiles and bands
+    """
+    import cv2
+    return cv2.GaussianBlur(rng.integers(0, 256, (181, 203, 3), dtype=np.uint8), (7, 7), 0)
+
+
+@pytest.fixture
+def gray_image(color_image: np.ndarray) -> np.ndarray:
+    return np.ascontiguousarray(color_image[:, :, 1])
+
+
+@pytest.fixture(autouse=True)
+def no_backend_profile(monkeypatch):
+    """
+    Keep the autotuned backends of the tests in memory instead of the profile file
+    """
+    from filter_backends import backends
+    monkeypatch.setattr(backends, 'profile_path', None)
+    monkeypatch.setattr(backends, '_profile', {})
+    monkeypatch.setattr(backends, '_timings', {})
+    monkeypatch.setattr(backends, '_failed', {})
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from image_processor_core_hw1 import ImageProcessorCore
+from image_processor_core_hw3 import ImageProcessorCore3
+
+
+@pytest.mark.parametrize("algorithm, alpha, beta", [
+    ("Linear", 1.3, 10.0),
+    ("Exponential", 0.02, 0.0),
+    ("Logarithmic", 1.0, 2.0),
+])
+@pytest.mark.parametrize("band_rows", [1, 16, 50, 1000])
+def test_brightness_bands_match_whole_image(color_image, algorithm, alpha, beta, band_rows):
+    expected = ImageProcessorCore.adjust_brightness(color_image, alpha, beta, algorithm)
+    result = ImageProcessorCore.adjust_brightness(color_image, alpha, beta, algorithm, band_rows)
+    assert np.array_equal(result, expected)
+
+
+@pytest.mark.parametrize("band_rows", [1, 16, 50, 1000])
+def test_sharpening_bands_match_whole_image(color_image, band_rows):
+    for level in (1, 3):
+        expected = ImageProcessorCore.sharpen_image(color_image, level)
+        assert np.array_equal(ImageProcessorCore.sharpen_image(color_image, level, band_rows), expected)
+
+    for model in ('rgb', 'hsi'):
+        expected = ImageProcessorCore3.apply_sharpening_mask(color_image, model, 'hsv')
+        result = ImageProcessorCore3.apply_sharpening_mask(color_image, model, 'hsv', band_rows)
+        assert np.array_equal(result, expected)
@@ -0,0 +1,35 @@
+import cv2
+import numpy as np
+import pytest
+
+from image_processor_core_hw3 import ImageProcessorCore3
+from integral_image import integral_image
+
+
+@pytest.mark.parametrize("backend", ['integral', 'fft'])
+def test_box_average_backends_match_opencv(color_image, gray_image, backend):
+    for image in (color_image, gray_image):
+        for kernel_size in (1, 3, 5, 15, 51):
+            expected = cv2.blur(image, (kernel_size, kernel_size))
+            assert np.array_equal(ImageProcessorCore3.apply_average_mask(image, kernel_size, backend), expected)
+
+
+def test_integral_image_is_reused_until_a_larger_kernel(color_image):
+    table = integral_image(color_image, 5)
+    assert integral_image(color_image, 51) is table
+    larger = integral_image(color_image, 61)
+    assert larger is not table
+    assert np.array_equal(larger.box_mean(61), cv2.blur(color_image, (61, 61)))
+
+
+@pytest.mark.parametrize("backend", ['integral', 'fft'])
+def test_box_average_of_16_bit_and_float_images(rng, backend):
+    sixteen_bit = rng.integers(0, 65536, (61, 73, 3), dtype=np.uint16)
+    assert np.array_equal(
+        ImageProcessorCore3.apply_average_mask(sixteen_bit, 5, backend), cv2.blur(sixteen_bit, (5, 5))
+    )
+    # Float means keep their fraction instead of being rounded to whole levels
+    floating = rng.random((61, 73), dtype=np.float32) * 255
+    result = ImageProcessorCore3.apply_average_mask(floating, 5, backend)
+    assert result.dtype == np.float32
+    assert np.allclose(result, cv2.blur(floating, (5, 5)), atol=1e-3)
@@ -0,0 +1,32 @@
+import cv2
+import numpy as np
+import pytest
+
+from equalization import clahe_channels, equalize_channels
+
+
+def test_stacked_equalization_matches_per_channel(color_image, gray_image):
+    expected = cv2.merge([cv2.equalizeHist(np.ascontiguousarray(color_image[:, :, c])) for c in range(3)])
+    assert np.array_equal(equalize_channels(color_image), expected)
+    assert np.array_equal(equalize_channels(gray_image), cv2.equalizeHist(gray_image))
+
+
+def _clahe_reference(image: np.ndarray) -> np.ndarray:
+    channels = [image] if image.ndim == 2 else [np.ascontiguousarray(image[:, :, c]) for c in range(3)]
+    equalized = [cv2.createCLAHE(2.0, (8, 8)).apply(channel) for channel in channels]
+    return equalized[0] if image.ndim == 2 else cv2.merge(equalized)
+
+
+@pytest.mark.parametrize("bands", [1, 2, 3, 8])
+def test_clahe_bands_match_one_call(rng, bands):
+    # With a power of two tile height the bands interpolate with the same weights as one call
+    image = cv2.GaussianBlur(rng.integers(0, 256, (256, 200, 3), dtype=np.uint8), (9, 9), 0)
+    assert np.array_equal(clahe_channels(image, 2.0, (8, 8), bands), _clahe_reference(image))
+    assert np.array_equal(clahe_channels(image[:, :, 0], 2.0, (8, 8), bands), _clahe_reference(image[:, :, 0]))
+
+
+@pytest.mark.parametrize("bands", [1, 2, 3, 8])
+def test_clahe_bands_of_padded_images_stay_within_one_level(color_image, bands):
+    difference = np.abs(clahe_channels(color_image, 2.0, (8, 8), bands).astype(int) - _clahe_reference(color_image))
+    assert difference.max() <= 1
+    assert np.count_nonzero(difference) <= color_image.size // 10000
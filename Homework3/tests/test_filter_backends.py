@@ -0,0 +1,129 @@
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+import parallel_kernels
+from backend_registry import TUNE_RUNS, BackendRegistry
+from filter_backends import backends
+
+
+@pytest.mark.parametrize("backend", ['numpy', 'opencv'])
+def test_median_backends_match_opencv(color_image, gray_image, backend):
+    for image in (color_image, gray_image):
+        for kernel_size in (3, 5, 7):
+            result = backends.dispatch('median', image, kernel_size, backend=backend)
+            assert np.array_equal(result, cv2.medianBlur(image, kernel_size))
+
+
+@pytest.mark.parametrize("backend", ['numpy', 'opencv'])
+def test_laplacian_backends_match_opencv(color_image, gray_image, backend):
+    for image in (color_image, gray_image):
+        expected = np.clip(cv2.Laplacian(image, cv2.CV_64F), 0, 255).astype(np.uint8)
+        assert np.array_equal(backends.dispatch('laplacian', image, backend=backend), expected)
+
+
+@pytest.mark.parametrize("backend", ['integral', 'fft', 'opencv'])
+def test_average_backends_match_opencv(color_image, backend):
+    for kernel_size in (3, 9):
+        result = backends.dispatch('average', color_image, kernel_size, backend=backend)
+        assert np.array_equal(result, cv2.blur(color_image, (kernel_size, kernel_size)))
+
+
+def test_autotuning_runs_one_backend_per_call_and_keeps_a_tunable_one(gray_image):
+    tunable = [backend for backend in backends.backends('median') if backend != 'manual']
+    for _ in range(TUNE_RUNS * len(tunable)):
+        assert backends.choice('median', gray_image, 3) is None
+        assert np.array_equal(backends.dispatch('median', gray_image, 3), cv2.medianBlur(gray_image, 3))
+    assert backends.choice('median', gray_image, 3) in tunable
+
+
+def test_forced_backend_is_used_and_restored(gray_image, monkeypatch):
+    calls = []
+    monkeypatch.setattr(parallel_kernels, 'median', lambda *args: calls.append(args) or cv2.medianBlur(*args))
+    with backends.forced('opencv'):
+        with backends.forced('manual', 'median'):
+            backends.dispatch('median', gray_image, 3)
+        backends.dispatch('median', gray_image, 3)
+    assert len(calls) == 1
+    assert backends._forced == {}
+    # Forcing skips the autotuner
+    assert backends.choice('median', gray_image, 3) is None
+
+
+def test_profile_of_another_version_is_tuned_again(tmp_path):
+    profile_path = str(tmp_path / "profile.json")
+    image = np.zeros((8, 8), dtype=np.uint8)
+
+    first = _identity_registry(profile_path, "1")
+    for _ in range(2 * TUNE_RUNS):
+        first.dispatch('identity', image)
+    assert _identity_registry(profile_path, "1").choice('identity', image) in ('a', 'b')
+    assert _identity_registry(profile_path, "2").choice('identity', image) is None
+
+def _identity_registry(profile_path=None, version: str = '') -> BackendRegistry:
+    registry = BackendRegistry(profile_path, version=version)
+    registry.register('identity', 'a')(lambda image_array: image_array)
+    registry.register('identity', 'b')(lambda image_array: image_array)
+    return registry
+
+
+def test_tuning_from_several_threads():
+    registry = _identity_registry()
+    image = np.zeros((8, 8), dtype=np.uint8)
+    barrier = threading.Barrier(8)
+    errors = []
+
+    def run():
+        try:
+            barrier.wait()
+            for _ in range(4 * TUNE_RUNS):
+                registry.dispatch('identity', image)
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert registry.choice('identity', image) in ('a', 'b')
+
+
+def test_failing_backend_is_dropped_for_the_key():
+    registry = _identity_registry()
+    calls = []
+
+    @registry.register('identity', 'broken')
+    def broken(image_array):
+        calls.append(image_array.dtype)
+        raise ValueError("Unsupported dtype")
+
+    image = np.zeros((8, 8), dtype=np.uint16)
+    for _ in range(4 * TUNE_RUNS):
+        assert registry.dispatch('identity', image) is image
+    assert len(calls) == 1
+    assert registry.choice('identity', image) in ('a', 'b')
+
+
+def test_last_backend_keeps_its_error():
+    registry = BackendRegistry()
+
+    @registry.register('identity', 'broken')
+    def broken(image_array):
+        raise ValueError("Unsupported dtype")
+
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            registry.dispatch('identity', np.zeros((8, 8), dtype=np.uint8))
+
+
+def test_sixteen_bit_images_tune_to_a_working_backend(rng):
+    # cv2.medianBlur only takes 16-bit images up to 5x5, the NumPy median takes any
+    image = rng.integers(0, 65536, (40, 50), dtype=np.uint16)
+    expected = backends.dispatch('median', image, 7, backend='numpy')
+    for _ in range(4 * TUNE_RUNS):
+        assert np.array_equal(backends.dispatch('median', image, 7), expected)
+    assert backends.choice('median', image, 7) == 'numpy'
@@ -0,0 +1,55 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from frame_stream import build_chain, frame_paths, parse_chain, stream_frames
+from image_processor_core_hw3 import ImageProcessorCore3
+
+
+@pytest.fixture
+def frames(tmp_path, rng):
+    folder = tmp_path / "frames"
+    folder.mkdir()
+    images = {}
+    for index in range(10):
+        image = rng.integers(0, 256, (64, 80, 3), dtype=np.uint8)
+        Image.fromarray(image).save(folder / f"frame_{index}.png")
+        images[f"frame_{index}"] = image
+    return str(folder), images
+
+
+def test_parse_chain():
+    assert parse_chain("apply_median_mask 3; rgb_image red") == [
+        ('apply_median_mask', (3,)), ('rgb_image', ('red',))
+    ]
+    assert parse_chain(" ; ") == []
+    with pytest.raises(ValueError, match="Unknown operation"):
+        parse_chain("not_an_operation 3")
+
+
+def test_frames_are_ordered_naturally(frames):
+    folder, _ = frames
+    names = [os.path.basename(path) for path in frame_paths(folder)]
+    assert names == [f"frame_{index}.png" for index in range(10)]
+
+
+def test_stream_through_a_chain_on_several_workers(frames, tmp_path):
+    folder, images = frames
+    output_dir = str(tmp_path / "output")
+    chain = build_chain(parse_chain("apply_median_mask 3; rgb_image red"))
+
+    report = stream_frames(frame_paths(folder), chain, output_dir, workers=2, queue_size=2)
+
+    assert report['frames'] == 10
+    for name, image in images.items():
+        expected = ImageProcessorCore3.rgb_image(cv2.medianBlur(image, 3), 'red')
+        assert np.array_equal(np.asarray(Image.open(os.path.join(output_dir, f"{name}.png"))), expected)
+
+
+def test_stream_raises_the_error_of_a_frame(frames, tmp_path):
+    folder, _ = frames
+    with pytest.raises(AssertionError, match="Kernel size must be odd"):
+        stream_frames(frame_paths(folder), build_chain(parse_chain("apply_median_mask 4")), str(tmp_path / "out"))
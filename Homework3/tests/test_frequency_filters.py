@@ -0,0 +1,9 @@
+import numpy as np
+
+from image_processor_core_hw2 import ImageProcessorCore2
+
+
+def test_all_pass_filter_returns_the_input(color_image, gray_image):
+    for image in (color_image, gray_image):
+        result = ImageProcessorCore2.apply_frequency_filter(image, 'ideal', 'lowpass', 1e6)
+        assert np.array_equal(result, image)
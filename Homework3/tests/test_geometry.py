@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from geometry import AffineChain, scaling
+from image_processor_core_hw1 import ImageProcessorCore
+
+
+@pytest.mark.parametrize("scale_factor", [0.3, 0.5, 0.75])
+def test_shrinking_matches_the_antialiased_pil_resize(color_image, scale_factor):
+    result = ImageProcessorCore.resize_image(color_image, scale_factor)
+    size = (int(color_image.shape[1] * scale_factor), int(color_image.shape[0] * scale_factor))
+    assert np.array_equal(result, np.asarray(Image.fromarray(color_image).resize(size, Image.Resampling.BILINEAR)))
+
+
+def test_chain_of_resizes_is_one_resize(color_image):
+    chain = AffineChain(color_image)
+    chain.apply(lambda shape: scaling(shape, 0.5))
+    result = chain.apply(lambda shape: scaling(shape, 0.8))
+    size = (int(int(color_image.shape[1] * 0.5) * 0.8), int(int(color_image.shape[0] * 0.5) * 0.8))
+    assert result.shape[:2] == size[::-1]
+    expected = np.asarray(Image.fromarray(color_image).resize(size, Image.Resampling.BILINEAR))
+    assert np.array_equal(result, expected)
+
+
+def test_sixteen_bit_color_images_shrink(rng):
+    image = rng.integers(0, 65536, (50, 60, 3), dtype=np.uint16)
+    result = ImageProcessorCore.resize_image(image, 0.5)
+    assert result.shape == (25, 30, 3) and result.dtype == np.uint16
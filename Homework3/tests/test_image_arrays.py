@@ -0,0 +1,54 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from image_arrays import to_array, to_pil_image
+from image_processor_core_hw1 import ImageProcessorCore
+from image_processor_core_hw3 import ImageProcessorCore3
+
+
+def test_to_array_returns_arrays_without_copying(color_image):
+    array = to_array(color_image)
+    assert array is color_image
+    assert np.shares_memory(to_array(color_image[10:20]), color_image)
+
+
+def test_to_array_converts_pil_images(color_image):
+    array = to_array(Image.fromarray(color_image))
+    assert isinstance(array, np.ndarray)
+    assert np.array_equal(array, color_image)
+
+
+def test_to_pil_image_round_trip(color_image):
+    image = to_pil_image(color_image)
+    assert to_pil_image(image) is image
+    assert np.array_equal(to_array(image), color_image)
+
+
+@pytest.mark.parametrize("operation", [
+    lambda image: ImageProcessorCore3.complement_image(image),
+    lambda image: ImageProcessorCore3.rgb_image(image, 'red'),
+    lambda image: ImageProcessorCore.multi_band_slicing(image, ((100, 150, 255),), True),
+    lambda image: ImageProcessorCore.smooth_image(image, 2),
+    lambda image: ImageProcessorCore.rotate_image(image, 30),
+])
+def test_core_operations_allocate_only_their_output(rng, operation):
+    image = rng.integers(0, 256, (600, 500, 3), dtype=np.uint8)
+    original = image.copy()
+    # The first call fills the caches of the operation
+    operation(image)
+
+    tracemalloc.start()
+    try:
+        result = operation(image)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    assert isinstance(result, np.ndarray)
+    # No copy of the input on entry and no PIL image on exit, only the output itself
+    assert peak < 1.2 * result.nbytes
+    assert not np.shares_memory(result, image)
+    assert np.array_equal(image, original)
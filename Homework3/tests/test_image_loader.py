@@ -0,0 +1,40 @@
+import os
+import time
+
+import numpy as np
+from PIL import Image
+
+from image_loader import ImageLoader
+
+
+class _Root:
+    """
+    Runs the polls of the loader right away, in place of Tk's event loop
+    """
+
+    def after(self, milliseconds: int, callback):
+        time.sleep(milliseconds / 1000)
+        callback()
+
+
+def _load(loader: ImageLoader, file_path: str) -> np.ndarray:
+    results = []
+    loader.load(file_path, results.append, results.append)
+    assert not isinstance(results[0], BaseException), results[0]
+    return results[0]
+
+
+def test_overwritten_file_is_decoded_again(tmp_path, color_image):
+    file_path = str(tmp_path / "image.png")
+    loader = ImageLoader(_Root())
+
+    Image.fromarray(color_image).save(file_path)
+    assert np.array_equal(_load(loader, file_path), color_image)
+    assert np.array_equal(_load(loader, file_path), color_image)
+
+    inverted = 255 - color_image
+    Image.fromarray(inverted).save(file_path)
+    # A coarse file system clock could give the new file the same time, its size may match too
+    status = os.stat(file_path)
+    os.utime(file_path, ns=(status.st_atime_ns, status.st_mtime_ns + 1_000_000_000))
+    assert np.array_equal(_load(loader, file_path), inverted)
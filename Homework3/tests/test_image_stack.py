@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from image_processor_core_hw1 import ImageProcessorCore
+from image_processor_core_hw2 import ImageProcessorCore2
+from image_processor_core_hw3 import ImageProcessorCore3
+from image_stack import ImageStack
+
+
+@pytest.fixture
+def images(color_image):
+    return [color_image, 255 - color_image, np.roll(color_image, 7, axis=1)]
+
+
+@pytest.mark.parametrize("operation", [
+    lambda image: ImageProcessorCore3.complement_image(image),
+    lambda image: ImageProcessorCore3.rgb_image(image, 'green'),
+    lambda image: ImageProcessorCore3.hsi_image(image, 'hue', 'hsi'),
+    lambda image: ImageProcessorCore3.hue_mask(image, 130, 160),
+    lambda image: ImageProcessorCore.bit_plane_image(image, 6),
+    lambda image: ImageProcessorCore.multi_band_slicing(image, ((50, 100, 255), (180, 200, 0)), False),
+])
+def test_stacked_pixel_operations_match_per_image(images, operation):
+    results = ImageStack(images).map_pixels(operation).images()
+    for image, result in zip(images, results):
+        assert np.array_equal(result, operation(image))
+
+
+def test_stacked_fft_matches_per_image(images, gray_image):
+    for stack_images in (images, [gray_image, gray_image[::-1]]):
+        results = ImageStack(stack_images).fft_magnitude().images()
+        for image, result in zip(stack_images, results):
+            assert np.array_equal(result, ImageProcessorCore2.apply_fft(image))
+
+
+def test_variants_match_each_lut(color_image):
+    luts = np.stack([np.arange(256, dtype=np.uint8), 255 - np.arange(256, dtype=np.uint8), np.full(256, 7, np.uint8)])
+    variants = ImageStack.variants(color_image, luts)
+    assert len(variants) == 3
+    for lut, variant in zip(luts, variants.images()):
+        assert np.array_equal(variant, lut[color_image])
+
+
+def test_stack_rejects_mixed_shapes(color_image):
+    assert not ImageStack.can_stack([color_image, color_image[1:]])
+    with pytest.raises(ValueError):
+        ImageStack([color_image, color_image[1:]])
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+import parallel_kernels
+
+
+def _serial_convolution(image_array: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    # The pixel loop of ImageProcessorCore2.convolution before it was split in bands
+    width, height = image_array.shape[0], image_array.shape[1]
+    mask_width, mask_height = mask.shape
+    result_image = np.zeros((width, height), dtype=np.float32)
+    padded_image = np.pad(
+        image_array, ((mask_width // 2, mask_width // 2), (mask_height // 2, mask_height // 2)), mode='constant'
+    )
+    for i in range(width):
+        for j in range(height):
+            result_image[i, j] = np.sum(padded_image[i:i + mask_height, j:j + mask_width] * mask)
+    return result_image.clip(0, 255).astype(np.uint8)
+
+
+def _serial_median(image_array: np.ndarray, kernel_size: int) -> np.ndarray:
+    # The manual median of ImageProcessorCore2.apply_median_mask before it was split in bands
+    filtered = np.zeros_like(image_array)
+    padding = kernel_size // 2
+    for i in range(padding, image_array.shape[0] - padding):
+        for j in range(padding, image_array.shape[1] - padding):
+            filtered[i, j] = np.median(image_array[i - padding:i + padding + 1, j - padding:j + padding + 1])
+    return filtered
+
+
+@pytest.fixture(params=[1, 2], ids=["in-process", "worker-pool"])
+def workers(request, monkeypatch):
+    monkeypatch.setattr(parallel_kernels, 'PARALLEL_WORKERS', request.param)
+    monkeypatch.setattr(parallel_kernels, 'PARALLEL_MIN_ROWS', 8)
+    yield request.param
+    parallel_kernels.shutdown()
+
+
+@pytest.mark.parametrize("mask", [
+    np.array([[0, 1, 0], [1, -4, 1], [0, 1, 0]]),
+    np.ones((5, 5)) / 25,
+])
+def test_parallel_convolution_matches_serial_loop(rng, workers, mask):
+    image = rng.integers(0, 256, (40, 23), dtype=np.uint8)
+    assert np.array_equal(parallel_kernels.convolve(image, mask), _serial_convolution(image, mask))
+
+
+@pytest.mark.parametrize("kernel_size", [3, 5])
+def test_parallel_median_matches_serial_loop(rng, workers, kernel_size):
+    image = rng.integers(0, 256, (40, 23, 3), dtype=np.uint8)
+    assert np.array_equal(parallel_kernels.median(image, kernel_size), _serial_median(image, kernel_size))
+
+
+def test_bands_cover_the_rows_once():
+    bands = parallel_kernels._bands(3, 50, 8)
+    assert bands[0][0] == 3 and bands[-1][1] == 50
+    assert all(previous[1] == current[0] for previous, current in zip(bands, bands[1:]))
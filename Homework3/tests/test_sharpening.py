@@ -0,0 +1,18 @@
+import cv2
+import numpy as np
+import pytest
+
+from image_processor_core_hw1 import ImageProcessorCore
+from sharpening import laplacian
+
+
+@pytest.mark.parametrize("level", [1, 2, 3, 5])
+def test_fused_sharpening_matches_laplacian(color_image, level):
+    expected = ImageProcessorCore.sharpen_image(color_image, level, mode='laplacian')
+    assert np.array_equal(ImageProcessorCore.sharpen_image(color_image, level, mode='fused'), expected)
+
+
+def test_saturating_laplacian_matches_float_path(color_image, gray_image):
+    for image in (color_image, gray_image):
+        expected = np.clip(cv2.Laplacian(image, cv2.CV_64F), 0, 255).astype(np.uint8)
+        assert np.array_equal(laplacian(image), expected)
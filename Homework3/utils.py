@@ -1,12 +1,27 @@
+import os
 from tkinter import filedialog, messagebox, simpledialog
 from typing import TYPE_CHECKING
 
-import numpy as np
 from PIL import Image
 
+from frame_stream import build_chain, format_stream_report, parse_chain
+from image_arrays import to_array
+from image_export import format_report
+from session import materialize, open_session as read_session, save_session as write_session
+
 if TYPE_CHECKING:
     from app import ImageProcessorApp
 
+SESSION_EXTENSION = ".dips"
+
+# The file extension of each format of the export all button
+EXPORT_EXTENSIONS = {
+    "PNG": ".png",
+    "JPEG": ".jpg",
+    "TIFF": ".tif",
+    "BMP": ".bmp",
+}
+
 
 def open_image(app: 'ImageProcessorApp', is_compare_image=False):
     """
@@ -44,40 +59,224 @@ def open_image(app: 'ImageProcessorApp', is_compare_image=False):
                     f"Warning: Data size ({len(raw_data)}) does not match expected size ({expected_size}) for {width}x{height} image.")
 
             # Load the image from the binary data
-            image = Image.frombytes(image_format, (width, height), raw_data)
+            image = to_array(Image.frombytes(image_format, (width, height), raw_data))
+            _show_loaded_image(app, image, file_path, is_compare_image)
         else:
-            image = Image.open(file_path)
-
-        if is_compare_image and app.image is not None:
-            app.compare_image = image
-        else:
-            app.image = image
-            app.temp_array = np.array(image)
-
-        app.update_image([app.image, app.compare_image])
+            # Decode in the background and prefetch the neighbours in the folder
+            _load_image(app, file_path, is_compare_image)
     except Exception as e:
         messagebox.showinfo("Error", f"Error opening image: {e}")
 
+
+def open_neighbour_image(app: 'ImageProcessorApp', step: int):
+    """
+    Open the next or previous image in the folder of the opened image
+    Args:
+        app: The application
+        step: 1 for the next image, -1 for the previous one
+    """
+    if app.image_path is None:
+        messagebox.showinfo("Info", "Please open an image first")
+        return
+
+    file_path = app.image_loader.neighbour(app.image_path, step)
+    if file_path is None:
+        messagebox.showinfo("Info", "No more images in this folder")
+        return
+
+    _load_image(app, file_path, False)
+
+
+def _load_image(app: 'ImageProcessorApp', file_path: str, is_compare_image: bool):
+    """
+    Decode an image on the loader threads while showing a loading indicator
+    """
+    app.status_text.set(f"Loading {os.path.basename(file_path)}...")
+    app.root.config(cursor="watch")
+
+    def on_loaded(image):
+        app.root.config(cursor="")
+        app.status_text.set("")
+        _show_loaded_image(app, image, file_path, is_compare_image)
+        app.image_loader.prefetch(file_path)
+
+    def on_error(error):
+        app.root.config(cursor="")
+        app.status_text.set("")
+        messagebox.showinfo("Error", f"Error opening image: {error}")
+
+    app.image_loader.load(file_path, on_loaded, on_error)
+
+
+def _show_loaded_image(app: 'ImageProcessorApp', image, file_path: str, is_compare_image: bool):
+    """
+    Show an opened image as the main or the compare image
+    """
+    if is_compare_image and app.image is not None:
+        app.compare_image = image
+    else:
+        app.image = image
+        app.image_path = file_path
+
+    app.update_image([app.image, app.compare_image])
+
 def save_image(app: 'ImageProcessorApp', is_compare_image=False):
     """
     Save the image to a file
     """
     target_image = app.compare_image if is_compare_image else app.image
 
-    if not target_image:
+    if target_image is None:
         messagebox.showinfo("Info", "Please open an image first")
         return
 
     file_name = filedialog.asksaveasfilename(
         defaultextension=".jpg",
-        filetypes=[("JPEG files", "*.jpg"), ("All files", "*.*")]
+        filetypes=[
+            ("JPEG files", "*.jpg"),
+            ("PNG files", "*.png"),
+            ("TIFF files", "*.tif"),
+            ("Bitmap files", "*.bmp"),
+            ("All files", "*.*")
+        ]
+    )
+
+    if not file_name:
+        return
+
+    # Encode in the background, keeping the mode of the image when the format stores it
+    _export(app, [(target_image, file_name)])
+
+
+def export_all_images(app: 'ImageProcessorApp'):
+    """
+    Export the main image, the compare image and every version in the history to a folder
+    """
+    if app.image is None:
+        messagebox.showinfo("Info", "Please open an image first")
+        return
+
+    folder = filedialog.askdirectory()
+    if not folder:
+        return
+
+    extension = EXPORT_EXTENSIONS[app.export_format.get()]
+    jobs = [(app.image, os.path.join(folder, f"main{extension}"))]
+    if app.compare_image is not None:
+        jobs.append((app.compare_image, os.path.join(folder, f"compare{extension}")))
+    for index, (image, compare_image, _) in enumerate(app.image_history):
+        image, compare_image = materialize(image), materialize(compare_image)
+        jobs.append((image, os.path.join(folder, f"history_{index:03d}{extension}")))
+        if compare_image is not None:
+            jobs.append((compare_image, os.path.join(folder, f"history_{index:03d}_compare{extension}")))
+
+    _export(app, jobs)
+
+
+def _export(app: 'ImageProcessorApp', jobs):
+    """
+    Export images on the export threads and report the throughput in the status bar
+    """
+    settings = _export_settings(app)
+    app.status_text.set(f"Exporting {len(jobs)} image(s)...")
+
+    def on_error(error):
+        app.status_text.set("")
+        messagebox.showinfo("Error", f"Error saving image: {error}")
+
+    app.image_exporter.export(jobs, settings, lambda report: app.status_text.set(format_report(report)), on_error)
+
+
+def _export_settings(app: 'ImageProcessorApp'):
+    """
+    Get the encoder settings of the export controls
+    """
+    return {
+        'jpeg_quality': app.jpeg_quality.get(),
+        'jpeg_subsampling': app.jpeg_subsampling.get(),
+        'png_compress_level': app.png_compress_level.get(),
+        'tiff_compression': app.tiff_compression.get(),
+    }
+
+
+def stream_frames(app: 'ImageProcessorApp'):
+    """
+    Run the operation chain over every frame of a folder and write the results to another folder
+    """
+    try:
+        chain = build_chain(parse_chain(app.stream_chain.get()))
+    except ValueError as e:
+        messagebox.showinfo("Info", str(e))
+        return
+
+    source = filedialog.askdirectory(title="Folder of the frames")
+    if not source:
+        return
+    output_dir = filedialog.askdirectory(title="Folder of the processed frames")
+    if not output_dir:
+        return
+    # The outputs are named after their frames, so they would overwrite frames that are still to be read
+    if os.path.exists(output_dir) and os.path.samefile(source, output_dir):
+        messagebox.showinfo("Info", "Please choose an output folder other than the folder of the frames")
+        return
+
+    app.status_text.set("Streaming frames...")
+
+    def on_error(error):
+        app.status_text.set("")
+        messagebox.showinfo("Error", f"Error streaming frames: {error}")
+
+    app.frame_streamer.stream(
+        source,
+        chain,
+        output_dir,
+        EXPORT_EXTENSIONS[app.export_format.get()],
+        _export_settings(app),
+        lambda report: app.status_text.set(format_stream_report(report)),
+        on_error
     )
 
+
+def save_session(app: 'ImageProcessorApp'):
+    """
+    Save the images and their history to a session file
+    """
+    if app.image is None:
+        messagebox.showinfo("Info", "Please open an image first")
+        return
+
+    file_name = filedialog.asksaveasfilename(
+        defaultextension=SESSION_EXTENSION,
+        filetypes=[("Session files", f"*{SESSION_EXTENSION}"), ("All files", "*.*")]
+    )
     if not file_name:
         return
 
-    image_to_save = target_image.convert("RGB")
-    image_to_save.save(file_name)
+    try:
+        write_session(app, file_name)
+    except Exception as e:
+        messagebox.showinfo("Error", f"Error saving session: {e}")
+        return
+    app.status_text.set(f"Saved session with {len(app.image_history)} version(s) in the history")
+
+
+def open_session(app: 'ImageProcessorApp'):
+    """
+    Open a session file, the versions in the history are read when they are viewed
+    """
+    file_path = filedialog.askopenfilename(
+        filetypes=[("Session files", f"*{SESSION_EXTENSION}"), ("All files", "*.*")]
+    )
+    if file_path == '':
+        return
+
+    try:
+        read_session(app, file_path)
+    except Exception as e:
+        messagebox.showinfo("Error", f"Error opening session: {e}")
+        return
+    app.status_text.set(f"Opened session with {len(app.image_history)} version(s) in the history")
+
 
 def remove_compare_image(app: 'ImageProcessorApp'):
     """